@@ -0,0 +1,164 @@
+# app/batching.py
+import asyncio
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from app.logging_config import get_logger
+
+logger = get_logger("app.batching")
+
+
+class BatchStats:
+    """Distribution of observed micro-batch sizes"""
+
+    def __init__(self):
+        self.sizes = Counter()
+        self.batches = 0
+        self.requests = 0
+
+    def record(self, size: int):
+        self.sizes[size] += 1
+        self.batches += 1
+        self.requests += size
+
+    def percentile(self, q: float) -> int:
+        """Batch size at quantile q (0-1) over all recorded batches"""
+        if not self.batches:
+            return 0
+        target = q * self.batches
+        seen = 0
+        for size in sorted(self.sizes):
+            seen += self.sizes[size]
+            if seen >= target:
+                return size
+        return max(self.sizes)
+
+    def snapshot(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": round(self.requests / self.batches, 3) if self.batches else 0.0,
+            "p50_batch_size": self.percentile(0.50),
+            "p95_batch_size": self.percentile(0.95),
+            "max_batch_size": max(self.sizes) if self.sizes else 0,
+            "distribution": {str(size): self.sizes[size] for size in sorted(self.sizes)}
+        }
+
+
+class MicroBatcher:
+    """Collects concurrent single-row requests and scores them with one vectorized call
+
+    The first queued request opens a batch; the batch is dispatched when the
+    window elapses or when it reaches max_batch_size. The window adapts to load:
+    while the average gap between arrivals is longer than the window, waiting
+    would only add latency, so a batch is dispatched as soon as the queue is
+    empty. score_fn receives the list of items and must return one result per
+    item, in order; it runs in the default executor so the event loop stays free.
+    Every submitted request gets a result or an exception: if the worker task
+    dies, its queued requests fail and the next submit starts a new worker.
+    """
+
+    # Smoothing factor for the moving average of inter-arrival gaps
+    GAP_SMOOTHING = 0.2
+
+    def __init__(self, score_fn: Callable[[List[Any]], List[Any]],
+                 window_ms: float = 2.0, max_batch_size: int = 64):
+        self.score_fn = score_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self.stats = BatchStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_arrival: Optional[float] = None
+        self._mean_gap = float('inf')
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._last_arrival = None
+            self._mean_gap = float('inf')
+            self._worker = loop.create_task(self._run())
+            self._worker.add_done_callback(lambda worker, queue=self._queue: self._worker_stopped(worker, queue))
+
+    def _worker_stopped(self, worker: asyncio.Task, queue: asyncio.Queue):
+        """Fail the requests still queued for a worker that has stopped"""
+        if not worker.cancelled() and worker.exception() is not None:
+            logger.error("❌ Micro-batch worker died", exc_info=worker.exception())
+        error = RuntimeError("Micro-batch worker stopped")
+        while not queue.empty():
+            _, future = queue.get_nowait()
+            if not future.done():
+                future.set_exception(error)
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result from the next batch"""
+        self._ensure_worker()
+        self._record_arrival()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    def _record_arrival(self):
+        now = self._loop.time()
+        if self._last_arrival is not None:
+            gap = now - self._last_arrival
+            if self._mean_gap == float('inf'):
+                self._mean_gap = gap
+            else:
+                self._mean_gap += self.GAP_SMOOTHING * (gap - self._mean_gap)
+        self._last_arrival = now
+
+    async def _collect(self, batch: List):
+        """Fill batch in place, so requests already taken off the queue are never lost"""
+        batch.append(await self._queue.get())
+        deadline = self._loop.time() + self.window
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            if self._mean_gap > self.window:
+                # Light traffic: nothing else is likely to arrive within the window
+                break
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    @staticmethod
+    def _fail(batch: List, error: BaseException):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _run(self):
+        while True:
+            batch: List = []
+            try:
+                await self._collect(batch)
+                self.stats.record(len(batch))
+                items = [item for item, _ in batch]
+                results = await self._loop.run_in_executor(None, self.score_fn, items)
+                if len(results) != len(batch):
+                    raise RuntimeError(f"score_fn returned {len(results)} results for {len(batch)} items")
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                self._fail(batch, e)
+            finally:
+                # Only reached with unresolved futures when the worker itself is stopping
+                self._fail(batch, RuntimeError("Micro-batch worker stopped"))
+
+    def settings(self) -> Dict:
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "mean_arrival_gap_ms": round(self._mean_gap * 1000.0, 3) if self._mean_gap != float('inf') else None
+        }
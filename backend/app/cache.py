@@ -0,0 +1,143 @@
+# app/cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence
+
+
+def file_signature(paths: Sequence[str]):
+    """(path, mtime) for each path, None for files that do not exist"""
+    signature = []
+    for path in paths:
+        try:
+            signature.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            signature.append((path, None))
+    return tuple(signature)
+
+
+class ArtifactCache:
+    """In-memory cache for payloads derived from model artifacts and result files
+
+    Each entry is keyed by name and remembers the model version and the mtimes
+    of the files it was built from. A changed model version invalidates it
+    immediately; file mtimes are re-checked at most every `check_interval`
+    seconds, so a cache hit normally touches neither disk nor pickle.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, build: Callable[[], Any], paths: Sequence[str] = (),
+            version: Optional[str] = None) -> Any:
+        """Cached value for `name`, rebuilt when the version or any file in `paths` changes"""
+        now = time.monotonic()
+        entry = self._entries.get(name)
+
+        if entry is not None and entry["version"] == version:
+            if now - entry["checked_at"] < self.check_interval:
+                self.hits += 1
+                return entry["value"]
+            if file_signature(paths) == entry["signature"]:
+                entry["checked_at"] = now
+                self.hits += 1
+                return entry["value"]
+
+        with self._lock:
+            # Build outside the fast path; signature first so a concurrent write re-triggers a rebuild
+            signature = file_signature(paths)
+            value = build()
+            self._entries[name] = {
+                "value": value,
+                "version": version,
+                "signature": signature,
+                "checked_at": now
+            }
+            self.misses += 1
+            return value
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop one entry, or everything when name is None"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def stats(self) -> Dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class PredictionCache:
+    """Size-bounded LRU cache of prediction payloads with a TTL
+
+    Keys combine the active model version with the applicant's input fields
+    as floats, so 35 and 35.0 hit the same entry and a new model version
+    never serves an old answer. Entries from other versions are dropped as
+    soon as a lookup sees a new version.
+    """
+
+    def __init__(self, fields: Sequence[str], max_size: int = 10000, ttl: float = 300.0):
+        self.fields = list(fields)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def key(self, data: Any, version: str) -> tuple:
+        """Canonical cache key for one applicant under one model version"""
+        return (version,) + tuple(float(getattr(data, field)) for field in self.fields)
+
+    def get(self, data: Any, version: str) -> Optional[Dict]:
+        key = self.key(data, version)
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, data: Any, version: str, payload: Dict):
+        key = self.key(data, version)
+        with self._lock:
+            if version != self._version:
+                # Late result from a request that started on an older model version
+                return
+            self._entries[key] = (time.monotonic(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,122 @@
+# app/logging_config.py
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+# Settings (env)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # "json" or "text"
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 100))  # debug detail for 1 in N requests
+
+_listener = None
+_log_queue = None
+_stream_handler = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any `fields` passed via `extra` merged in"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines, `fields` appended as key=value pairs"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class RequestSampler:
+    """Thread-safe 1-in-N sampler for per-request debug detail"""
+
+    def __init__(self, every: int = LOG_SAMPLE_EVERY):
+        self.every = max(1, every)
+        self._counter = itertools.count()
+
+    def sample(self) -> bool:
+        # itertools.count is atomic under the GIL
+        return next(self._counter) % self.every == 0
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> None:
+    """Route the `app` loggers through a queue drained by a background writer thread
+
+    Request handlers only pay for putting a record on an in-memory queue; the
+    formatting and console I/O happen on the listener thread. Safe to call
+    more than once.
+    """
+    global _listener, _log_queue, _stream_handler
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        _stream_handler = logging.StreamHandler(sys.stdout)
+        _stream_handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        _log_queue = queue.SimpleQueue()
+        root = logging.getLogger("app")
+        root.setLevel(level)
+        root.addHandler(logging.handlers.QueueHandler(_log_queue))
+        root.propagate = False
+
+        _start_listener()
+        atexit.register(shutdown_logging)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def _start_listener():
+    global _listener
+    _listener = logging.handlers.QueueListener(_log_queue, _stream_handler,
+                                               respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_after_fork():
+    """Threads don't survive fork: give each forked worker its own writer thread"""
+    global _setup_lock
+    _setup_lock = threading.Lock()
+    if _listener is not None:
+        _start_listener()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the `app` hierarchy, with the queue pipeline set up"""
+    setup_logging()
+    return logging.getLogger(name if name.startswith("app") else f"app.{name}")
@@ -1,18 +1,56 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, ValidationError
+from starlette.requests import ClientDisconnect
 import numpy as np
-import joblib
+import asyncio
 import json
+import logging
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.batching import MicroBatcher
+from app.cache import ArtifactCache, PredictionCache
+from app.logging_config import RequestSampler, get_logger
+from app.model_holder import BUNDLE_ARTIFACT, MODEL_DIR, ModelBundle, ModelHolder
+from app.rules import DECISIONS, compute_risk_scores, decision_codes, insight_masks, render_insights
+from app.serialization import FastJSONResponse, dumps
+from app.streaming import BodyStreamingResponse, RowBlock, RowBlockParser, StreamFormatError
+from app.scoring import (BASE_INPUT_FIELDS, INPUT_FIELDS, feature_matrix, parse_frame,
+                         score_columns, validate_columns)
+from app.telemetry import MetricsMiddleware, render_metrics, stage_timer
+from ml_model.features import FEATURE_INDEX, FEATURE_ORDER, engineer_features
+
+logger = get_logger("app.main")
+
+# Per-request feature detail is logged at DEBUG for 1 in N requests
+debug_sampler = RequestSampler()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load and warm up the model in the background once the server is up
+
+    Liveness answers immediately and readiness reports "loading" until the
+    model is active. A model preloaded before startup (the pre-fork parent in
+    run.py) is used as is.
+    """
+    if model_holder.current is None:
+        model_holder.load_in_background()
+    model_holder.start_watching(MODEL_WATCH_INTERVAL)
+    yield
+    model_holder.stop_watching()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Credit Score Prediction API",
     description="API for predicting credit scores using ML",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -24,21 +62,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load model and preprocessing objects
-try:
-    model = joblib.load('ml_model/saved_models/credit_model.pkl')
-    scaler = joblib.load('ml_model/saved_models/scaler.pkl')
-    label_encoder = joblib.load('ml_model/saved_models/label_encoder.pkl')
-    features = joblib.load('ml_model/saved_models/features.pkl')
-    print("✅ Models loaded successfully")
-    print(f"📊 Model expects {len(features)} features: {features}")
-except Exception as e:
-    print(f"❌ Error loading models: {e}")
-    # Create dummy objects for development
-    model = None
-    scaler = None
-    label_encoder = None
-    features = []
+# Request latency, status counts, errors and in-flight requests per endpoint
+app.add_middleware(MetricsMiddleware)
+
+def score_feature_rows(items: List[Tuple[ModelBundle, np.ndarray]]) -> List[str]:
+    """Score bands for (model bundle, feature row) items, one vectorized call per model version"""
+    results: List[Optional[str]] = [None] * len(items)
+    groups: Dict[int, List[int]] = {}
+    for i, (bundle, _) in enumerate(items):
+        groups.setdefault(id(bundle), []).append(i)
+    for positions in groups.values():
+        bundle = items[positions[0]][0]
+        bands = bundle.predict_bands(np.vstack([items[i][1] for i in positions]))
+        for i, band in zip(positions, bands.tolist()):
+            results[i] = band
+    return results
+
+# Micro-batching: concurrent /predict calls arriving within the window are
+# scored together in one vectorized call instead of one tiny call each
+MICROBATCH_ENABLED = os.getenv("PREDICT_MICROBATCH", "1") == "1"
+MICROBATCH_WINDOW_MS = float(os.getenv("PREDICT_BATCH_WINDOW_MS", 2.0))
+MICROBATCH_MAX_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", 64))
+
+batcher = MicroBatcher(score_feature_rows,
+                       window_ms=MICROBATCH_WINDOW_MS,
+                       max_batch_size=MICROBATCH_MAX_SIZE)
+
+# Model hot-reload: poll MODEL_DIR every N seconds (0 disables);
+# POST /admin/reload is always available, guarded by ADMIN_TOKEN when set
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", 0))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+MODEL_FILE = os.path.join(MODEL_DIR, "credit_model.pkl")
+BUNDLE_FILE = os.path.join(MODEL_DIR, BUNDLE_ARTIFACT)
+METRICS_FILE = "ml_model/evaluation_results/detailed_metrics.json"
+
+# Payloads for /metrics, /feature-importance and /status, rebuilt only when the
+# model version or the underlying files change
+artifact_cache = ArtifactCache(check_interval=float(os.getenv("ARTIFACT_CACHE_CHECK_INTERVAL", 1.0)))
 
 # Pydantic model for input validation
 class CreditData(BaseModel):
@@ -55,389 +116,583 @@ class PredictionResponse(BaseModel):
     status: str
     prediction: Dict
 
-def get_loan_decision(score_band: str, risk_score: float) -> Dict:
-    """Determine loan decision based on credit score band and risk"""
-    if score_band == "Excellent":
-        return {
-            "decision": "APPROVED",
-            "risk_level": "LOW",
-            "interest_rate": "7.5% - 9.5%",
-            "approval_chance": "Very High (>90%)"
+class BatchPredictionResponse(BaseModel):
+    status: str
+    total: int
+    succeeded: int
+    failed: int
+    results: List[Dict]
+
+# Optional /predict response cache: entries per worker (0 disables) and TTL in seconds
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 0))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", 300))
+
+prediction_cache = (PredictionCache(INPUT_FIELDS, max_size=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL)
+                    if PREDICTION_CACHE_SIZE > 0 else None)
+
+# Largest number of applicants accepted by /predict/batch in one call
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 10000))
+
+# Streaming bulk scoring: rows scored per vectorized block, the longest input
+# line accepted, and how many scored pieces may wait for the client before
+# reading the body pauses
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 5000))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", 64 * 1024))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 8))
+
+def to_columns(rows: List[CreditData]) -> Dict[str, np.ndarray]:
+    """Stack validated applicants into one float array per input field"""
+    return {
+        field: np.array([getattr(row, field) for row in rows], dtype=float)
+        for field in INPUT_FIELDS
+    }
+
+# Engineered features in the prediction payload: (response key, FEATURE_ORDER index)
+ENGINEERED_RESPONSE_FIELDS = [
+    ("loan_to_income_ratio", FEATURE_INDEX['Loan_to_Income_Ratio']),
+    ("utilization_per_loan", FEATURE_INDEX['Utilization_Per_Loan']),
+    ("payment_reliability", FEATURE_INDEX['Payment_Reliability']),
+    ("debt_to_income", FEATURE_INDEX['Debt_to_Income']),
+    ("score_to_income_ratio", FEATURE_INDEX['Score_to_Income_Ratio']),
+    ("age_credit_interaction", FEATURE_INDEX['Age_Credit_Interaction'])
+]
+
+def build_prediction(data: CreditData, score_band: str, risk_score: float, features_row: np.ndarray,
+                     decision_code: int, insight_row: np.ndarray) -> Dict:
+    """Render the prediction payload for one applicant from its rule-engine codes
+
+    features_row is in FEATURE_ORDER; decision_code and insight_row come from
+    decision_codes and insight_masks. Every value is a plain JSON type, so the
+    payload can be serialized directly.
+    """
+    feats = features_row.tolist()
+    decision_info = DECISIONS[decision_code]
+    insights = render_insights(np.flatnonzero(insight_row).tolist(), data, score_band, risk_score)
+
+    features = {
+        # Basic features:
+        "age": data.age,
+        "monthly_income": data.monthly_income,
+        "loan_amount": data.loan_amount,
+        "loan_tenure_months": data.loan_tenure_months,
+        "credit_utilization": data.credit_utilization,
+        "missed_payments": data.missed_payments,
+        "total_active_loans": data.total_active_loans,
+        "credit_history_years": data.credit_history_years
+    }
+    # Engineered features:
+    for key, index in ENGINEERED_RESPONSE_FIELDS:
+        features[key] = round(feats[index], 6)
+
+    return {
+        "credit_score_band": score_band,
+        "risk_score": round(risk_score, 2),
+        "loan_decision": decision_info['decision'],
+        "risk_level": decision_info['risk_level'],
+        "suggested_interest_rate": decision_info['interest_rate'],
+        "approval_chance": decision_info['approval_chance'],
+        "features": features,
+        "insights": insights,
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Sample applicant profiles, served by /sample-data and used to warm up new models
+SAMPLE_APPLICANTS = [
+    {
+        "description": "Good credit applicant",
+        "data": {
+            "age": 35,
+            "monthly_income": 75000,
+            "loan_amount": 500000,
+            "credit_utilization": 0.3,
+            "missed_payments": 0,
+            "total_active_loans": 2,
+            "credit_history_years": 8,
+            "loan_tenure_months": 60
         }
-    elif score_band == "Good":
-        return {
-            "decision": "APPROVED",
-            "risk_level": "MODERATE",
-            "interest_rate": "10.5% - 12.5%",
-            "approval_chance": "High (75-90%)"
+    },
+    {
+        "description": "Average credit applicant",
+        "data": {
+            "age": 28,
+            "monthly_income": 45000,
+            "loan_amount": 300000,
+            "credit_utilization": 0.6,
+            "missed_payments": 1,
+            "total_active_loans": 3,
+            "credit_history_years": 4,
+            "loan_tenure_months": 48
         }
-    elif score_band == "Fair":
-        return {
-            "decision": "APPROVED WITH CONDITIONS",
-            "risk_level": "MEDIUM",
-            "interest_rate": "13.5% - 15.5%",
-            "approval_chance": "Medium (50-75%)"
+    },
+    {
+        "description": "Poor credit applicant",
+        "data": {
+            "age": 22,
+            "monthly_income": 25000,
+            "loan_amount": 200000,
+            "credit_utilization": 0.9,
+            "missed_payments": 3,
+            "total_active_loans": 5,
+            "credit_history_years": 1,
+            "loan_tenure_months": 36
         }
-    else:  # Poor
-        if risk_score < 70:
-            return {
-                "decision": "REVIEW REQUIRED",
-                "risk_level": "HIGH",
-                "interest_rate": "16.5% - 18.5%",
-                "approval_chance": "Low (25-50%)"
-            }
-        else:
-            return {
-                "decision": "DECLINED",
-                "risk_level": "VERY HIGH",
-                "interest_rate": "N/A",
-                "approval_chance": "Very Low (<25%)"
-            }
-
-def generate_insights(data: CreditData, risk_score: float, score_band: str, 
-                      loan_to_income: float, utilization_per_loan: float) -> Dict[str, List[str]]:
-    """Generate actionable insights based on user's data"""
-    insights = []
-    warnings = []
-    recommendations = []
-    
-    # Warnings
-    if data.credit_utilization > 0.7:
-        warnings.append("High credit utilization (>70%). Consider paying down balances to improve score.")
-    
-    if data.missed_payments > 2:
-        warnings.append(f"{data.missed_payments} missed payments detected. Focus on timely payments.")
-    
-    if loan_to_income > 0.5:
-        warnings.append("High loan-to-income ratio. Consider reducing loan amount or increasing income.")
-    
-    if utilization_per_loan > 0.4:
-        warnings.append("High credit utilization per active loan. Consider closing unnecessary accounts.")
-    
-    # Recommendations
-    if data.credit_history_years < 2:
-        recommendations.append("Short credit history. Keep accounts open and active to build history.")
-    
-    if data.age < 25:
-        recommendations.append("Young borrower. Building credit history is key at this stage.")
-    
-    # Positive feedback
-    if data.missed_payments == 0:
-        recommendations.append("Excellent payment history - keep it up!")
-    
-    if data.credit_utilization < 0.3:
-        recommendations.append("Good credit utilization ratio.")
-    
-    if loan_to_income < 0.3:
-        recommendations.append("Healthy loan-to-income ratio.")
-    
-    # Score-based insights
-    if score_band in ["Poor", "Fair"]:
-        recommendations.append("Consider improving your credit score by reducing outstanding debt.")
-    
-    return {
-        "warnings": warnings,
-        "recommendations": recommendations,
-        "score_analysis": f"Your credit score is categorized as '{score_band}' with a risk score of {risk_score:.1f}/100"
     }
+]
+
+def warmup_bundle(bundle: ModelBundle) -> None:
+    """Run the sample applicants through a newly loaded model before it goes live"""
+    rows = [CreditData.model_validate(sample["data"]) for sample in SAMPLE_APPLICANTS]
+    bands = bundle.predict_bands(feature_matrix(to_columns(rows)))
+    unknown = set(bands.tolist()) - set(bundle.class_labels.tolist())
+    if len(bands) != len(rows) or unknown:
+        raise ValueError(f"Warmup produced unexpected predictions: {bands.tolist()}")
+
+# Active model version, swapped atomically on reload; loaded by the lifespan handler
+model_holder = ModelHolder(warmup=warmup_bundle)
+
+def require_model() -> ModelBundle:
+    """The active model bundle; 503 while the initial load is running, 500 if no model could be loaded"""
+    bundle = model_holder.current
+    if bundle is None:
+        if model_holder.state == "loading":
+            raise HTTPException(status_code=503, detail="Model is still loading. Please retry shortly.")
+        raise HTTPException(status_code=500, detail="Model not loaded. Please train the model first.")
+    return bundle
+
+# Constant payloads, serialized once at import instead of on every request
+ROOT_RESPONSE = dumps({
+    "message": "Credit Score Prediction API",
+    "status": "running",
+    "version": "1.0.0",
+    "endpoints": [
+        "/docs - API documentation",
+        "/health - Health check",
+        "/health/live - Liveness probe",
+        "/health/ready - Readiness probe (503 until the model is loaded)",
+        "/status - System status",
+        "/predict - Make predictions",
+        "/predict/batch - Score many applicants in one call",
+        "/predict/stream - Stream-score NDJSON or CSV bodies",
+        "/metrics - Model performance metrics",
+        "/metrics/batching - Micro-batching statistics",
+        "/metrics/runtime - Latency histograms and request counters (Prometheus format)",
+        "/feature-importance - Feature importance data",
+        "/sample-data - Get sample input data",
+        "/admin/reload - Hot-reload model artifacts"
+    ]
+})
 
 @app.get("/")
-def read_root():
-    return {
-        "message": "Credit Score Prediction API",
-        "status": "running",
-        "version": "1.0.0",
-        "endpoints": [
-            "/docs - API documentation",
-            "/health - Health check",
-            "/status - System status",
-            "/predict - Make predictions",
-            "/metrics - Model performance metrics",
-            "/feature-importance - Feature importance data",
-            "/sample-data - Get sample input data"
-        ]
-    }
+async def read_root():
+    return FastJSONResponse(ROOT_RESPONSE)
 
 @app.get("/health")
 def health_check():
+    bundle = model_holder.current
     return {
-        "status": "healthy" if model is not None else "degraded",
-        "model_loaded": model is not None,
-        "scaler_loaded": scaler is not None,
-        "encoder_loaded": label_encoder is not None,
-        "features_loaded": len(features) > 0
+        "status": "healthy" if bundle is not None else ("loading" if model_holder.state == "loading" else "degraded"),
+        "model_loaded": bundle is not None,
+        "scaler_loaded": bundle is not None and bundle.scaler is not None,
+        "encoder_loaded": bundle is not None and bundle.class_labels is not None,
+        "features_loaded": bundle is not None and len(bundle.features) > 0,
+        **model_holder.info()
     }
 
+@app.get("/health/live")
+def liveness():
+    """Liveness probe: the process is up and serving requests, whether or not a model is loaded"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness():
+    """Readiness probe: 200 once a model is active, 503 while loading or after a failed load"""
+    state = model_holder.state
+    body = {"status": state, **model_holder.info()}
+    return FastJSONResponse(body, status_code=200 if state == "ready" else 503)
+
 @app.get("/status")
 async def get_system_status():
     """Get system status"""
     return {
         "status": "running",
         "timestamp": datetime.now().isoformat(),
-        "model_loaded": os.path.exists("ml_model/saved_models/credit_model.pkl"),
+        "model_loaded": artifact_cache.get("model_file_present",
+                                           lambda: os.path.exists(MODEL_FILE) or os.path.exists(BUNDLE_FILE),
+                                           paths=[MODEL_FILE, BUNDLE_FILE]),
         "api_version": "1.0.0",
-        "total_features": len(features) if features else 0,
-        "supported_score_bands": ["Poor", "Fair", "Good", "Excellent"]
+        "total_features": len(model_holder.current.features) if model_holder.current else 0,
+        "supported_score_bands": ["Poor", "Fair", "Good", "Excellent"],
+        "artifact_cache": artifact_cache.stats(),
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None,
+        **model_holder.info()
     }
 
-@app.get("/metrics")
-async def get_model_metrics():
-    """Get model performance metrics"""
-    metrics_file = "ml_model/evaluation_results/detailed_metrics.json"
-    if os.path.exists(metrics_file):
-        try:
-            with open(metrics_file, 'r') as f:
-                metrics = json.load(f)
-            return {
-                "status": "success",
-                "metrics": metrics,
-                "last_updated": datetime.fromtimestamp(os.path.getmtime(metrics_file)).isoformat()
-            }
-        except Exception as e:
-            return {"status": "error", "message": f"Error reading metrics: {str(e)}"}
-    
-    # Return default metrics if file doesn't exist
+@app.post("/admin/reload")
+def reload_model(x_admin_token: Optional[str] = Header(default=None)):
+    """Load, validate and warm up the artifacts on disk, then swap them in atomically"""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        return {"status": "success", **model_holder.reload()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed, keeping current model: {str(e)}")
+
+# Served when no trained model has written its evaluation results yet
+DEFAULT_METRICS_RESPONSE = {
+    "status": "success",
+    "metrics": {
+        "accuracy": 0.85,
+        "precision": 0.83,
+        "recall": 0.82,
+        "f1_score": 0.82,
+        "confusion_matrix": [[150, 20], [25, 180]],
+        "classification_report": {
+            "Poor": {"precision": 0.80, "recall": 0.85, "f1-score": 0.82, "support": 170},
+            "Fair": {"precision": 0.82, "recall": 0.78, "f1-score": 0.80, "support": 165},
+            "Good": {"precision": 0.87, "recall": 0.85, "f1-score": 0.86, "support": 175},
+            "Excellent": {"precision": 0.90, "recall": 0.88, "f1-score": 0.89, "support": 180}
+        }
+    },
+    "note": "Using default metrics - train model to get actual metrics"
+}
+
+def build_metrics_payload() -> Dict:
+    """Read and parse the evaluation results written by training"""
+    if not os.path.exists(METRICS_FILE):
+        return DEFAULT_METRICS_RESPONSE
+    with open(METRICS_FILE, 'r') as f:
+        metrics = json.load(f)
     return {
         "status": "success",
-        "metrics": {
-            "accuracy": 0.85,
-            "precision": 0.83,
-            "recall": 0.82,
-            "f1_score": 0.82,
-            "confusion_matrix": [[150, 20], [25, 180]],
-            "classification_report": {
-                "Poor": {"precision": 0.80, "recall": 0.85, "f1-score": 0.82, "support": 170},
-                "Fair": {"precision": 0.82, "recall": 0.78, "f1-score": 0.80, "support": 165},
-                "Good": {"precision": 0.87, "recall": 0.85, "f1-score": 0.86, "support": 175},
-                "Excellent": {"precision": 0.90, "recall": 0.88, "f1-score": 0.89, "support": 180}
-            }
-        },
-        "note": "Using default metrics - train model to get actual metrics"
+        "metrics": metrics,
+        "last_updated": datetime.fromtimestamp(os.path.getmtime(METRICS_FILE)).isoformat()
     }
 
-@app.get("/feature-importance")
-async def get_feature_importance():
-    """Get feature importance data"""
+@app.get("/metrics")
+async def get_model_metrics():
+    """Get model performance metrics (cached, serialized, until the metrics file changes)"""
     try:
-        features_file = "ml_model/saved_models/features.pkl"
-        model_file = "ml_model/saved_models/credit_model.pkl"
-        
-        if os.path.exists(features_file) and os.path.exists(model_file):
-            features_list = joblib.load(features_file)
-            model = joblib.load(model_file)
-            
-            if hasattr(model, 'feature_importances_'):
-                importance = model.feature_importances_
-                # Sort by importance
-                feature_importance = sorted(
-                    [{"feature": feat, "importance": float(imp)} 
-                     for feat, imp in zip(features_list, importance)],
-                    key=lambda x: x["importance"],
-                    reverse=True
-                )
-                return {
-                    "status": "success",
-                    "total_features": len(feature_importance),
-                    "feature_importance": feature_importance
-                }
-        
-        # Return default if no model
+        return FastJSONResponse(artifact_cache.get("metrics", lambda: dumps(build_metrics_payload()),
+                                                   paths=[METRICS_FILE]))
+    except Exception as e:
+        return {"status": "error", "message": f"Error reading metrics: {str(e)}"}
+
+# Served when no tree-based model is loaded
+DEFAULT_FEATURE_IMPORTANCE_RESPONSE = {
+    "status": "success",
+    "total_features": 14,
+    "feature_importance": [
+        {"feature": "Credit_Utilization", "importance": 0.25},
+        {"feature": "Missed_Payments_Last_12M", "importance": 0.18},
+        {"feature": "Monthly_Income", "importance": 0.15},
+        {"feature": "Loan_to_Income_Ratio", "importance": 0.12},
+        {"feature": "Credit_History_Years", "importance": 0.10},
+        {"feature": "Age", "importance": 0.08},
+        {"feature": "Total_Active_Loans", "importance": 0.05},
+        {"feature": "Utilization_Per_Loan", "importance": 0.04},
+        {"feature": "Loan_Amount", "importance": 0.03},
+        {"feature": "Payment_Reliability", "importance": 0.02},
+        {"feature": "Debt_to_Income", "importance": 0.015},
+        {"feature": "Age_Credit_Interaction", "importance": 0.01},
+        {"feature": "Score_to_Income_Ratio", "importance": 0.005},
+        {"feature": "Loan_Tenure_Months", "importance": 0.005}
+    ],
+    "note": "Using default feature importance - train model to get actual values"
+}
+
+def build_feature_importance_payload(bundle: Optional[ModelBundle]) -> Dict:
+    """Feature importances of the loaded model, sorted, or the defaults"""
+    if bundle is not None and bundle.feature_importances is not None:
+        importance = bundle.feature_importances
+        # Sort by importance
+        feature_importance = sorted(
+            [{"feature": feat, "importance": float(imp)} 
+             for feat, imp in zip(bundle.features, importance)],
+            key=lambda x: x["importance"],
+            reverse=True
+        )
         return {
             "status": "success",
-            "total_features": 14,
-            "feature_importance": [
-                {"feature": "Credit_Utilization", "importance": 0.25},
-                {"feature": "Missed_Payments_Last_12M", "importance": 0.18},
-                {"feature": "Monthly_Income", "importance": 0.15},
-                {"feature": "Loan_to_Income_Ratio", "importance": 0.12},
-                {"feature": "Credit_History_Years", "importance": 0.10},
-                {"feature": "Age", "importance": 0.08},
-                {"feature": "Total_Active_Loans", "importance": 0.05},
-                {"feature": "Utilization_Per_Loan", "importance": 0.04},
-                {"feature": "Loan_Amount", "importance": 0.03},
-                {"feature": "Payment_Reliability", "importance": 0.02},
-                {"feature": "Debt_to_Income", "importance": 0.015},
-                {"feature": "Age_Credit_Interaction", "importance": 0.01},
-                {"feature": "Score_to_Income_Ratio", "importance": 0.005},
-                {"feature": "Loan_Tenure_Months", "importance": 0.005}
-            ],
-            "note": "Using default feature importance - train model to get actual values"
+            "total_features": len(feature_importance),
+            "feature_importance": feature_importance
         }
+    
+    # Return default if no model
+    return DEFAULT_FEATURE_IMPORTANCE_RESPONSE
+
+@app.get("/feature-importance")
+async def get_feature_importance():
+    """Get feature importance data (computed once per model version)"""
+    try:
+        bundle = model_holder.current
+        return FastJSONResponse(artifact_cache.get("feature_importance",
+                                                   lambda: dumps(build_feature_importance_payload(bundle)),
+                                                   version=bundle.version if bundle else None))
     except Exception as e:
         return {"status": "error", "message": f"Error getting feature importance: {str(e)}"}
 
+SAMPLE_DATA_RESPONSE = dumps({
+    "status": "success",
+    "samples": SAMPLE_APPLICANTS
+})
+
 @app.get("/sample-data")
 async def get_sample_data():
     """Get sample input data for testing"""
+    return FastJSONResponse(SAMPLE_DATA_RESPONSE)
+
+@app.get("/metrics/batching")
+async def get_batching_metrics():
+    """Get micro-batching settings and the observed batch-size distribution"""
     return {
         "status": "success",
-        "samples": [
-            {
-                "description": "Good credit applicant",
-                "data": {
-                    "age": 35,
-                    "monthly_income": 75000,
-                    "loan_amount": 500000,
-                    "credit_utilization": 0.3,
-                    "missed_payments": 0,
-                    "total_active_loans": 2,
-                    "credit_history_years": 8,
-                    "loan_tenure_months": 60
-                }
-            },
-            {
-                "description": "Average credit applicant",
-                "data": {
-                    "age": 28,
-                    "monthly_income": 45000,
-                    "loan_amount": 300000,
-                    "credit_utilization": 0.6,
-                    "missed_payments": 1,
-                    "total_active_loans": 3,
-                    "credit_history_years": 4,
-                    "loan_tenure_months": 48
-                }
-            },
-            {
-                "description": "Poor credit applicant",
-                "data": {
-                    "age": 22,
-                    "monthly_income": 25000,
-                    "loan_amount": 200000,
-                    "credit_utilization": 0.9,
-                    "missed_payments": 3,
-                    "total_active_loans": 5,
-                    "credit_history_years": 1,
-                    "loan_tenure_months": 36
-                }
-            }
-        ]
+        "enabled": MICROBATCH_ENABLED,
+        "settings": batcher.settings(),
+        "batches": batcher.stats.snapshot()
     }
 
+@app.get("/metrics/runtime", response_class=PlainTextResponse)
+async def get_runtime_metrics():
+    """Runtime latency histograms and request counters of this worker, in Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.post("/predict", response_model=PredictionResponse)
-def predict_credit_score(data: CreditData):
+async def predict_credit_score(data: CreditData):
+    # Each stage is timed into credit_api_stage_duration_seconds (see /metrics/runtime)
     try:
         # Validate input
-        if data.monthly_income <= 0:
-            raise HTTPException(status_code=400, detail="Income must be positive")
-        
-        if data.credit_utilization < 0 or data.credit_utilization > 1:
-            raise HTTPException(status_code=400, detail="Credit utilization must be between 0 and 1")
+        with stage_timer("validation"):
+            if data.monthly_income <= 0:
+                raise HTTPException(status_code=400, detail="Income must be positive")
+            
+            if data.credit_utilization < 0 or data.credit_utilization > 1:
+                raise HTTPException(status_code=400, detail="Credit utilization must be between 0 and 1")
+            
+            if data.missed_payments < 0:
+                raise HTTPException(status_code=400, detail="Missed payments cannot be negative")
+            
+            if data.total_active_loans < 0:
+                raise HTTPException(status_code=400, detail="Total active loans cannot be negative")
+            
+            if data.loan_tenure_months <= 0:
+                raise HTTPException(status_code=400, detail="Loan tenure must be positive")
         
-        if data.missed_payments < 0:
-            raise HTTPException(status_code=400, detail="Missed payments cannot be negative")
+        # Check if model is loaded; this request stays on this version even if a reload happens
+        bundle = require_model()
         
-        if data.total_active_loans < 0:
-            raise HTTPException(status_code=400, detail="Total active loans cannot be negative")
+        # Repeat applicants are answered from the cache; the timestamp is always fresh
+        if prediction_cache is not None:
+            with stage_timer("cache_lookup"):
+                cached = prediction_cache.get(data, bundle.version)
+            if cached is not None:
+                return FastJSONResponse({
+                    "status": "success",
+                    "prediction": {**cached, "timestamp": datetime.now().isoformat()}
+                })
         
-        if data.loan_tenure_months <= 0:
-            raise HTTPException(status_code=400, detail="Loan tenure must be positive")
+        # All 14 model features in FEATURE_ORDER, same formulas as training
+        with stage_timer("features"):
+            features_row = engineer_features([[getattr(data, field) for field in BASE_INPUT_FIELDS]])[0]
         
-        # Check if model is loaded
-        if model is None or scaler is None or label_encoder is None:
-            raise HTTPException(status_code=500, detail="Model not loaded. Please train the model first.")
+        # Debug logging (sampled, one structured record instead of per-feature lines)
+        if logger.isEnabledFor(logging.DEBUG) and debug_sampler.sample():
+            logger.debug("🔧 Features calculated",
+                         extra={"fields": {"feature_count": len(FEATURE_ORDER),
+                                           "features": {name: round(value, 6) for name, value
+                                                        in zip(FEATURE_ORDER, features_row.tolist())}}})
         
-        # Calculate ALL engineered features
-        loan_to_income = data.loan_amount / data.monthly_income if data.monthly_income > 0 else 0
-        utilization_per_loan = data.credit_utilization / (data.total_active_loans + 0.001)
+        # Make prediction, batched with concurrent requests (scaling is folded
+        # into the serving model when available). "inference" includes the wait
+        # for the micro-batch; the model stages inside it are timed per batch
+        with stage_timer("inference"):
+            if MICROBATCH_ENABLED:
+                score_band = await batcher.submit((bundle, features_row))
+            else:
+                score_band = (await run_in_threadpool(score_feature_rows, [(bundle, features_row)]))[0]
         
-        # Engineered features
-        payment_reliability = 1.0 / (1.0 + data.missed_payments)
-        debt_to_income = (data.total_active_loans * 100000) / (data.monthly_income + 0.001)
-        age_credit_interaction = data.age * data.credit_history_years
-        score_to_income_ratio = 500 / (data.monthly_income + 0.001)
+        # Risk score (0-100), decision and insights from the rules engine
+        with stage_timer("rules"):
+            X = features_row[np.newaxis, :]
+            risk_score = float(compute_risk_scores(X)[0])
+            decision_code = int(decision_codes([score_band], [risk_score])[0])
+            insight_row = insight_masks(X, [score_band])[0]
         
-        # Create COMPLETE features dictionary with ALL 14 features
-        features_dict = {
-            # Basic features (8):
-            'Age': data.age,
-            'Monthly_Income': data.monthly_income,
-            'Loan_Amount': data.loan_amount,
-            'Loan_Tenure_Months': data.loan_tenure_months,
-            'Credit_Utilization': data.credit_utilization,
-            'Missed_Payments_Last_12M': data.missed_payments,
-            'Total_Active_Loans': data.total_active_loans,
-            'Credit_History_Years': data.credit_history_years,
+        with stage_timer("response"):
+            prediction = build_prediction(data, score_band, risk_score, features_row, decision_code, insight_row)
+            if prediction_cache is not None:
+                prediction_cache.put(data, bundle.version, prediction)
             
-            # Engineered features (6):
-            'Loan_to_Income_Ratio': loan_to_income,
-            'Utilization_Per_Loan': utilization_per_loan,
-            'Payment_Reliability': payment_reliability,
-            'Debt_to_Income': debt_to_income,
-            'Score_to_Income_Ratio': score_to_income_ratio,
-            'Age_Credit_Interaction': age_credit_interaction
-        }
-        
-        # Debug logging
-        print(f"🔧 Features calculated: {len(features_dict)}")
-        for key, value in features_dict.items():
-            print(f"  {key}: {value:.6f}")
-        
-        # Create feature array in correct order
-        features_array = np.array([[features_dict[feature] for feature in features]])
-        
-        # Scale features
-        features_scaled = scaler.transform(features_array)
-        
-        # Make prediction
-        prediction_encoded = model.predict(features_scaled)
-        
-        # Decode prediction
-        score_band = label_encoder.inverse_transform(prediction_encoded)[0]
+            # Plain dict straight to orjson; PredictionResponse documents the shape
+            return FastJSONResponse({"status": "success", "prediction": prediction})
         
-        # Calculate risk score (0-100)
-        risk_score = min(100, max(0, 
-            (data.missed_payments * 10) + 
-            (data.credit_utilization * 30) + 
-            (loan_to_income * 20) +
-            (utilization_per_loan * 10) +
-            ((data.age < 25) * 10) +
-            (data.total_active_loans * 5)
-        ))
-        
-        # Get loan decision using business rules
-        decision_info = get_loan_decision(score_band, risk_score)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+def predict_credit_score_batch(applicants: List[Any]):
+    """Score many applicants at once; invalid rows get a per-row error instead of failing the batch"""
+    if len(applicants) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_SIZE} applicants)")
+    
+    bundle = require_model()
+    
+    try:
+        results: List[Optional[Dict]] = [None] * len(applicants)
         
-        # Generate insights
-        insights = generate_insights(data, risk_score, score_band, loan_to_income, utilization_per_loan)
+        # Schema validation per row
+        rows: List[CreditData] = []
+        row_index: List[int] = []
+        for i, raw in enumerate(applicants):
+            if not isinstance(raw, dict):
+                results[i] = {"index": i, "status": "error", "detail": "Expected a JSON object"}
+                continue
+            try:
+                rows.append(CreditData.model_validate(raw))
+                row_index.append(i)
+            except ValidationError as e:
+                detail = "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors())
+                results[i] = {"index": i, "status": "error", "detail": detail}
         
-        return PredictionResponse(
-            status="success",
-            prediction={
-                "credit_score_band": score_band,
-                "risk_score": round(risk_score, 2),
-                "loan_decision": decision_info['decision'],
-                "risk_level": decision_info['risk_level'],
-                "suggested_interest_rate": decision_info['interest_rate'],
-                "approval_chance": decision_info['approval_chance'],
-                "features": {
-                    # Basic features:
-                    "age": data.age,
-                    "monthly_income": data.monthly_income,
-                    "loan_amount": data.loan_amount,
-                    "loan_tenure_months": data.loan_tenure_months,
-                    "credit_utilization": data.credit_utilization,
-                    "missed_payments": data.missed_payments,
-                    "total_active_loans": data.total_active_loans,
-                    "credit_history_years": data.credit_history_years,
-                    
-                    # Engineered features:
-                    "loan_to_income_ratio": round(loan_to_income, 6),
-                    "utilization_per_loan": round(utilization_per_loan, 6),
-                    "payment_reliability": round(payment_reliability, 6),
-                    "debt_to_income": round(debt_to_income, 6),
-                    "score_to_income_ratio": round(score_to_income_ratio, 6),
-                    "age_credit_interaction": round(age_credit_interaction, 6)
-                },
-                "insights": insights,
-                "timestamp": datetime.now().isoformat()
-            }
-        )
+        if rows:
+            # Business validation as column masks
+            cols = to_columns(rows)
+            errors = validate_columns(cols)
+            valid = np.array([error is None for error in errors], dtype=bool)
+            for pos in np.flatnonzero(~valid):
+                results[row_index[pos]] = {"index": row_index[pos], "status": "error", "detail": errors[pos]}
+            
+            if valid.any():
+                # Features, scaling, prediction and risk for all valid rows at once
+                valid_cols = {field: values[valid] for field, values in cols.items()}
+                score_bands, risk_scores, X = score_columns(bundle, valid_cols)
+                codes = decision_codes(score_bands, risk_scores)
+                masks = insight_masks(X, score_bands)
+                
+                for k, pos in enumerate(np.flatnonzero(valid)):
+                    i = row_index[pos]
+                    results[i] = {
+                        "index": i,
+                        "status": "success",
+                        "prediction": build_prediction(rows[pos], str(score_bands[k]), float(risk_scores[k]),
+                                                       X[k], int(codes[k]), masks[k])
+                    }
         
+        failed = sum(1 for r in results if r["status"] == "error")
+        return FastJSONResponse({
+            "status": "success",
+            "total": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "results": results
+        })
+    
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
+
+def score_stream_block(block: RowBlock, bundle: ModelBundle) -> bytes:
+    """Score one parsed block of streamed rows into NDJSON lines, with inline per-row errors"""
+    import pandas as pd
+    
+    cols, errors = parse_frame(pd.DataFrame(block.columns))
+    # A line that could not be parsed keeps its parse error
+    errors = [parse_error or error for parse_error, error in zip(block.errors, errors)]
+    
+    valid = np.array([error is None for error in errors], dtype=bool)
+    if valid.any():
+        bands, risk_scores, _ = score_columns(bundle, {field: values[valid] for field, values in cols.items()})
+        codes = decision_codes(bands, risk_scores)
+    
+    lines = []
+    k = 0
+    for i, error in enumerate(errors):
+        if error is not None:
+            lines.append(dumps({"row": block.start + i, "status": "error", "detail": error}))
+            continue
+        decision_info = DECISIONS[codes[k]]
+        lines.append(dumps({
+            "row": block.start + i,
+            "status": "success",
+            "credit_score_band": str(bands[k]),
+            "risk_score": round(float(risk_scores[k]), 2),
+            "loan_decision": decision_info['decision'],
+            "risk_level": decision_info['risk_level'],
+            "suggested_interest_rate": decision_info['interest_rate'],
+            "approval_chance": decision_info['approval_chance']
+        }))
+        k += 1
+    return b"\n".join(lines) + b"\n"
+
+@app.post("/predict/stream")
+async def predict_credit_score_stream(request: Request):
+    """Bulk-score an NDJSON or CSV body (CreditData columns), streaming NDJSON results back
+    
+    Send `Content-Type: text/csv` for CSV with a header row, anything else is
+    read as NDJSON (one applicant object per line). The response starts right
+    away: a reader task parses rows as the body arrives and scores them in
+    fixed-size vectorized blocks in the threadpool, and each block's results
+    are sent as soon as it is scored. At most STREAM_QUEUE_SIZE scored pieces
+    wait for the client; beyond that, reading the body pauses, so clients
+    sending large bodies must read the response while uploading.
+    Each output line carries the 0-based input `row` and either the decision
+    or a per-row error, so malformed lines do not fail the rest of the stream.
+    """
+    bundle = require_model()
+    parser = RowBlockParser("csv" in request.headers.get("content-type", ""),
+                            STREAM_CHUNK_SIZE, STREAM_MAX_LINE_BYTES)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, STREAM_QUEUE_SIZE))
+    
+    def consume(body_chunk: Optional[bytes]) -> Tuple[bytes, bool]:
+        """Scored output of the blocks a piece of the body (None at the end) completes, and whether the stream failed"""
+        output = []
+        try:
+            blocks = parser.feed(body_chunk) if body_chunk is not None else parser.close()
+            for block in blocks:
+                output.append(score_stream_block(block, bundle))
+            return b"".join(output), False
+        except StreamFormatError as e:
+            output.append(dumps({"status": "error", "detail": str(e)}) + b"\n")
+        except Exception as e:
+            output.append(dumps({"status": "error", "detail": f"Stream scoring error: {str(e)}"}) + b"\n")
+        return b"".join(output), True
+    
+    async def read_body() -> bool:
+        """Score the body into the queue, then mark its end; True if the client disconnected"""
+        failed = disconnected = False
+        try:
+            async for body_chunk in request.stream():
+                # After a stream-level error the rest of the body is drained unparsed
+                if body_chunk and not failed:
+                    output, failed = await run_in_threadpool(consume, body_chunk)
+                    if output:
+                        await queue.put(output)
+            if not failed:
+                output, _ = await run_in_threadpool(consume, None)
+                if output:
+                    await queue.put(output)
+        except ClientDisconnect:
+            disconnected = True
+        except Exception as e:
+            await queue.put(dumps({"status": "error", "detail": f"Stream scoring error: {str(e)}"}) + b"\n")
+        await queue.put(None)
+        return disconnected
+    
+    reader = asyncio.create_task(read_body())
+    
+    async def generate():
+        try:
+            while True:
+                output = await queue.get()
+                if output is None:
+                    return
+                yield output
+        finally:
+            reader.cancel()
+    
+    return BodyStreamingResponse(generate(), reader, media_type="application/x-ndjson")
 
 if __name__ == "__main__":
     import uvicorn
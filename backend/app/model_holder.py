@@ -0,0 +1,402 @@
+# app/model_holder.py
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from app.logging_config import get_logger
+from app.telemetry import stage_timer
+from ml_model.features import check_feature_order
+from ml_model.model_bundle import (BUNDLE_DIR_NAME, FLOAT32_CHECK_FILE, METADATA_FILE, bundle_exists,
+                                   load_bundle_arrays)
+from ml_model.tree_engine import ScalerParams, as_fitted, check_parity, compile_model
+
+logger = get_logger("app.model_holder")
+
+# Artifact directory, relative to backend/ (override with MODEL_DIR)
+MODEL_DIR = os.getenv("MODEL_DIR", "ml_model/saved_models")
+
+# Artifacts written together by train_credit_score_model
+REQUIRED_ARTIFACTS = ["credit_model.pkl", "scaler.pkl", "label_encoder.pkl", "features.pkl"]
+SERVING_ARTIFACT = "serving_model.pkl"
+BUNDLE_ARTIFACT = os.path.join(BUNDLE_DIR_NAME, METADATA_FILE)
+
+# Which artifacts to serve: "bundle" (pickle-free .npy bundle), "pickle" (joblib files)
+# or "auto" (the bundle when present, else the pickles)
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "auto").lower()
+
+# Rows around the scaler's mean on which a stored serving engine must agree with the model
+SERVING_PROBE_ROWS = 256
+
+# Largest block scored by the compiled engine when the sklearn model is loaded too;
+# above it sklearn's compiled traversal is faster (crossover at 512-1024 rows in
+# benchmarks.micro_bench). Bundles carry no sklearn model and always use the engine
+ENGINE_MAX_ROWS = int(os.getenv("ENGINE_MAX_ROWS", 512))
+
+# "float64" or "float32": float32 inputs, scaling, thresholds and score sums
+# (see TreeEnsembleEngine.to_float32); refused when training recorded flipped bands
+INFERENCE_PRECISION = os.getenv("INFERENCE_PRECISION", "float64").lower()
+
+
+class ModelBundle:
+    """One immutable, fully loaded model version
+
+    Requests take a reference to the current bundle once and use it for the
+    whole request, so a reload never changes the model under a running request.
+    """
+
+    def __init__(self, model, scaler, label_encoder, features, engine, version, loaded_at,
+                 class_labels=None, feature_importances=None, model_format="pickle",
+                 float32_check=None):
+        self.model = model
+        self.scaler = scaler
+        self.label_encoder = label_encoder
+        self.features = features
+        self.engine = engine
+        self.version = version
+        self.loaded_at = loaded_at
+        # Band name per encoded class; bundles carry them without a LabelEncoder
+        self.class_labels = (np.asarray(label_encoder.classes_)
+                             if class_labels is None else class_labels)
+        if feature_importances is None:
+            feature_importances = getattr(model, "feature_importances_", None)
+        self.feature_importances = feature_importances
+        self.model_format = model_format
+        self.float32_check = float32_check
+        self.precision = "float64"
+
+    def enable_float32(self) -> bool:
+        """Switch to float32 inference, unless the training-time check found rows that flip"""
+        check = self.float32_check
+        if self.engine is None:
+            logger.warning("⚠️ float32 inference needs the compiled engine; staying on float64")
+            return False
+        if check is None:
+            logger.warning("⚠️ float32 inference refused: no training-time check recorded for this model")
+            return False
+        if not check.get("match"):
+            logger.warning("⚠️ float32 inference refused: bands flipped on held-out data at training time",
+                           extra={"fields": {"flips": check.get("flips"), "samples": check.get("samples")}})
+            return False
+        self.engine = self.engine.to_float32()
+        if not self.engine.folded:
+            self.scaler = ScalerParams.from_scaler(self.scaler, len(self.features))
+        self.precision = "float32"
+        return True
+
+    def predict_encoded(self, features_array: np.ndarray) -> np.ndarray:
+        """Encoded class predictions for raw (unscaled) feature rows
+
+        The engine scores small blocks; blocks over ENGINE_MAX_ROWS go to the
+        sklearn model when one is loaded, since it is faster there.
+        """
+        if self.precision == "float32":
+            features_array = np.asarray(features_array, dtype=np.float32)
+        use_engine = self.engine is not None and (self.model is None or len(features_array) <= ENGINE_MAX_ROWS)
+        if use_engine and self.engine.folded:
+            with stage_timer("model_predict"):
+                return self.engine.predict(features_array)
+        with stage_timer("scaler_transform"):
+            features_scaled = self.scaler.transform(as_fitted(self.scaler, features_array))
+        with stage_timer("model_predict"):
+            if use_engine:
+                return self.engine.predict(features_scaled)
+            return self.model.predict(as_fitted(self.model, features_scaled))
+
+    def predict_bands(self, features_array: np.ndarray) -> np.ndarray:
+        """Decoded score band per feature row"""
+        encoded = self.predict_encoded(features_array)
+        with stage_timer("inverse_transform"):
+            # Same lookup as LabelEncoder.inverse_transform, without its input validation
+            return self.class_labels[encoded]
+
+    def info(self) -> Dict:
+        return {
+            "model_version": self.version,
+            "model_format": self.model_format,
+            "loaded_at": self.loaded_at.isoformat(),
+            "compiled_engine": self.engine is not None,
+            "scaler_folded": bool(self.engine is not None and self.engine.folded),
+            "precision": self.precision
+        }
+
+
+def artifact_signature(model_dir: str = MODEL_DIR):
+    """(name, size, mtime) of every artifact present, used to detect new deployments"""
+    signature = []
+    for name in REQUIRED_ARTIFACTS + [SERVING_ARTIFACT, FLOAT32_CHECK_FILE, BUNDLE_ARTIFACT]:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature.append((name, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def load_bundle(model_dir: str = MODEL_DIR, model_format: str = MODEL_FORMAT,
+                precision: str = INFERENCE_PRECISION) -> ModelBundle:
+    """Load and validate all artifacts from model_dir into a new ModelBundle"""
+    if model_format not in ("auto", "bundle", "pickle"):
+        raise ValueError(f"Unknown MODEL_FORMAT '{model_format}' (expected auto, bundle or pickle)")
+    if precision not in ("float64", "float32"):
+        raise ValueError(f"Unknown INFERENCE_PRECISION '{precision}' (expected float64 or float32)")
+    if model_format == "bundle" or (model_format == "auto" and bundle_exists(model_dir)):
+        bundle = load_array_bundle(model_dir)
+    else:
+        bundle = load_pickled_bundle(model_dir)
+    if precision == "float32":
+        bundle.enable_float32()
+    return bundle
+
+
+def load_array_bundle(model_dir: str = MODEL_DIR) -> ModelBundle:
+    """Memory-map the pickle-free bundle; needs neither joblib nor sklearn"""
+    loaded = load_bundle_arrays(os.path.join(model_dir, BUNDLE_DIR_NAME))
+    return ModelBundle(None, loaded.scaler, None, loaded.features, loaded.engine,
+                       loaded.checksum[:12], datetime.now(), class_labels=loaded.class_labels,
+                       feature_importances=loaded.feature_importances, model_format="bundle",
+                       float32_check=loaded.metadata.get("float32_check"))
+
+
+def serving_engine_matches(serving, compiled, model, scaler, n_features: int) -> bool:
+    """True if a stored serving engine was compiled from this model and scaler
+
+    Its trees must have the same structure and leaf values as a fresh compile
+    of the model (folding the scaler only moves thresholds), and it must
+    predict like scaler + model.predict on probe rows around the scaler's mean.
+    """
+    for name in ("feature", "left", "right", "roots", "value"):
+        if not np.array_equal(getattr(serving, name), getattr(compiled, name)):
+            return False
+    if not serving.folded and not np.array_equal(serving.threshold, compiled.threshold):
+        return False
+    params = ScalerParams.from_scaler(scaler, n_features)
+    X = params.mean_ + params.scale_ * np.random.default_rng(0).standard_normal((SERVING_PROBE_ROWS, n_features))
+    if serving.folded:
+        return check_parity(serving, model, X, scaler=scaler)["match"]
+    return check_parity(serving, model, scaler.transform(X))["match"]
+
+
+def load_pickled_bundle(model_dir: str = MODEL_DIR) -> ModelBundle:
+    """Load the joblib artifacts written by train_credit_score_model"""
+    # joblib (and sklearn, for unpickling) are only imported once a model is loaded
+    import joblib
+
+    # Version is a content hash over all artifacts served, the serving engine included
+    digest = hashlib.sha256()
+    blobs = {}
+    for name in REQUIRED_ARTIFACTS + [SERVING_ARTIFACT, FLOAT32_CHECK_FILE]:
+        path = os.path.join(model_dir, name)
+        if name not in REQUIRED_ARTIFACTS and not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            blobs[name] = f.read()
+        digest.update(name.encode())
+        digest.update(blobs[name])
+    version = digest.hexdigest()[:12]
+
+    model = joblib.load(io.BytesIO(blobs["credit_model.pkl"]))
+    scaler = joblib.load(io.BytesIO(blobs["scaler.pkl"]))
+    label_encoder = joblib.load(io.BytesIO(blobs["label_encoder.pkl"]))
+    features = joblib.load(io.BytesIO(blobs["features.pkl"]))
+
+    # Consistency checks between artifacts; serving builds features in FEATURE_ORDER
+    check_feature_order(features)
+    n_features = getattr(model, "n_features_in_", len(features))
+    if len(features) != n_features:
+        raise ValueError(f"features.pkl lists {len(features)} features but the model expects {n_features}")
+    if len(scaler.scale_) != n_features:
+        raise ValueError(f"Scaler was fitted on {len(scaler.scale_)} features, model expects {n_features}")
+    if len(label_encoder.classes_) != len(model.classes_):
+        raise ValueError("Label encoder classes do not match the model classes")
+
+    # Compiled inference engine: prefer the exported serving artifact, which has the
+    # scaler folded into its thresholds, if it belongs to this model; otherwise
+    # use the trees compiled here
+    engine = None
+    try:
+        engine = compile_model(model)
+    except Exception as e:
+        logger.warning(f"⚠️ Compiled inference unavailable, using model.predict: {e}")
+    if engine is not None and SERVING_ARTIFACT in blobs:
+        try:
+            serving = joblib.load(io.BytesIO(blobs[SERVING_ARTIFACT]))
+            if serving_engine_matches(serving, engine, model, scaler, n_features):
+                engine = serving
+            else:
+                logger.warning(f"⚠️ {SERVING_ARTIFACT} does not match credit_model.pkl; "
+                               "using the trees compiled from the model")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load {SERVING_ARTIFACT}, using the trees compiled from the model: {e}")
+
+    return ModelBundle(model, scaler, label_encoder, features, engine, version, datetime.now(),
+                       float32_check=recorded_float32_check(blobs, engine))
+
+
+def recorded_float32_check(blobs: Dict[str, bytes], engine) -> Optional[Dict]:
+    """The training-time float32 check, if it was made for this model file and engine kind"""
+    if engine is None or FLOAT32_CHECK_FILE not in blobs:
+        return None
+    try:
+        record = json.loads(blobs[FLOAT32_CHECK_FILE])
+    except ValueError as e:
+        logger.warning(f"⚠️ Ignoring unreadable {FLOAT32_CHECK_FILE}: {e}")
+        return None
+    if (record.get("model_sha256") != hashlib.sha256(blobs["credit_model.pkl"]).hexdigest()
+            or record.get("folded") != bool(engine.folded)):
+        logger.warning(f"⚠️ Ignoring {FLOAT32_CHECK_FILE}: it was recorded for another model or engine")
+        return None
+    return record
+
+
+class ModelHolder:
+    """Holds the active ModelBundle and swaps in new versions without downtime
+
+    New artifacts are loaded, validated and warmed up off to the side; only
+    then is the reference swapped (a single attribute assignment), so in-flight
+    requests finish on the version they started with.
+    """
+
+    def __init__(self, model_dir: str = MODEL_DIR,
+                 warmup: Optional[Callable[[ModelBundle], None]] = None):
+        self.model_dir = model_dir
+        self.warmup = warmup
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self.loading = False
+        self.load_seconds: Optional[float] = None
+        self._bundle: Optional[ModelBundle] = None
+        self._signature = None
+        self._failed_signature = None
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._watch_interval = 0.0
+        self._stop_watching = threading.Event()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    @property
+    def current(self) -> Optional[ModelBundle]:
+        return self._bundle
+
+    @property
+    def state(self) -> str:
+        """One of ready, loading (initial load in progress), failed or not_loaded"""
+        if self._bundle is not None:
+            return "ready"
+        if self.loading:
+            return "loading"
+        return "failed" if self.last_error else "not_loaded"
+
+    def reload(self) -> Dict:
+        """Load, validate and warm up the artifacts on disk, then swap them in
+
+        Raises if the new artifacts are unusable; the active version is kept.
+        """
+        with self._reload_lock:
+            signature = artifact_signature(self.model_dir)
+            try:
+                bundle = load_bundle(self.model_dir)
+                if self.warmup is not None:
+                    self.warmup(bundle)
+            except Exception as e:
+                self.last_error = str(e)
+                self._failed_signature = signature
+                logger.error(f"❌ Model reload failed, keeping current version: {e}",
+                             extra={"fields": {"model_dir": self.model_dir}})
+                raise
+
+            previous = self._bundle
+            self._bundle = bundle
+            self._signature = signature
+            self.last_error = None
+            if previous is not None:
+                self.reloads += 1
+
+            logger.info("✅ Model version activated",
+                        extra={"fields": {"model_version": bundle.version,
+                                          "previous_version": previous.version if previous else None,
+                                          "feature_count": len(bundle.features)}})
+            return bundle.info()
+
+    def load(self) -> bool:
+        """Initial load; logs and leaves no active model on failure"""
+        self.loading = True
+        start = time.perf_counter()
+        try:
+            self.reload()
+            return True
+        except Exception:
+            return False
+        finally:
+            self.load_seconds = round(time.perf_counter() - start, 3)
+            self.loading = False
+
+    def load_in_background(self) -> threading.Thread:
+        """Start the initial load in a daemon thread; `state` is "loading" until it finishes"""
+        self.loading = True
+        loader = threading.Thread(target=self.load, name="model-loader", daemon=True)
+        loader.start()
+        return loader
+
+    def check_for_update(self) -> bool:
+        """Reload if the artifacts on disk changed since the active version was loaded"""
+        if artifact_signature(self.model_dir) == self._signature:
+            return False
+        try:
+            self.reload()
+            return True
+        except Exception:
+            return False
+
+    def start_watching(self, interval: float):
+        """Poll the model directory every `interval` seconds in a daemon thread"""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._watch_interval = interval
+        self._stop_watching.clear()
+
+        def watch():
+            pending = None
+            while not self._stop_watching.wait(interval):
+                signature = artifact_signature(self.model_dir)
+                if signature == self._signature:
+                    pending = None
+                # Training writes several files; wait until they stop changing,
+                # and don't retry a set of artifacts that already failed
+                elif signature == pending and signature != self._failed_signature:
+                    self.check_for_update()
+                    pending = None
+                else:
+                    pending = signature
+
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+        logger.info("👀 Watching for new model artifacts",
+                    extra={"fields": {"model_dir": self.model_dir, "interval_s": interval}})
+
+    def _restart_after_fork(self):
+        """Threads don't survive fork: forked workers start their own watcher and lock"""
+        self._reload_lock = threading.Lock()
+        if self._watcher is not None:
+            self._watcher = None
+            self.start_watching(self._watch_interval)
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        self._watcher = None
+
+    def info(self) -> Dict:
+        bundle = self._bundle
+        info = bundle.info() if bundle is not None else {"model_version": None, "loaded_at": None}
+        info["state"] = self.state
+        info["load_seconds"] = self.load_seconds
+        info["reloads"] = self.reloads
+        if self.last_error:
+            info["last_reload_error"] = self.last_error
+        return info
@@ -0,0 +1,113 @@
+# app/rules.py
+"""Table-driven business rules: loan decisions, risk score and insights
+
+Every rule is evaluated for N applicants at once with NumPy masks over the
+feature matrix. The engine returns small integer codes (a decision code per
+row, an insight mask per row); text is only rendered when a row is serialized.
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from ml_model.features import FEATURE_INDEX
+
+# Decision table, indexed by decision code
+DECISIONS = [
+    {"decision": "APPROVED", "risk_level": "LOW",
+     "interest_rate": "7.5% - 9.5%", "approval_chance": "Very High (>90%)"},
+    {"decision": "APPROVED", "risk_level": "MODERATE",
+     "interest_rate": "10.5% - 12.5%", "approval_chance": "High (75-90%)"},
+    {"decision": "APPROVED WITH CONDITIONS", "risk_level": "MEDIUM",
+     "interest_rate": "13.5% - 15.5%", "approval_chance": "Medium (50-75%)"},
+    {"decision": "REVIEW REQUIRED", "risk_level": "HIGH",
+     "interest_rate": "16.5% - 18.5%", "approval_chance": "Low (25-50%)"},
+    {"decision": "DECLINED", "risk_level": "VERY HIGH",
+     "interest_rate": "N/A", "approval_chance": "Very Low (<25%)"},
+]
+DECISION_LABELS = np.array([entry["decision"] for entry in DECISIONS], dtype=object)
+
+# Decision code per score band; any other band (Poor) falls through to the risk cutoff
+BAND_DECISIONS = {"Excellent": 0, "Good": 1, "Fair": 2}
+POOR_REVIEW, POOR_DECLINED = 3, 4
+POOR_DECLINE_RISK = 70
+
+# Risk score terms, summed in this order and clipped to 0-100:
+# (feature, weight, condition applied to the feature or None for its value)
+RISK_TERMS = [
+    ('Missed_Payments_Last_12M', 10, None),
+    ('Credit_Utilization', 30, None),
+    ('Loan_to_Income_Ratio', 20, None),
+    ('Utilization_Per_Loan', 10, None),
+    ('Age', 10, lambda age: age < 25),
+    ('Total_Active_Loans', 5, None),
+]
+
+# Insight table, in output order within each kind:
+# (kind, condition on the feature matrix, text, applicant fields used by the text)
+INSIGHTS = [
+    ("warnings", lambda X: X[:, FEATURE_INDEX['Credit_Utilization']] > 0.7,
+     "High credit utilization (>70%). Consider paying down balances to improve score.", ()),
+    ("warnings", lambda X: X[:, FEATURE_INDEX['Missed_Payments_Last_12M']] > 2,
+     "{missed_payments} missed payments detected. Focus on timely payments.", ("missed_payments",)),
+    ("warnings", lambda X: X[:, FEATURE_INDEX['Loan_to_Income_Ratio']] > 0.5,
+     "High loan-to-income ratio. Consider reducing loan amount or increasing income.", ()),
+    ("warnings", lambda X: X[:, FEATURE_INDEX['Utilization_Per_Loan']] > 0.4,
+     "High credit utilization per active loan. Consider closing unnecessary accounts.", ()),
+    ("recommendations", lambda X: X[:, FEATURE_INDEX['Credit_History_Years']] < 2,
+     "Short credit history. Keep accounts open and active to build history.", ()),
+    ("recommendations", lambda X: X[:, FEATURE_INDEX['Age']] < 25,
+     "Young borrower. Building credit history is key at this stage.", ()),
+    ("recommendations", lambda X: X[:, FEATURE_INDEX['Missed_Payments_Last_12M']] == 0,
+     "Excellent payment history - keep it up!", ()),
+    ("recommendations", lambda X: X[:, FEATURE_INDEX['Credit_Utilization']] < 0.3,
+     "Good credit utilization ratio.", ()),
+    ("recommendations", lambda X: X[:, FEATURE_INDEX['Loan_to_Income_Ratio']] < 0.3,
+     "Healthy loan-to-income ratio.", ()),
+]
+# Band-based insight, appended after the feature rules
+BAND_INSIGHT = ("recommendations", ("Poor", "Fair"),
+                "Consider improving your credit score by reducing outstanding debt.", ())
+INSIGHT_COUNT = len(INSIGHTS) + 1
+
+
+def compute_risk_scores(X: np.ndarray) -> np.ndarray:
+    """Vectorized 0-100 risk score from a feature matrix"""
+    total = np.zeros(X.shape[0])
+    for feature, weight, condition in RISK_TERMS:
+        values = X[:, FEATURE_INDEX[feature]]
+        total = total + (condition(values) if condition is not None else values) * weight
+    return np.clip(total, 0, 100)
+
+
+def decision_codes(bands: np.ndarray, risk_scores: np.ndarray) -> np.ndarray:
+    """Index into DECISIONS for every applicant"""
+    bands = np.asarray(bands)
+    codes = np.where(np.asarray(risk_scores) < POOR_DECLINE_RISK, POOR_REVIEW, POOR_DECLINED).astype(np.int8)
+    for band, code in BAND_DECISIONS.items():
+        codes[bands == band] = code
+    return codes
+
+
+def insight_masks(X: np.ndarray, bands: np.ndarray) -> np.ndarray:
+    """(N, INSIGHT_COUNT) boolean matrix: which insights fire for each applicant"""
+    masks = np.empty((X.shape[0], INSIGHT_COUNT), dtype=bool)
+    for i, (_, condition, _, _) in enumerate(INSIGHTS):
+        masks[:, i] = condition(X)
+    masks[:, -1] = np.isin(np.asarray(bands), BAND_INSIGHT[1])
+    return masks
+
+
+def render_insights(insight_ids: Sequence[int], data, score_band: str, risk_score: float) -> Dict:
+    """Insight text for one applicant; `data` provides the fields some messages quote"""
+    rendered: Dict[str, List[str]] = {"warnings": [], "recommendations": []}
+    for insight_id in insight_ids:
+        if insight_id < len(INSIGHTS):
+            kind, _, text, fields = INSIGHTS[insight_id]
+        else:
+            kind, _, text, fields = BAND_INSIGHT
+        if fields:
+            text = text.format(**{field: getattr(data, field) for field in fields})
+        rendered[kind].append(text)
+    rendered["score_analysis"] = (f"Your credit score is categorized as '{score_band}' "
+                                  f"with a risk score of {risk_score:.1f}/100")
+    return rendered
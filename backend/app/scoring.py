@@ -0,0 +1,104 @@
+# app/scoring.py
+"""Vectorized scoring core shared by the API endpoints and the offline batch scorer"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.rules import compute_risk_scores
+from ml_model.features import BASE_FEATURES, engineer_features
+
+# Applicant input fields (same names and order as the API's CreditData model)
+INPUT_FIELDS = [
+    'age',
+    'monthly_income',
+    'loan_amount',
+    'credit_utilization',
+    'missed_payments',
+    'total_active_loans',
+    'credit_history_years',
+    'loan_tenure_months'
+]
+
+# Input fields that must be whole numbers
+INTEGER_FIELDS = ['missed_payments', 'total_active_loans']
+
+# Column names used in CIBIL_Credit_Score_Large_Dataset.csv for each input field
+DATASET_COLUMNS = {
+    'Age': 'age',
+    'Monthly_Income': 'monthly_income',
+    'Loan_Amount': 'loan_amount',
+    'Credit_Utilization': 'credit_utilization',
+    'Missed_Payments_Last_12M': 'missed_payments',
+    'Total_Active_Loans': 'total_active_loans',
+    'Credit_History_Years': 'credit_history_years',
+    'Loan_Tenure_Months': 'loan_tenure_months'
+}
+
+# Input fields in the order of the model's base feature columns
+BASE_INPUT_FIELDS = [DATASET_COLUMNS[name] for name in BASE_FEATURES]
+
+# Business validation rules shared by every scoring path, checked in order
+VALIDATION_RULES = [
+    (lambda c: c['monthly_income'] <= 0, "Income must be positive"),
+    (lambda c: (c['credit_utilization'] < 0) | (c['credit_utilization'] > 1),
+     "Credit utilization must be between 0 and 1"),
+    (lambda c: c['missed_payments'] < 0, "Missed payments cannot be negative"),
+    (lambda c: c['total_active_loans'] < 0, "Total active loans cannot be negative"),
+    (lambda c: c['loan_tenure_months'] <= 0, "Loan tenure must be positive"),
+]
+
+def validate_columns(cols: Dict[str, np.ndarray]) -> List[Optional[str]]:
+    """Return the first failing validation message per row (None if the row is valid)"""
+    n = len(cols['monthly_income'])
+    errors: List[Optional[str]] = [None] * n
+    failed = np.zeros(n, dtype=bool)
+    for rule, message in VALIDATION_RULES:
+        newly_failed = rule(cols) & ~failed
+        for i in np.flatnonzero(newly_failed):
+            errors[i] = message
+        failed |= newly_failed
+    return errors
+
+def feature_matrix(cols: Dict[str, np.ndarray]) -> np.ndarray:
+    """(N, 14) model feature matrix in FEATURE_ORDER for N applicants given as column arrays"""
+    return engineer_features(np.column_stack([cols[field] for field in BASE_INPUT_FIELDS]))
+
+def parse_frame(frame) -> Tuple[Dict[str, np.ndarray], List[Optional[str]]]:
+    """Input columns of a DataFrame as float arrays, plus the first error per row
+
+    Accepts either the API field names or the dataset column names. Rows with
+    unparseable, missing or non-integer values, or that fail a business rule,
+    get an error message; all other rows get None.
+    """
+    import pandas as pd
+    
+    frame = frame.rename(columns=DATASET_COLUMNS)
+    missing = [field for field in INPUT_FIELDS if field not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    
+    n = len(frame)
+    errors: List[Optional[str]] = [None] * n
+    failed = np.zeros(n, dtype=bool)
+    cols = {}
+    for field in INPUT_FIELDS:
+        values = np.asarray(pd.to_numeric(frame[field], errors='coerce'), dtype=float)
+        bad = ~np.isfinite(values)
+        if field in INTEGER_FIELDS:
+            bad |= np.isfinite(values) & (np.mod(values, 1) != 0)
+        for i in np.flatnonzero(bad & ~failed):
+            errors[i] = f"{field}: invalid or missing value"
+        failed |= bad
+        cols[field] = values
+    
+    # Business validation on rows that parsed
+    for i, message in enumerate(validate_columns(cols)):
+        if message is not None and not failed[i]:
+            errors[i] = message
+    
+    return cols, errors
+
+def score_columns(bundle, cols: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Score bands, risk scores and the feature matrix for already-validated column arrays"""
+    X = feature_matrix(cols)
+    return bundle.predict_bands(X), compute_risk_scores(X), X
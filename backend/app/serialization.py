@@ -0,0 +1,69 @@
+# app/serialization.py
+import json
+import math
+from typing import Any
+
+import numpy as np
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: same JSON through the stdlib encoder, only slower
+    orjson = None
+
+
+def _numpy_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _finite_or_none(value):
+    """Copy of value with NaN and infinities as None, as orjson writes them (null)"""
+    if isinstance(value, (np.ndarray, np.generic)):
+        value = value.tolist()
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite_or_none(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite_or_none(item) for item in value]
+    return value
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                      default=_numpy_default).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON for plain dicts and lists; numpy scalars and arrays are accepted too
+
+    NaN and infinities become null with or without orjson.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    try:
+        return _stdlib_dumps(content)
+    except ValueError:
+        # Only payloads with non-finite floats pay for the copy
+        return _stdlib_dumps(_finite_or_none(content))
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with dumps (orjson when installed)
+
+    Bytes are sent unchanged, so endpoints can return bodies serialized once
+    ahead of time. Handlers that return their payload in this class skip
+    FastAPI's response_model validation and jsonable_encoder pass, so the
+    payload must already be plain JSON types.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
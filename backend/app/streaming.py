@@ -0,0 +1,176 @@
+# app/streaming.py
+"""Incremental NDJSON/CSV parsing for /predict/stream
+
+Request body bytes are fed in as they arrive and come out as fixed-size
+blocks of rows, each with its raw input values and a parse error per row,
+so scoring can start before the upload ends and one bad line never fails
+the rest of the stream. BodyStreamingResponse sends the results while the
+body is still being read.
+"""
+import asyncio
+import csv
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+from app.scoring import DATASET_COLUMNS, INPUT_FIELDS
+
+# Dataset column name of each input field, also accepted as an NDJSON key
+FIELD_ALIASES = {field: name for name, field in DATASET_COLUMNS.items()}
+
+
+class StreamFormatError(ValueError):
+    """The body cannot be scored at all, e.g. a CSV header without the required columns"""
+
+
+class RowBlock:
+    """Consecutive input rows as raw values per input field, plus the parse error of each row"""
+
+    def __init__(self, start: int, columns: Dict[str, List[Any]], errors: List[Optional[str]]):
+        self.start = start
+        self.columns = columns
+        self.errors = errors
+
+    def __len__(self):
+        return len(self.errors)
+
+
+class RowBlockParser:
+    """Split a streamed body into lines and parse them block_size rows at a time
+
+    Blank lines are skipped and not counted as rows. A line longer than
+    max_line_bytes becomes an error row without being buffered, so memory
+    stays bounded by the block size.
+    """
+
+    def __init__(self, is_csv: bool, block_size: int, max_line_bytes: int):
+        self.is_csv = is_csv
+        self.block_size = max(1, block_size)
+        self.max_line_bytes = max_line_bytes
+        self.rows = 0
+        self._positions = None  # CSV: column index of each input field
+        self._width = 0
+        self._partial = bytearray()
+        self._skipping = False  # inside an over-long line, dropping bytes until its newline
+        self._lines: List[Optional[bytes]] = []  # None marks an over-long line
+        self._ready: List[RowBlock] = []
+
+    def feed(self, data: bytes) -> List[RowBlock]:
+        """Blocks completed by this piece of the body"""
+        pieces = data.split(b"\n")
+        for piece in pieces[:-1]:
+            if self._skipping:
+                self._skipping = False
+                continue
+            if self._partial:
+                self._partial += piece
+                piece = bytes(self._partial)
+                self._partial.clear()
+            self._add_line(piece)
+        if not self._skipping:
+            self._partial += pieces[-1]
+            if len(self._partial) > self.max_line_bytes:
+                self._partial.clear()
+                self._skipping = True
+                self._add_line(None)
+        return self._take()
+
+    def close(self) -> List[RowBlock]:
+        """Remaining blocks once the body has ended"""
+        if self._partial and not self._skipping:
+            self._add_line(bytes(self._partial))
+        self._partial.clear()
+        self._flush()
+        return self._take()
+
+    def _take(self) -> List[RowBlock]:
+        ready, self._ready = self._ready, []
+        return ready
+
+    def _add_line(self, line: Optional[bytes]):
+        if line is not None:
+            if not line.strip():
+                return
+            if len(line) > self.max_line_bytes:
+                line = None
+        if self.is_csv and self._positions is None:
+            self._read_header(line)
+            return
+        self._lines.append(line)
+        if len(self._lines) >= self.block_size:
+            self._flush()
+
+    def _read_header(self, line: Optional[bytes]):
+        if line is None:
+            raise StreamFormatError(f"CSV header is longer than {self.max_line_bytes} bytes")
+        try:
+            names = next(csv.reader([line.decode("utf-8-sig")], skipinitialspace=True))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise StreamFormatError(f"Unreadable CSV header: {e}")
+        names = [DATASET_COLUMNS.get(name.strip(), name.strip()) for name in names]
+        missing = [field for field in INPUT_FIELDS if field not in names]
+        if missing:
+            raise StreamFormatError(f"Missing columns: {missing}")
+        self._positions = {field: names.index(field) for field in INPUT_FIELDS}
+        self._width = len(names)
+
+    def _flush(self):
+        if not self._lines:
+            return
+        lines, self._lines = self._lines, []
+        parse = self._parse_csv_line if self.is_csv else self._parse_json_line
+        columns = {field: [] for field in INPUT_FIELDS}
+        errors = []
+        for line in lines:
+            if line is None:
+                values, error = None, f"Line is longer than {self.max_line_bytes} bytes"
+            else:
+                try:
+                    values, error = parse(line.decode("utf-8")), None
+                except UnicodeDecodeError:
+                    values, error = None, "Line is not valid UTF-8"
+                except ValueError as e:
+                    values, error = None, str(e)
+            for field in INPUT_FIELDS:
+                columns[field].append(None if values is None else values[field])
+            errors.append(error)
+        self._ready.append(RowBlock(self.rows, columns, errors))
+        self.rows += len(errors)
+
+    def _parse_json_line(self, text: str) -> Dict[str, Any]:
+        try:
+            record = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if not isinstance(record, dict):
+            raise ValueError("Expected a JSON object")
+        return {field: record.get(field, record.get(FIELD_ALIASES[field])) for field in INPUT_FIELDS}
+
+    def _parse_csv_line(self, text: str) -> Dict[str, Any]:
+        try:
+            values = next(csv.reader([text.rstrip("\r")], skipinitialspace=True))
+        except csv.Error as e:
+            raise ValueError(f"Invalid CSV: {e}")
+        if len(values) != self._width:
+            raise ValueError(f"Expected {self._width} CSV fields, got {len(values)}")
+        return {field: values[pos] for field, pos in self._positions.items()}
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """StreamingResponse sent while a task of the handler is still reading the request body
+
+    Starlette watches for the client going away by calling receive(), which
+    would take body chunks away from the reader; here it waits for the
+    reader to finish first. body_reader returns True if the client
+    disconnected during the upload, which ends the response.
+    """
+
+    def __init__(self, content, body_reader: "asyncio.Task", **kwargs):
+        super().__init__(content, **kwargs)
+        self.body_reader = body_reader
+
+    async def listen_for_disconnect(self, receive):
+        if await self.body_reader:
+            return
+        await super().listen_for_disconnect(receive)
@@ -0,0 +1,253 @@
+# app/telemetry.py
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, 50us to 10s
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _ShardHolder:
+    """Per-thread owner of a shard; its finalizer folds the shard back when the thread ends"""
+
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self):
+        self.shard: Dict[Tuple, list] = {}
+
+
+class _ShardedMetric:
+    """Base for metrics whose hot path writes only to the calling thread's shard
+
+    Each thread gets its own dict of series, so observing never takes a lock
+    and never contends with other threads; shards are merged when rendered.
+    When a thread exits (threadpool workers come and go with the load), its
+    shard is folded into a shared base, so the shard list only holds live
+    threads. Values are per process: every pre-fork worker keeps its own.
+    """
+
+    kind = ""
+    width = 1
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._local = threading.local()
+        self._base: Dict[Tuple, list] = {}
+        self._shards: Dict[int, Dict[Tuple, list]] = {}
+        # Reentrant: a finalizer may run on this thread while it holds the lock
+        self._shards_lock = threading.RLock()
+
+    def _shard(self) -> Dict[Tuple, list]:
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = self._local.holder = _ShardHolder()
+            with self._shards_lock:
+                self._shards[id(holder.shard)] = holder.shard
+            weakref.finalize(holder, self._retire, holder.shard)
+        return holder.shard
+
+    def _retire(self, shard: Dict[Tuple, list]):
+        """Fold the shard of a finished thread into the base"""
+        with self._shards_lock:
+            if self._shards.pop(id(shard), None) is not None:
+                self._add(self._base, shard)
+
+    def _add(self, total: Dict[Tuple, list], shard: Dict[Tuple, list]):
+        for labels, values in list(shard.items()):
+            entry = total.setdefault(labels, [0] * self.width)
+            for i, value in enumerate(list(values)):
+                entry[i] += value
+
+    def _merged(self) -> Dict[Tuple, list]:
+        merged: Dict[Tuple, list] = {}
+        with self._shards_lock:
+            self._add(merged, self._base)
+            shards = list(self._shards.values())
+        for shard in shards:
+            self._add(merged, shard)
+        return merged
+
+    def reset(self):
+        with self._shards_lock:
+            self._base.clear()
+            for shard in self._shards.values():
+                shard.clear()
+
+
+class Counter(_ShardedMetric):
+    """Monotonic counter; also used for gauges, which simply go down as well"""
+
+    kind = "counter"
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        shard = self._shard()
+        entry = shard.get(labels)
+        if entry is None:
+            entry = shard[labels] = [0]
+        entry[0] += amount
+
+    def dec(self, labels: Tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for labels, (value,) in sorted(self._merged().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, self.labels)
+        return False
+
+
+class Histogram(_ShardedMetric):
+    """Fixed-bucket histogram (bucket counts plus sum) with Prometheus rendering"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+        # One count per bucket, one for +Inf, then the running sum
+        self.width = len(self.buckets) + 2
+
+    def observe(self, value: float, labels: Tuple = ()):
+        shard = self._shard()
+        entry = shard.get(labels)
+        if entry is None:
+            entry = shard[labels] = [0] * self.width
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def time(self, labels: Tuple = ()) -> _Timer:
+        """Context manager that observes the elapsed wall time of its block"""
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for labels, entry in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(entry[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram("credit_api_request_duration_seconds",
+                            "End-to-end HTTP request latency", ["endpoint"])
+STAGE_LATENCY = Histogram("credit_api_stage_duration_seconds",
+                          "Latency of individual scoring stages (model stages are per batch)", ["stage"])
+REQUESTS = Counter("credit_api_requests_total", "HTTP requests completed", ["endpoint", "status"])
+ERRORS = Counter("credit_api_errors_total", "HTTP requests that failed with a 5xx or an unhandled exception",
+                 ["endpoint"])
+IN_FLIGHT = Gauge("credit_api_requests_in_flight", "HTTP requests currently being handled", ["endpoint"])
+
+METRICS = [REQUEST_LATENCY, STAGE_LATENCY, REQUESTS, ERRORS, IN_FLIGHT]
+
+
+def stage_timer(stage: str) -> _Timer:
+    """`with stage_timer("features"):` records the block under that stage"""
+    return STAGE_LATENCY.time((stage,))
+
+
+def render_metrics() -> str:
+    """All runtime metrics of this process in Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    for metric in METRICS:
+        metric.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    # Pre-fork workers start from zero instead of inheriting the parent's warmup counts
+    os.register_at_fork(after_in_child=reset_metrics)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status counts, errors and in-flight requests per endpoint
+
+    Endpoints are labelled by route path; paths that match no route share the
+    label "other" so unknown URLs cannot blow up the number of series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = None
+
+    def _endpoint(self, scope) -> str:
+        if self._route_paths is None:
+            routes = getattr(scope.get("app"), "routes", [])
+            self._route_paths = {getattr(route, "path", None) for route in routes}
+        path = scope["path"]
+        return path if path in self._route_paths else "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._endpoint(scope)
+        labels = (endpoint,)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc(labels)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            status[0] = 500
+            raise
+        finally:
+            REQUEST_LATENCY.observe(time.perf_counter() - start, labels)
+            REQUESTS.inc((endpoint, str(status[0])))
+            if status[0] >= 500:
+                ERRORS.inc(labels)
+            IN_FLIGHT.dec(labels)
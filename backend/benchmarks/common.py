@@ -0,0 +1,116 @@
+# benchmarks/common.py
+"""Shared helpers for the benchmark scripts: synthetic data, a small model, timing stats"""
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+SCORE_BANDS = [(750, 'Excellent'), (650, 'Good'), (550, 'Fair')]
+
+
+def synthetic_dataset(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Random applicants with the columns of CIBIL_Credit_Score_Large_Dataset.csv
+
+    CIBIL_Score depends on missed payments, utilization and credit history
+    plus noise, so a model has real signal to learn.
+    """
+    rng = np.random.default_rng(seed)
+    missed = rng.integers(0, 6, n_rows)
+    utilization = rng.uniform(0, 1, n_rows).round(2)
+    history = rng.uniform(0, 20, n_rows).round(1)
+    score = (850 - missed * 40 - utilization * 150 + history * 5
+             + rng.normal(0, 30, n_rows)).clip(300, 900).astype(int)
+
+    band = np.full(n_rows, 'Poor', dtype=object)
+    for cutoff, name in reversed(SCORE_BANDS):
+        band[score >= cutoff] = name
+
+    return pd.DataFrame({
+        'Customer_ID': [f'C{i:07d}' for i in range(n_rows)],
+        'Age': rng.integers(21, 65, n_rows),
+        'Monthly_Income': rng.integers(15000, 200000, n_rows),
+        'Loan_Amount': rng.integers(50000, 2000000, n_rows),
+        'Loan_Tenure_Months': rng.choice([12, 24, 36, 48, 60, 84, 120], n_rows),
+        'Credit_Utilization': utilization,
+        'Missed_Payments_Last_12M': missed,
+        'Total_Active_Loans': rng.integers(0, 7, n_rows),
+        'Credit_History_Years': history,
+        'CIBIL_Score': score,
+        'CIBIL_Score_Band': band
+    })
+
+
+def build_model_dir(model_dir: str, n_rows: int = 5000, seed: int = 42) -> str:
+    """Train a small, reproducible model on synthetic data and save the serving artifacts to model_dir
+
+    Writes the same files as train_credit_score_model, so the API can be
+    started against model_dir (MODEL_DIR) without the real dataset.
+    """
+    import joblib
+    from sklearn.ensemble import GradientBoostingClassifier
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+    from ml_model.features import FEATURE_ORDER, build_feature_matrix
+    from ml_model.model_bundle import export_bundle, write_float32_check
+    from ml_model.tree_engine import check_float32_parity, check_parity, compile_serving_model
+
+    df = synthetic_dataset(n_rows, seed)
+    X = build_feature_matrix(df)
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(df['CIBIL_Score_Band'])
+    scaler = StandardScaler().fit(X)
+    model = GradientBoostingClassifier(n_estimators=50, max_depth=3, random_state=seed)
+    model.fit(scaler.transform(X), y)
+
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(model_dir, "credit_model.pkl"))
+    joblib.dump(scaler, os.path.join(model_dir, "scaler.pkl"))
+    joblib.dump(label_encoder, os.path.join(model_dir, "label_encoder.pkl"))
+    joblib.dump(list(FEATURE_ORDER), os.path.join(model_dir, "features.pkl"))
+
+    engine = compile_serving_model(model, scaler)
+    if check_parity(engine, model, X, scaler=scaler)["match"]:
+        float32_check = check_float32_parity(engine, X, scaler=scaler)
+        joblib.dump(engine, os.path.join(model_dir, "serving_model.pkl"))
+        write_float32_check(model_dir, float32_check, engine)
+        export_bundle(model_dir, engine, scaler, label_encoder.classes_, list(FEATURE_ORDER),
+                      feature_importances=model.feature_importances_, model_name="Gradient Boosting",
+                      float32_check=float32_check)
+    return model_dir
+
+
+def summarize(samples_seconds) -> dict:
+    """Latency summary in milliseconds"""
+    ms = np.asarray(samples_seconds, dtype=float) * 1000
+    if ms.size == 0:
+        return {"count": 0}
+    return {
+        "count": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4)
+    }
+
+
+def environment_info() -> dict:
+    """Where and on what the benchmark ran, stored with every results file"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__
+    }
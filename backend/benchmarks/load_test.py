@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the scoring API
+Starts app.main:app on a small synthetic model, drives /predict and /predict/batch
+at several concurrency levels and writes throughput and latency percentiles to JSON
+
+Needs httpx (pip install -r requirements-dev.txt)
+
+Usage (from backend/):
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --concurrency 1,16,64 --duration 20 -o results.json
+    python -m benchmarks.load_test --baseline benchmarks/baseline.json
+    python -m benchmarks.load_test --url http://localhost:8000   # against a running server
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import build_model_dir, environment_info, summarize
+
+ENDPOINTS = ["predict", "batch"]
+
+# Metrics compared against a baseline, and whether higher is better
+COMPARED_METRICS = {"throughput_rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False}
+
+
+def make_payloads(samples, count: int, seed: int = 7):
+    """Applicants derived from the /sample-data profiles, each field jittered by up to +-20%
+
+    Distinct inputs keep the optional prediction cache from turning the
+    benchmark into a cache benchmark.
+    """
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        profile = samples[i % len(samples)]["data"]
+        payload = {}
+        for field, value in profile.items():
+            jittered = value * rng.uniform(0.8, 1.2)
+            if field == "credit_utilization":
+                payload[field] = round(min(max(jittered, 0.0), 1.0), 3)
+            elif field in ("missed_payments", "total_active_loans"):
+                payload[field] = int(round(jittered))
+            else:
+                payload[field] = round(jittered, 2)
+        payloads.append(payload)
+    return payloads
+
+
+def start_server(port: int, model_dir: str, workers: int):
+    """Launch the API in a subprocess against model_dir"""
+    env = {**os.environ, "MODEL_DIR": model_dir, "LOG_LEVEL": "WARNING", "MODEL_WATCH_INTERVAL": "0"}
+    if workers > 1:
+        cmd = [sys.executable, "run.py", "--production", "--workers", str(workers),
+               "--host", "127.0.0.1", "--port", str(port)]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL)
+
+
+async def wait_until_ready(client, base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get(f"{base_url}/health")
+            if response.status_code == 200 and response.json().get("model_loaded"):
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.25)
+    raise SystemExit(f"❌ API at {base_url} did not become ready within {timeout:.0f}s")
+
+
+async def run_level(client, url: str, bodies, concurrency: int, duration: float, warmup: float):
+    """Closed-loop load: `concurrency` clients each send their next request as soon as the last returns"""
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    async def client_loop(worker_id: int):
+        nonlocal errors
+        i = worker_id
+        while True:
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                return
+            try:
+                response = await client.post(url, json=bodies[i % len(bodies)])
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            done = time.perf_counter()
+            if sent >= measure_from:
+                if ok:
+                    latencies.append(done - sent)
+                else:
+                    errors += 1
+            i += concurrency
+
+    await asyncio.gather(*(client_loop(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - measure_from
+    return latencies, errors, elapsed
+
+
+async def run_benchmark(args, base_url: str):
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 8)
+    async with httpx.AsyncClient(limits=limits, timeout=60.0) as client:
+        await wait_until_ready(client, base_url)
+        samples = (await client.get(f"{base_url}/sample-data")).json()["samples"]
+        payloads = make_payloads(samples, args.payloads)
+        batches = [payloads[i:i + args.batch_size] for i in range(0, len(payloads), args.batch_size)]
+
+        results = []
+        for endpoint in args.endpoints:
+            url, bodies, rows_per_request = {
+                "predict": (f"{base_url}/predict", payloads, 1),
+                "batch": (f"{base_url}/predict/batch", batches, args.batch_size)
+            }[endpoint]
+            for concurrency in args.concurrency:
+                latencies, errors, elapsed = await run_level(client, url, bodies, concurrency,
+                                                             args.duration, args.warmup)
+                stats = summarize(latencies)
+                result = {
+                    "endpoint": endpoint,
+                    "concurrency": concurrency,
+                    "requests": len(latencies),
+                    "errors": errors,
+                    "throughput_rps": round(len(latencies) / elapsed, 2),
+                    "rows_per_second": round(len(latencies) * rows_per_request / elapsed, 2),
+                    **{key: value for key, value in stats.items() if key != "count"}
+                }
+                results.append(result)
+                print(f"  {endpoint:<8}c={concurrency:<5}{result['throughput_rps']:>10.1f} req/s"
+                      f"   p50 {result.get('p50_ms', 0):>8.2f} ms   p95 {result.get('p95_ms', 0):>8.2f} ms"
+                      f"   p99 {result.get('p99_ms', 0):>8.2f} ms   errors {errors}")
+        return results
+
+
+def compare(results, baseline, tolerance: float):
+    """Print each metric against the baseline; return the list of regressions"""
+    previous = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n📊 Comparison with baseline (tolerance {tolerance:.0%}):")
+    for result in results:
+        key = (result["endpoint"], result["concurrency"])
+        if key not in previous:
+            print(f"  {key[0]:<8}c={key[1]:<5} no baseline entry")
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = previous[key].get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            flag = "❌ REGRESSION" if regressed else "✅"
+            print(f"  {key[0]:<8}c={key[1]:<5}{metric:<16}{old:>10.2f} -> {new:>10.2f} ({change:+.1%}) {flag}")
+            if regressed:
+                regressions.append({"endpoint": key[0], "concurrency": key[1], "metric": metric,
+                                    "baseline": old, "current": new, "change": round(change, 4)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Credit Score API")
+    parser.add_argument("--concurrency", default="1,8,32,64",
+                        help="Comma-separated concurrency levels (default: 1,8,32,64)")
+    parser.add_argument("--endpoints", default="predict,batch",
+                        help=f"Comma-separated endpoints to drive: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each level")
+    parser.add_argument("--batch-size", type=int, default=64, help="Applicants per /predict/batch request")
+    parser.add_argument("--payloads", type=int, default=1000, help="Distinct applicants to cycle through")
+    parser.add_argument("--workers", type=int, default=1, help="Server workers (>1 uses run.py --production)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="Benchmark an already running server instead of starting one")
+    parser.add_argument("--model-rows", type=int, default=5000, help="Synthetic rows for the bundled model")
+    parser.add_argument("-o", "--output", default="benchmarks/results/load_test.json")
+    parser.add_argument("--baseline", help="Results file to compare against; exits 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed relative change before a metric counts as a regression")
+    args = parser.parse_args()
+
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        raise SystemExit("❌ The load test needs httpx: pip install -r requirements-dev.txt")
+
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+    args.endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",")]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        raise SystemExit(f"❌ Unknown endpoints: {sorted(unknown)}")
+
+    print("=" * 60)
+    print("🏋️ CREDIT SCORE AI - LOAD TEST")
+    print("=" * 60)
+
+    server = None
+    with tempfile.TemporaryDirectory() as model_dir:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            print(f"🤖 Training bundled benchmark model ({args.model_rows} synthetic rows)...")
+            build_model_dir(model_dir, n_rows=args.model_rows)
+            base_url = f"http://127.0.0.1:{args.port}"
+            print(f"🚀 Starting API at {base_url} ({args.workers} worker(s))")
+            server = start_server(args.port, model_dir, args.workers)
+
+        try:
+            results = asyncio.run(run_benchmark(args, base_url))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    report = {
+        "environment": environment_info(),
+        "settings": {
+            "url": args.url, "workers": args.workers, "duration": args.duration, "warmup": args.warmup,
+            "batch_size": args.batch_size, "payloads": args.payloads, "model_rows": args.model_rows
+        },
+        "results": results
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report["baseline"] = args.baseline
+        report["regressions"] = regressions
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) against {args.baseline}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the serving and training hot paths
+Times each stage in isolation on synthetic data and writes per-stage percentiles to JSON
+
+Usage (from backend/):
+    python -m benchmarks.micro_bench
+    python -m benchmarks.micro_bench --only serving --batch-sizes 1,64,4096 --repeats 50
+    python -m benchmarks.micro_bench --only training --train-sizes 1000000,2000000 --fit-sizes 5000
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import build_model_dir, environment_info, summarize, synthetic_dataset
+
+# A timed repeat of a fast stage loops until it has run for at least this long
+MIN_REPEAT_SECONDS = 0.005
+
+# serving_predict (what ModelBundle.predict_encoded runs) may be at most this much
+# slower than plain sklearn at any batch size before the run fails
+MAX_SERVING_SLOWDOWN = 1.15
+
+
+def bench(fn, setup=None, warmup: int = 3, repeats: int = 20, calibrate: bool = True) -> dict:
+    """Per-call timing of fn(state) where state = setup(), with warmup runs and the GC paused
+
+    setup runs untimed before every call, so stages that mutate their input
+    (the DataProcessor steps) always start from the same data. Without a
+    setup, fast calls are looped within each repeat so timer resolution does
+    not dominate.
+    """
+    def one_call():
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        fn(state)
+        return time.perf_counter() - start
+
+    for _ in range(warmup):
+        one_call()
+
+    number = 1
+    if calibrate and setup is None:
+        single = max(one_call(), 1e-7)
+        number = max(1, int(MIN_REPEAT_SECONDS / single))
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            if number == 1:
+                samples.append(one_call())
+            else:
+                start = time.perf_counter()
+                for _ in range(number):
+                    fn(None)
+                samples.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {**summarize(samples), "min_ms": round(min(samples) * 1000, 4), "calls_per_repeat": number}
+
+
+def report(results, group: str, stage: str, size: int, stats: dict):
+    results.append({"group": group, "stage": stage, "size": size, **stats})
+    print(f"  {stage:<22}{size:>9,}   p50 {stats['p50_ms']:>10.4f} ms   p95 {stats['p95_ms']:>10.4f} ms"
+          f"   p99 {stats['p99_ms']:>10.4f} ms")
+
+
+def serving_benchmarks(batch_sizes, warmup, repeats, results):
+    """Each step of scoring N applicants, on a small bundled model"""
+    from app.model_holder import load_bundle
+    from app.rules import compute_risk_scores, decision_codes, insight_masks
+    from app.scoring import feature_matrix, parse_frame, score_columns
+
+    print("\n⚡ Serving stages (per call)")
+    with tempfile.TemporaryDirectory() as model_dir:
+        build_model_dir(model_dir)
+        # The sklearn stages below need the pickled model, not the array bundle
+        bundle = load_bundle(model_dir, model_format="pickle")
+        # Artifact loading per format (size 0); sklearn is already imported, so import time is excluded
+        for model_format in ("pickle", "bundle"):
+            stats = bench(lambda _: load_bundle(model_dir, model_format=model_format), warmup=1,
+                          repeats=max(3, repeats // 3), calibrate=False)
+            report(results, "serving", f"load_{model_format}", 0, stats)
+
+    for size in batch_sizes:
+        cols, _ = parse_frame(synthetic_dataset(size, seed=size))
+        X = feature_matrix(cols)
+        X_scaled = bundle.scaler.transform(X)
+        encoded = bundle.model.predict(X_scaled)
+        bands = bundle.label_encoder.inverse_transform(encoded)
+        risk_scores = compute_risk_scores(X)
+
+        stages = {
+            "features": lambda _: feature_matrix(cols),
+            "scaler_transform": lambda _: bundle.scaler.transform(X),
+            "model_predict": lambda _: bundle.model.predict(X_scaled),
+            "inverse_transform": lambda _: bundle.label_encoder.inverse_transform(encoded),
+            "rules": lambda _: (decision_codes(bands, risk_scores), insight_masks(X, bands)),
+            "end_to_end": lambda _: score_columns(bundle, cols)
+        }
+        if bundle.engine is not None:
+            # Compiled engine with the scaler folded in: replaces scaler_transform + model_predict
+            stages["engine_predict"] = lambda _: bundle.engine.predict(X)
+            engine32 = bundle.engine.to_float32()
+            stages["engine_predict_float32"] = lambda _: engine32.predict(X)
+        # The path serving actually takes (engine or sklearn by batch size) against plain sklearn
+        stages["sklearn_predict"] = lambda _: bundle.model.predict(bundle.scaler.transform(X))
+        stages["serving_predict"] = lambda _: bundle.predict_encoded(X)
+
+        for stage, fn in stages.items():
+            report(results, "serving", stage, size, bench(fn, warmup=warmup, repeats=repeats))
+
+
+def serving_regressions(results, max_slowdown=MAX_SERVING_SLOWDOWN):
+    """Batch sizes where the serving path is slower than sklearn by more than max_slowdown"""
+    p50 = {(r["stage"], r["size"]): r["p50_ms"] for r in results if r["group"] == "serving"}
+    regressions = []
+    for (stage, size), serving_ms in p50.items():
+        sklearn_ms = p50.get(("sklearn_predict", size))
+        if stage == "serving_predict" and sklearn_ms and serving_ms > sklearn_ms * max_slowdown:
+            regressions.append({"size": size, "serving_p50_ms": serving_ms, "sklearn_p50_ms": sklearn_ms})
+    return regressions
+
+
+def training_benchmarks(train_sizes, fit_sizes, warmup, repeats, fit_repeats, results):
+    """DataProcessor steps and the candidate model fits on synthetic datasets"""
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+    from ml_model.data_processor import DataProcessor
+    from ml_model.train_model import candidate_models
+
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    def processor_with(df):
+        processor = DataProcessor(csv_path=None)
+        processor.df = df.copy()
+        return processor
+
+    def run_quietly(step):
+        def run(processor):
+            with contextlib.redirect_stdout(io.StringIO()):
+                step(processor)
+        return run
+
+    print("\n🧹 Data processing stages (per call)")
+    for size in train_sizes:
+        raw = synthetic_dataset(size, seed=size)
+        with quiet:
+            cleaned = processor_with(raw)
+            cleaned.clean_data()
+            engineered = processor_with(cleaned.df)
+            engineered.feature_engineering()
+
+        stages = {
+            # clean_data also runs remove_outliers, as in the training pipeline
+            "clean_data": (lambda p: p.clean_data(), raw),
+            "remove_outliers": (lambda p: p.remove_outliers("single-pass"), raw),
+            "remove_outliers_sequential": (lambda p: p.remove_outliers("sequential"), raw),
+            "feature_engineering": (lambda p: p.feature_engineering(), cleaned.df),
+            "prepare_data": (lambda p: p.prepare_data(target_column='CIBIL_Score_Band'), engineered.df)
+        }
+        for stage, (step, df) in stages.items():
+            stats = bench(run_quietly(step), setup=lambda df=df: processor_with(df),
+                          warmup=min(warmup, 1), repeats=max(3, repeats // 4))
+            report(results, "training", stage, size, stats)
+
+    print("\n🌲 Model fits (per call)")
+    for size in fit_sizes:
+        processor = processor_with(synthetic_dataset(size, seed=size))
+        with quiet:
+            processor.clean_data()
+            processor.feature_engineering()
+            X_train, _, y_train, _ = processor.prepare_data(target_column='CIBIL_Score_Band')
+        X_scaled = StandardScaler().fit_transform(X_train)
+        y_encoded = LabelEncoder().fit_transform(y_train)
+
+        for name in candidate_models():
+            stage = "fit_" + name.lower().replace(" ", "_")
+            stats = bench(lambda model: model.fit(X_scaled, y_encoded),
+                          setup=lambda name=name: candidate_models()[name],
+                          warmup=0, repeats=fit_repeats)
+            report(results, "training", stage, size, stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the serving and training stages")
+    parser.add_argument("--only", choices=["serving", "training"], help="Run one group only")
+    parser.add_argument("--batch-sizes", default="1,64,4096", help="Serving batch sizes")
+    parser.add_argument("--train-sizes", default="10000,100000,1000000", help="Dataset rows for the processing steps")
+    parser.add_argument("--fit-sizes", default="2000,10000", help="Dataset rows for the model fits")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed calls before measuring")
+    parser.add_argument("--repeats", type=int, default=30, help="Timed repeats per serving stage")
+    parser.add_argument("--fit-repeats", type=int, default=3, help="Timed repeats per model fit")
+    parser.add_argument("--max-slowdown", type=float, default=MAX_SERVING_SLOWDOWN,
+                        help="Fail if serving_predict is this many times slower than sklearn_predict")
+    parser.add_argument("-o", "--output", default="benchmarks/results/micro_bench.json")
+    args = parser.parse_args()
+
+    def sizes(text):
+        return [int(size) for size in text.split(",") if size]
+
+    print("=" * 60)
+    print("🔬 CREDIT SCORE AI - MICRO-BENCHMARKS")
+    print("=" * 60)
+
+    results = []
+    if args.only in (None, "serving"):
+        serving_benchmarks(sizes(args.batch_sizes), args.warmup, args.repeats, results)
+    regressions = serving_regressions(results, args.max_slowdown)
+    if args.only in (None, "training"):
+        training_benchmarks(sizes(args.train_sizes), sizes(args.fit_sizes), args.warmup,
+                            args.repeats, args.fit_repeats, results)
+
+    output = {
+        "environment": environment_info(),
+        "settings": {"warmup": args.warmup, "repeats": args.repeats, "fit_repeats": args.fit_repeats,
+                     "min_repeat_seconds": MIN_REPEAT_SECONDS},
+        "results": results,
+        "serving_regressions": regressions
+    }
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+    for regression in regressions:
+        print(f"❌ serving_predict at {regression['size']:,} rows: {regression['serving_p50_ms']} ms p50, "
+              f"sklearn {regression['sklearn_p50_ms']} ms")
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
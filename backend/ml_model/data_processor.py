@@ -1,69 +1,313 @@
 # ml_model/data_processor.py
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.model_selection import train_test_split
 import joblib
 import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from ml_model import dataset_cache
+from ml_model.features import BASE_FEATURES, ENGINEERED_FEATURES, FEATURE_INDEX, build_feature_matrix
+
+# Schema of CIBIL_Credit_Score_Large_Dataset.csv used by chunked loading.
+# Integer columns are downcast losslessly (int8/int16/int32); decimal columns
+# stay float64, since a float32 round trip would shift the training features
+# away from what the API computes for the same inputs
+ID_COLUMN = 'Customer_ID'
+# Chunked loading without IDs keeps only this 64-bit hash of each Customer_ID,
+# so clean_data can still tell rows apart by ID when it drops duplicates
+ID_HASH_COLUMN = 'Customer_ID_hash'
+TARGET_COLUMN = 'CIBIL_Score_Band'
+INTEGER_COLUMNS = ['Age', 'Monthly_Income', 'Loan_Amount', 'Loan_Tenure_Months',
+                   'Missed_Payments_Last_12M', 'Total_Active_Loans', 'CIBIL_Score']
+DECIMAL_COLUMNS = ['Credit_Utilization', 'Credit_History_Years']
+SCORE_BANDS = ['Poor', 'Fair', 'Good', 'Excellent']
+
+# Rows per block when engineering features in chunked mode
+FEATURE_BLOCK_ROWS = 100_000
+
+# IQR outlier filtering: "single-pass" or "sequential" (see DataProcessor.remove_outliers)
+OUTLIER_MODES = ("single-pass", "sequential")
+OUTLIER_MODE = os.getenv("OUTLIER_MODE", "single-pass").lower()
+
+# EDA: "full" waits for the plots, "background" does not, "skip" runs no EDA.
+# Plots render in up to EDA_WORKERS processes (0 draws them in this process)
+EDA_MODES = ("full", "background", "skip")
+EDA_MODE = os.getenv("EDA_MODE", "full").lower()
+EDA_WORKERS = int(os.getenv("EDA_WORKERS", 3))
+HEATMAP_ANNOTATE_MAX_COLUMNS = 20
+
+# Parsed frames are cached as memory-mapped columns (see ml_model/dataset_cache.py)
+# in .dataset_cache/ next to the CSV unless DATASET_CACHE_DIR says otherwise;
+# DATASET_CACHE=0 always parses the CSV
+DATASET_CACHE_ENABLED = os.getenv("DATASET_CACHE", "1") == "1"
+DATASET_CACHE_DIR = os.getenv("DATASET_CACHE_DIR")
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MB (None where it is not available)"""
+    try:
+        # POSIX only; Windows has no resource module
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _init_plot_worker():
+    """EDA worker processes only write PNG files"""
+    import matplotlib
+    matplotlib.use("Agg")
+
+def _plot_target_distribution(band_counts, path):
+    import matplotlib.pyplot as plt
+    
+    plt.figure(figsize=(10, 6))
+    band_counts.plot(kind='bar')
+    plt.title('CIBIL Score Band Distribution')
+    plt.xlabel('CIBIL Score Band')
+    plt.ylabel('Count')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+    return path
+
+def _plot_correlation_matrix(correlation_matrix, path):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    # Cell annotations dominate the drawing time on wide frames and become unreadable anyway
+    annotate = len(correlation_matrix.columns) <= HEATMAP_ANNOTATE_MAX_COLUMNS
+    plt.figure(figsize=(12, 10))
+    sns.heatmap(correlation_matrix, annot=annotate, cmap='coolwarm', center=0)
+    plt.title('Feature Correlation Matrix')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+    return path
+
+def _plot_feature_distributions(histograms, path):
+    """One figure, a 2x3 grid of the precomputed (counts, bin edges) histograms"""
+    import matplotlib.pyplot as plt
+    
+    plt.figure(figsize=(15, 8))
+    for i, (col, (counts, edges)) in enumerate(histograms.items()):
+        plt.subplot(2, 3, i + 1)
+        plt.hist(edges[:-1], bins=edges, weights=counts)
+        plt.grid(True)
+        plt.title(f'{col} Distribution')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+    return path
 
 class DataProcessor:
-    def __init__(self, csv_path):
+    def __init__(self, csv_path, chunksize=None, keep_ids=None, use_cache=None, cache_dir=None,
+                 outlier_mode=None):
+        """chunksize enables chunked, schema-driven loading (see load_data);
+        keep_ids keeps Customer_ID in the frame, by default only when not chunked;
+        use_cache, cache_dir and outlier_mode override DATASET_CACHE,
+        DATASET_CACHE_DIR and OUTLIER_MODE"""
         self.csv_path = csv_path
+        self.chunksize = chunksize
+        self.keep_ids = chunksize is None if keep_ids is None else keep_ids
+        self.use_cache = DATASET_CACHE_ENABLED if use_cache is None else use_cache
+        self.cache_dir = cache_dir or DATASET_CACHE_DIR
+        if not self.cache_dir and csv_path is not None:
+            self.cache_dir = os.path.join(os.path.dirname(os.path.abspath(csv_path)), ".dataset_cache")
+        self.outlier_mode = outlier_mode or OUTLIER_MODE
+        self.eda_jobs = []
         self.df = None
         self.X_train = None
         self.X_test = None
         self.y_train = None
         self.y_test = None
+    
+    def memory_report(self, step):
+        """One line with the frame's size and the process peak memory"""
+        frame_mb = self.df.memory_usage(deep=True).sum() / 1e6 if self.df is not None else 0.0
+        peak_mb = peak_rss_mb()
+        peak = f"{peak_mb:.1f} MB" if peak_mb is not None else "n/a"
+        print(f"🧠 Memory after {step}: frame {frame_mb:.1f} MB, process peak {peak}")
         
     def load_data(self):
         """Step 2: Load data"""
         print("📂 Loading data...")
-        self.df = pd.read_csv(self.csv_path)
+        if not (self.use_cache and self._load_cached()):
+            source_stat = os.stat(self.csv_path)
+            if self.chunksize:
+                self.df = self._load_chunked()
+            else:
+                self.df = pd.read_csv(self.csv_path)
+            if self.use_cache:
+                self._save_cache(source_stat)
         print(f"✅ Data loaded: {self.df.shape[0]} rows, {self.df.shape[1]} columns")
         print(f"Columns: {list(self.df.columns)}")
+        self.memory_report("loading")
         return self.df
     
+    @property
+    def cache_variant(self):
+        """Cache key for the load options that change the parsed frame (the chunk size does not)"""
+        if not self.chunksize:
+            return "raw"
+        return "compact-ids" if self.keep_ids else "compact-hashed-ids"
+    
+    def _load_cached(self):
+        """Load the frame from the dataset cache; False when it is missing or the CSV changed"""
+        try:
+            cached = dataset_cache.load_frame(self.cache_dir, self.csv_path, self.cache_variant)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Ignoring unreadable dataset cache: {e}")
+            return False
+        if cached is None:
+            return False
+        self.df, _ = cached
+        print(f"⚡ Loaded cached columns from {dataset_cache.cache_entry_dir(self.cache_dir, self.csv_path, self.cache_variant)}")
+        return True
+    
+    def _save_cache(self, source_stat):
+        """Write the freshly parsed frame to the dataset cache; a failure only costs the next load"""
+        try:
+            saved = dataset_cache.save_frame(self.df, self.cache_dir, self.csv_path, self.cache_variant,
+                                             source_stat=source_stat)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not write dataset cache: {e}")
+            return
+        if saved:
+            print(f"💾 Cached parsed columns in {self.cache_dir}")
+    
+    def _load_chunked(self):
+        """Read the CSV chunk by chunk into compact dtypes
+
+        Integer columns are downcast per chunk (pd.concat widens to the largest
+        chunk dtype, and a chunk with missing values stays float64), the score
+        band becomes a categorical. Without keep_ids, the ID column is
+        replaced by a uint64 hash of each ID (ID_HASH_COLUMN); duplicates are
+        still dropped by clean_data after missing values are filled.
+        """
+        chunks = []
+        categories = list(SCORE_BANDS)
+        
+        for chunk in pd.read_csv(self.csv_path, chunksize=self.chunksize):
+            if not self.keep_ids and ID_COLUMN in chunk.columns:
+                id_hashes = pd.util.hash_pandas_object(chunk[ID_COLUMN], index=False).to_numpy(dtype=np.uint64)
+                chunk.insert(chunk.columns.get_loc(ID_COLUMN), ID_HASH_COLUMN, id_hashes)
+                chunk = chunk.drop(columns=[ID_COLUMN])
+            
+            for col in INTEGER_COLUMNS:
+                if col in chunk.columns and pd.api.types.is_integer_dtype(chunk[col]):
+                    chunk[col] = pd.to_numeric(chunk[col], downcast='integer')
+            
+            if TARGET_COLUMN in chunk.columns:
+                new = [band for band in chunk[TARGET_COLUMN].dropna().unique() if band not in categories]
+                categories.extend(new)
+                chunk[TARGET_COLUMN] = pd.Categorical(chunk[TARGET_COLUMN], categories=categories)
+            
+            chunks.append(chunk)
+        
+        if not chunks:
+            # Header-only CSV on pandas versions whose chunked reader yields nothing:
+            # an empty frame, as the default loader returns
+            df = pd.read_csv(self.csv_path, nrows=0)
+            return df if self.keep_ids else df.drop(columns=[ID_COLUMN], errors='ignore')
+        
+        # Categories may have grown after the first chunks; align them so concat keeps the categorical
+        if TARGET_COLUMN in chunks[0].columns:
+            for chunk in chunks:
+                chunk[TARGET_COLUMN] = chunk[TARGET_COLUMN].cat.set_categories(categories)
+        
+        df = pd.concat(chunks, ignore_index=True)
+        print(f"🧩 Read {len(df)} rows in chunks of {self.chunksize}"
+              + (f"; {ID_COLUMN} replaced by {ID_HASH_COLUMN}" if ID_HASH_COLUMN in df.columns else ""))
+        return df
+    
     def clean_data(self):
         """Step 3: Data Cleaning"""
         print("\n🧹 Cleaning data...")
         
         # Check for missing values
-        print(f"Missing values before cleaning:\n{self.df.isnull().sum()}")
-        
-        # Handle missing values (example strategies)
-        # For numerical columns, fill with median
-        numeric_cols = self.df.select_dtypes(include=[np.number]).columns
-        for col in numeric_cols:
-            if self.df[col].isnull().any():
-                self.df[col].fillna(self.df[col].median(), inplace=True)
-        
-        # For categorical columns, fill with mode
-        categorical_cols = self.df.select_dtypes(include=['object']).columns
-        for col in categorical_cols:
-            if self.df[col].isnull().any():
-                self.df[col].fillna(self.df[col].mode()[0], inplace=True)
-        
-        # Remove duplicates
+        missing = self.df.isnull().sum()
+        print(f"Missing values before cleaning:\n{missing}")
+        
+        # Handle missing values: numeric columns get the median, categorical ones the mode.
+        # One fillna over all affected columns instead of per-column chained inplace calls
+        # (which pandas' copy-on-write turns into no-ops)
+        missing_cols = missing.index[missing > 0]
+        numeric_cols = self.df[missing_cols].select_dtypes(include=[np.number]).columns
+        categorical_cols = self.df[missing_cols].select_dtypes(include=['object', 'category']).columns
+        fill_values = self.df[numeric_cols].median().to_dict()
+        fill_values.update({col: self.df[col].mode()[0] for col in categorical_cols})
+        if fill_values:
+            self.df = self.df.fillna(fill_values)
+        
+        # Remove duplicates, after filling as before (hashed IDs count as the IDs)
         initial_rows = len(self.df)
         self.df = self.df.drop_duplicates()
         print(f"Removed {initial_rows - len(self.df)} duplicate rows")
+        if ID_HASH_COLUMN in self.df.columns:
+            self.df = self.df.drop(columns=[ID_HASH_COLUMN])
         
         print(f"✅ Missing values after cleaning:\n{self.df.isnull().sum()}")
         
         # Remove outliers using IQR method (optional)
         self.remove_outliers()
+        self.memory_report("cleaning")
         
         return self.df
     
-    def remove_outliers(self):
-        """Remove outliers using IQR method"""
-        print("\n📊 Removing outliers...")
+    def remove_outliers(self, mode=None):
+        """Remove outliers using IQR method
+        
+        mode "single-pass" (default) computes every column's bounds on the same
+        rows in one quantile call and filters once; "sequential" reproduces the
+        original column-by-column filtering, where each column's bounds come from
+        the rows earlier columns left. OUTLIER_MODE sets the default.
+        """
+        mode = mode or self.outlier_mode
+        if mode not in OUTLIER_MODES:
+            raise ValueError(f"Unknown outlier mode '{mode}', expected one of {OUTLIER_MODES}")
+        print(f"\n📊 Removing outliers ({mode})...")
         numeric_cols = self.df.select_dtypes(include=[np.number]).columns
+        if len(numeric_cols) == 0:
+            return self.df
+        
+        if mode == "sequential":
+            keep = self._sequential_outlier_mask(numeric_cols)
+        else:
+            keep = self._single_pass_outlier_mask(numeric_cols)
         
+        if not keep.all():
+            self.df = self.df[keep]
+        print(f"  {len(keep) - int(keep.sum())} rows removed in total")
+        return self.df
+    
+    def _single_pass_outlier_mask(self, numeric_cols):
+        """Rows inside every column's IQR bounds, with all bounds taken from the full frame"""
+        quartiles = self.df[numeric_cols].quantile([0.25, 0.75])
+        q1, q3 = quartiles.iloc[0].to_numpy(), quartiles.iloc[1].to_numpy()
+        iqr = q3 - q1
+        lower_bounds, upper_bounds = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+        
+        keep = np.ones(len(self.df), dtype=bool)
+        for col, lower_bound, upper_bound in zip(numeric_cols, lower_bounds, upper_bounds):
+            values = self.df[col].to_numpy()
+            inside = (values >= lower_bound) & (values <= upper_bound)
+            # As before, a column only filters (missing values included) when it has outliers
+            outliers = int(((values < lower_bound) | (values > upper_bound)).sum())
+            if outliers > 0:
+                print(f"  {col}: {outliers} outliers removed")
+                keep &= inside
+        return keep
+    
+    def _sequential_outlier_mask(self, numeric_cols):
+        """The original per-column filtering, tracked as one mask instead of a copy per column"""
+        keep = np.ones(len(self.df), dtype=bool)
         for col in numeric_cols:
-            Q1 = self.df[col].quantile(0.25)
-            Q3 = self.df[col].quantile(0.75)
+            values = self.df[col].to_numpy()
+            # Same quantiles as Series.quantile on the rows still kept
+            Q1, Q3 = np.nanpercentile(values[keep], [25, 75]) if keep.any() else (np.nan, np.nan)
             IQR = Q3 - Q1
             
             # Define bounds
@@ -71,109 +315,131 @@ class DataProcessor:
             upper_bound = Q3 + 1.5 * IQR
             
             # Count outliers
-            outliers = self.df[(self.df[col] < lower_bound) | (self.df[col] > upper_bound)]
-            if len(outliers) > 0:
-                print(f"  {col}: {len(outliers)} outliers removed")
-                self.df = self.df[(self.df[col] >= lower_bound) & (self.df[col] <= upper_bound)]
+            outliers = int((keep & ((values < lower_bound) | (values > upper_bound))).sum())
+            if outliers > 0:
+                print(f"  {col}: {outliers} outliers removed")
+                keep &= (values >= lower_bound) & (values <= upper_bound)
+        return keep
     
-    def exploratory_analysis(self):
-        """Step 4: Exploratory Data Analysis (EDA)"""
+    def exploratory_analysis(self, mode=None):
+        """Step 4: Exploratory Data Analysis (EDA)
+        
+        Statistics are computed once here; the plots are drawn from them in
+        a process pool with the Agg backend. mode "full" (default) waits for
+        the PNG files, "background" returns right away (wait_for_eda collects
+        them), "skip" does nothing. EDA_MODE sets the default.
+        """
+        mode = mode or EDA_MODE
+        if mode not in EDA_MODES:
+            raise ValueError(f"Unknown EDA mode '{mode}', expected one of {EDA_MODES}")
+        if mode == "skip":
+            print("\n⏭️ EDA skipped")
+            return
+        
         print("\n📈 Performing EDA...")
         
         # Create EDA directory
         os.makedirs("eda_results", exist_ok=True)
+        plots = []
         
         # 1. Basic statistics
         print("\n📊 Basic Statistics:")
-        print(self.df.describe())
+        statistics = self.df.describe()
+        print(statistics)
         
         # Save statistics to file
-        self.df.describe().to_csv("eda_results/basic_statistics.csv")
+        statistics.to_csv("eda_results/basic_statistics.csv")
         
         # 2. Target variable distribution
         if 'CIBIL_Score_Band' in self.df.columns:
             print("\n🎯 Target Variable Distribution:")
-            print(self.df['CIBIL_Score_Band'].value_counts())
-            
-            # Plot distribution
-            plt.figure(figsize=(10, 6))
-            self.df['CIBIL_Score_Band'].value_counts().plot(kind='bar')
-            plt.title('CIBIL Score Band Distribution')
-            plt.xlabel('CIBIL Score Band')
-            plt.ylabel('Count')
-            plt.tight_layout()
-            plt.savefig('eda_results/target_distribution.png')
-            plt.close()
+            band_counts = self.df['CIBIL_Score_Band'].value_counts()
+            print(band_counts)
+            plots.append((_plot_target_distribution, band_counts, 'eda_results/target_distribution.png'))
         
         # 3. Correlation matrix
         numeric_df = self.df.select_dtypes(include=[np.number])
         if len(numeric_df.columns) > 1:
-            plt.figure(figsize=(12, 10))
             correlation_matrix = numeric_df.corr()
-            sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0)
-            plt.title('Feature Correlation Matrix')
-            plt.tight_layout()
-            plt.savefig('eda_results/correlation_matrix.png')
-            plt.close()
+            plots.append((_plot_correlation_matrix, correlation_matrix, 'eda_results/correlation_matrix.png'))
             
             print("\n🔥 Top Correlations:")
-            corr_matrix = numeric_df.corr()
-            for col in corr_matrix.columns:
-                top_corr = corr_matrix[col].sort_values(ascending=False)[1:4]
+            for col in correlation_matrix.columns:
+                top_corr = correlation_matrix[col].sort_values(ascending=False)[1:4]
                 print(f"{col}: {list(top_corr.items())}")
         
-        # 4. Feature distributions
+        # 4. Feature distributions: histogram counts here, so the workers get 30 bins instead of the column
+        histograms = {}
+        for col in numeric_df.columns[:6]:  # First 6 features
+            values = numeric_df[col].to_numpy(dtype=np.float64)
+            histograms[col] = np.histogram(values[~np.isnan(values)], bins=30)
+        if histograms:
+            plots.append((_plot_feature_distributions, histograms, 'eda_results/feature_distributions.png'))
+        
+        self._render_plots(plots)
+        if mode == "full":
+            self.wait_for_eda()
+        else:
+            print(f"🖼️ Rendering {len(plots)} EDA plots in the background")
+    
+    def _render_plots(self, plots):
+        """Start drawing (function, data, path) plots in worker processes; EDA_WORKERS=0 draws them here"""
+        if not plots:
+            return
+        if EDA_WORKERS < 1:
+            for function, data, path in plots:
+                job = Future()
+                job.set_result(function(data, path))
+                self.eda_jobs.append(job)
+            return
+        pool = ProcessPoolExecutor(max_workers=min(EDA_WORKERS, len(plots)), initializer=_init_plot_worker)
+        self.eda_jobs.extend(pool.submit(function, data, path) for function, data, path in plots)
+        # Queued plots still run; the interpreter waits for them before exiting
+        pool.shutdown(wait=False)
+    
+    def wait_for_eda(self):
+        """Wait for the EDA plots still rendering and return the saved paths"""
+        if not self.eda_jobs:
+            return []
+        saved = []
+        for job in self.eda_jobs:
+            try:
+                saved.append(job.result())
+            except Exception as e:
+                print(f"⚠️ EDA plot failed: {e}")
+        self.eda_jobs = []
         print("\n📊 Feature Distributions saved to eda_results/")
-        numeric_cols = numeric_df.columns
-        for i, col in enumerate(numeric_cols[:6]):  # First 6 features
-            plt.figure(figsize=(10, 6))
-            plt.subplot(2, 3, i+1)
-            self.df[col].hist(bins=30)
-            plt.title(f'{col} Distribution')
-            plt.tight_layout()
-        plt.savefig('eda_results/feature_distributions.png')
-        plt.close()
-        
         print("✅ EDA completed. Results saved to 'eda_results/' folder")
+        return saved
     
     def feature_engineering(self):
         """Step 5: Feature Engineering - ONLY NUMERIC FEATURES"""
         print("\n⚙️ Performing feature engineering...")
         
         # IMPORTANT: Only create numeric features to avoid scaling issues
-        
-        # 1. Create loan-to-income ratio
-        if 'Monthly_Income' in self.df.columns and 'Loan_Amount' in self.df.columns:
-            self.df['Loan_to_Income_Ratio'] = self.df['Loan_Amount'] / (self.df['Monthly_Income'] + 0.001)  # Add epsilon to avoid division by zero
-            print("  ✅ Added Loan_to_Income_Ratio")
-        
-        # 2. Create utilization per loan (numeric)
-        if 'Credit_Utilization' in self.df.columns and 'Total_Active_Loans' in self.df.columns:
-            self.df['Utilization_Per_Loan'] = self.df['Credit_Utilization'] / (self.df['Total_Active_Loans'] + 0.001)
-            print("  ✅ Added Utilization_Per_Loan")
-        
-        # 3. Create payment reliability score (numeric, 0-1)
-        if 'Missed_Payments_Last_12M' in self.df.columns:
-            self.df['Payment_Reliability'] = 1.0 / (1.0 + self.df['Missed_Payments_Last_12M'])
-            print("  ✅ Added Payment_Reliability")
-        
-        # 4. Create debt-to-income ratio (numeric)
-        if 'Monthly_Income' in self.df.columns and 'Total_Active_Loans' in self.df.columns:
-            self.df['Debt_to_Income'] = (self.df['Total_Active_Loans'] * 100000) / (self.df['Monthly_Income'] + 0.001)
-            print("  ✅ Added Debt_to_Income")
-        
-        # 5. Create credit score to income ratio (numeric)
-        if 'CIBIL_Score' in self.df.columns and 'Monthly_Income' in self.df.columns:
-            self.df['Score_to_Income_Ratio'] = self.df['CIBIL_Score'] / (self.df['Monthly_Income'] + 0.001)
-            print("  ✅ Added Score_to_Income_Ratio")
-        
-        # 6. Create interaction term: Age * Credit History
-        if 'Age' in self.df.columns and 'Credit_History_Years' in self.df.columns:
-            self.df['Age_Credit_Interaction'] = self.df['Age'] * self.df['Credit_History_Years']
-            print("  ✅ Added Age_Credit_Interaction")
-        
+        # Same formulas as the API (ml_model/features.py), so training and serving never drift
+        missing = [col for col in BASE_FEATURES if col not in self.df.columns]
+        if missing:
+            print(f"❌ Missing columns for feature engineering: {missing}")
+            return self.df
+
+        if self.chunksize:
+            # Row blocks: only one block's float64 feature matrix exists at a time
+            engineered = {name: np.empty(len(self.df)) for name in ENGINEERED_FEATURES}
+            for start in range(0, len(self.df), FEATURE_BLOCK_ROWS):
+                X = build_feature_matrix(self.df.iloc[start:start + FEATURE_BLOCK_ROWS])
+                for name, values in engineered.items():
+                    values[start:start + len(X)] = X[:, FEATURE_INDEX[name]]
+        else:
+            X = build_feature_matrix(self.df)
+            engineered = {name: X[:, FEATURE_INDEX[name]] for name in ENGINEERED_FEATURES}
+        for name in ENGINEERED_FEATURES:
+            self.df[name] = engineered[name]
+            print(f"  ✅ Added {name}")
+
         print(f"✅ Feature engineering complete. New shape: {self.df.shape}")
         print(f"New columns: {list(self.df.columns)}")
+        self.memory_report("feature engineering")
         
         return self.df
     
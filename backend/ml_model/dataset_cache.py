@@ -0,0 +1,243 @@
+# ml_model/dataset_cache.py
+"""
+Columnar on-disk cache of parsed training CSVs
+
+Each cached frame is a directory of one .npy file per column plus
+manifest.json recording the source fingerprint (size, mtime, sha256),
+column dtypes and categories:
+
+    <cache_dir>/<csv name>-<path hash>-<variant>/
+        manifest.json
+        col_000.npy, col_000_categories.npy, ...
+        col_index.npy (only when the index is not 0..n-1)
+
+Numeric columns are memory-mapped copy-on-write, so loading costs no
+parsing and pages are only read when used. Low-cardinality string and
+categorical columns are stored as integer codes plus a fixed-width unicode
+categories array, mostly-unique strings (IDs) as a plain unicode array;
+nothing is pickled.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CACHE_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+FINGERPRINTS_FILE = "fingerprints.json"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_entry_dir(cache_dir, csv_path, variant):
+    """Entry directory for csv_path; the path hash keeps same-named CSVs from sharing one"""
+    source = os.path.abspath(csv_path)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    path_hash = hashlib.sha256(source.encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{stem}-{path_hash}-{variant}")
+
+
+def _read_manifest(entry_dir):
+    try:
+        with open(os.path.join(entry_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format_version") == CACHE_FORMAT_VERSION else None
+
+
+def _write_json(path, data):
+    """Write atomically, so readers never see a half-written file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _write_manifest(entry_dir, manifest):
+    _write_json(os.path.join(entry_dir, MANIFEST_FILE), manifest)
+
+
+def fingerprint_sha256(path, cache_dir):
+    """sha256 of path's content, hashed again only when its size or mtime changed
+
+    The last (size, mtime_ns, sha256) per file is kept in
+    <cache_dir>/fingerprints.json; as in lookup, an unchanged size and mtime
+    is taken to mean unchanged content.
+    """
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    fingerprints_path = os.path.join(cache_dir, FINGERPRINTS_FILE)
+    try:
+        with open(fingerprints_path) as f:
+            fingerprints = json.load(f)
+    except (OSError, ValueError):
+        fingerprints = {}
+    known = fingerprints.get(key) or {}
+    if known.get("size") == stat.st_size and known.get("mtime_ns") == stat.st_mtime_ns and known.get("sha256"):
+        return known["sha256"]
+
+    sha256 = file_sha256(path)
+    fingerprints[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_json(fingerprints_path, fingerprints)
+    except OSError:
+        pass  # only costs a rehash next time
+    return sha256
+
+
+def _mostly_unique_strings(series, sample_rows=10_000):
+    """True for string columns without missing values whose leading rows are at least half distinct"""
+    if not pd.api.types.is_string_dtype(series.dtype) or series.isna().any():
+        return False
+    head = series.iloc[:sample_rows]
+    return (len(head) > 0 and head.map(type).eq(str).all()
+            and head.nunique() * 2 >= len(head))
+
+
+def write_columns(df, directory, prefix="col"):
+    """Save df's columns (and a non-default index) as .npy files in directory
+
+    Returns the layout dict read_columns needs. Raises ValueError for
+    columns that cannot be stored without pickling (e.g. mixed numbers and
+    strings).
+    """
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df.iloc[:, i]
+        file = f"{prefix}_{i:03d}.npy"
+        column = {"name": str(name), "file": file}
+        is_category = isinstance(series.dtype, pd.CategoricalDtype)
+        if not is_category and _mostly_unique_strings(series):
+            # IDs and the like: factorizing millions of unique values costs more than it saves
+            column["kind"] = "unicode"
+            values = series.to_numpy(dtype=str)
+        elif is_category or pd.api.types.is_string_dtype(series.dtype):
+            categorical = pd.Categorical(series)
+            categories = categorical.categories
+            if not all(isinstance(value, str) for value in categories):
+                raise ValueError(f"column '{name}' mixes strings with other values")
+            column["kind"] = "category" if is_category else "text"
+            column["ordered"] = bool(categorical.ordered)
+            column["categories_file"] = f"{prefix}_{i:03d}_categories.npy"
+            np.save(os.path.join(directory, column["categories_file"]),
+                    np.asarray(categories, dtype=str), allow_pickle=False)
+            values = categorical.codes
+        elif pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_extension_array_dtype(series.dtype):
+            column["kind"] = "numeric"
+            values = series.to_numpy()
+        else:
+            raise ValueError(f"column '{name}' has unsupported dtype {series.dtype}")
+        column["dtype"] = str(series.dtype)
+        np.save(os.path.join(directory, file), np.ascontiguousarray(values), allow_pickle=False)
+        columns.append(column)
+
+    index_file = None
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        if not pd.api.types.is_integer_dtype(df.index.dtype):
+            raise ValueError(f"index of dtype {df.index.dtype} is not supported")
+        index_file = f"{prefix}_index.npy"
+        np.save(os.path.join(directory, index_file), df.index.to_numpy(dtype=np.int64), allow_pickle=False)
+    return {"rows": len(df), "columns": columns, "index_file": index_file}
+
+
+def read_columns(directory, layout):
+    """DataFrame from the files write_columns saved; numeric columns stay memory-mapped"""
+    def array(name):
+        # Copy-on-write mapping: pages are shared until pandas writes to them
+        return np.load(os.path.join(directory, name), mmap_mode="c", allow_pickle=False)
+
+    columns = {}
+    for column in layout["columns"]:
+        values = array(column["file"])
+        if column["kind"] == "unicode":
+            values = values.astype(object)
+            if column["dtype"] != "object":
+                values = pd.array(values, dtype=column["dtype"])
+        elif column["kind"] != "numeric":
+            categories = array(column["categories_file"]).astype(object)
+            values = pd.Categorical.from_codes(values, categories, ordered=column.get("ordered", False))
+            if column["kind"] == "text":
+                # Back to the parsed dtype (object, or pandas' str dtype)
+                values = pd.Series(values, copy=False).astype(column["dtype"]).array
+        columns[column["name"]] = values
+
+    index = pd.RangeIndex(layout["rows"]) if layout["index_file"] is None else array(layout["index_file"])
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def lookup(cache_dir, csv_path, variant):
+    """Manifest of a valid cache entry for csv_path, or None if it is missing or stale
+
+    Size and mtime matching is enough. If only the mtime changed (a touch or
+    a copy), the content hash decides, and a match refreshes the manifest.
+    """
+    entry_dir = cache_entry_dir(cache_dir, csv_path, variant)
+    manifest = _read_manifest(entry_dir)
+    if manifest is None or manifest.get("source") != os.path.abspath(csv_path):
+        return None
+    stat = os.stat(csv_path)
+    if manifest["size"] != stat.st_size:
+        return None
+    if manifest["mtime_ns"] != stat.st_mtime_ns:
+        if file_sha256(csv_path) != manifest["sha256"]:
+            return None
+        manifest["mtime_ns"] = stat.st_mtime_ns
+        _write_manifest(entry_dir, manifest)
+    return manifest
+
+
+def load_frame(cache_dir, csv_path, variant):
+    """(DataFrame, manifest attrs) from the cache, or None when the cache is missing or stale"""
+    manifest = lookup(cache_dir, csv_path, variant)
+    if manifest is None:
+        return None
+    return read_columns(cache_entry_dir(cache_dir, csv_path, variant), manifest), manifest.get("attrs", {})
+
+
+def save_frame(df, cache_dir, csv_path, variant, attrs=None, sha256=None, source_stat=None):
+    """Write df as the cache entry for csv_path; returns False if the CSV changed meanwhile
+
+    Raises ValueError for columns that cannot be stored without pickling
+    (e.g. mixed numbers and strings).
+
+    source_stat is os.stat(csv_path) from before the CSV was parsed: if the
+    file changed since, nothing is written rather than caching a mismatch.
+    """
+    stat = os.stat(csv_path)
+    if source_stat is not None and (stat.st_size, stat.st_mtime_ns) != (source_stat.st_size, source_stat.st_mtime_ns):
+        return False
+    sha256 = sha256 or file_sha256(csv_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    entry_dir = cache_entry_dir(cache_dir, csv_path, variant)
+    staging = tempfile.mkdtemp(prefix=".dataset-", dir=cache_dir)
+    try:
+        layout = write_columns(df, staging)
+        _write_manifest(staging, {
+            "format_version": CACHE_FORMAT_VERSION,
+            "source": os.path.abspath(csv_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+            "variant": variant,
+            **layout,
+            "attrs": attrs or {}
+        })
+
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir)
+        os.rename(staging, entry_dir)
+        return True
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
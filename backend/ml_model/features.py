@@ -0,0 +1,74 @@
+# ml_model/features.py
+"""Feature engineering shared by training and serving
+
+Works on column arrays of any length, from one applicant to the full
+dataset, so the trainer, /predict and the batch paths compute the model's
+features with exactly the same formulas.
+"""
+from typing import Mapping, Sequence
+
+import numpy as np
+
+# Raw applicant columns (dataset names), in dataset column order
+BASE_FEATURES = [
+    'Age',
+    'Monthly_Income',
+    'Loan_Amount',
+    'Loan_Tenure_Months',
+    'Credit_Utilization',
+    'Missed_Payments_Last_12M',
+    'Total_Active_Loans',
+    'Credit_History_Years'
+]
+
+ENGINEERED_FEATURES = [
+    'Loan_to_Income_Ratio',
+    'Utilization_Per_Loan',
+    'Payment_Reliability',
+    'Debt_to_Income',
+    'Score_to_Income_Ratio',
+    'Age_Credit_Interaction'
+]
+
+# Column order of the model's feature matrix; features.pkl must list exactly these
+FEATURE_ORDER = BASE_FEATURES + ENGINEERED_FEATURES
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_ORDER)}
+
+# Added to denominators to avoid division by zero
+EPSILON = 0.001
+
+# The applicant's CIBIL score is what the model predicts, so it is not known
+# when scoring; Score_to_Income_Ratio uses this fixed reference score instead
+REFERENCE_CIBIL_SCORE = 500
+
+
+def engineer_features(base: np.ndarray) -> np.ndarray:
+    """(n, 14) float64 feature matrix in FEATURE_ORDER from an (n, 8) array of BASE_FEATURES columns"""
+    base = np.asarray(base, dtype=np.float64)
+    if base.ndim != 2 or base.shape[1] != len(BASE_FEATURES):
+        raise ValueError(f"Expected an (n, {len(BASE_FEATURES)}) array of {BASE_FEATURES}, got shape {base.shape}")
+
+    age, income, loan_amount, _, utilization, missed, active_loans, history = base.T
+
+    X = np.empty((base.shape[0], len(FEATURE_ORDER)), dtype=np.float64)
+    X[:, :len(BASE_FEATURES)] = base
+    X[:, FEATURE_INDEX['Loan_to_Income_Ratio']] = loan_amount / (income + EPSILON)
+    X[:, FEATURE_INDEX['Utilization_Per_Loan']] = utilization / (active_loans + EPSILON)
+    X[:, FEATURE_INDEX['Payment_Reliability']] = 1.0 / (1.0 + missed)
+    X[:, FEATURE_INDEX['Debt_to_Income']] = (active_loans * 100000) / (income + EPSILON)
+    X[:, FEATURE_INDEX['Score_to_Income_Ratio']] = REFERENCE_CIBIL_SCORE / (income + EPSILON)
+    X[:, FEATURE_INDEX['Age_Credit_Interaction']] = age * history
+    return X
+
+
+def build_feature_matrix(columns: Mapping) -> np.ndarray:
+    """Feature matrix from raw columns keyed by dataset name (a DataFrame or a dict of arrays)"""
+    return engineer_features(np.column_stack([np.asarray(columns[name], dtype=np.float64)
+                                              for name in BASE_FEATURES]))
+
+
+def check_feature_order(features: Sequence[str]) -> None:
+    """Raise ValueError if a saved feature list does not match FEATURE_ORDER"""
+    if list(features) != FEATURE_ORDER:
+        raise ValueError(f"Feature list {list(features)} does not match FEATURE_ORDER {FEATURE_ORDER}; "
+                         "retrain the model")
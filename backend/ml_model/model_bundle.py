@@ -0,0 +1,227 @@
+# ml_model/model_bundle.py
+"""
+Pickle-free serving bundle: one directory of plain .npy arrays plus metadata.json
+
+Layout of <model_dir>/bundle/:
+    metadata.json     format version, feature order, class labels, engine
+                      settings, feature importances and a sha256 per array
+    feature.npy ...   the TreeEnsembleEngine node arrays
+    scaler_mean.npy   StandardScaler mean_ and scale_
+    scaler_scale.npy
+
+Arrays are loaded with allow_pickle=False and memory-mapped, so loading runs
+no code from the artifact, copies nothing up front, and every worker process
+shares the same page-cache pages.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from ml_model.features import check_feature_order
+from ml_model.tree_engine import ScalerParams, TreeEnsembleEngine
+
+BUNDLE_DIR_NAME = "bundle"
+METADATA_FILE = "metadata.json"
+BUNDLE_FORMAT = "credit-score-bundle"
+BUNDLE_FORMAT_VERSION = 1
+
+# Training-time float32 check for the pickled artifacts, next to credit_model.pkl
+# (the bundle records its own in metadata.json)
+FLOAT32_CHECK_FILE = "float32_check.json"
+
+ENGINE_ARRAYS = ["feature", "threshold", "left", "right", "value", "roots", "base_score", "classes"]
+SCALER_ARRAYS = ["scaler_mean", "scaler_scale"]
+
+
+class LoadedBundle:
+    """Everything serving needs from a bundle directory"""
+
+    def __init__(self, engine, scaler, class_labels, features, feature_importances, metadata):
+        self.engine = engine
+        self.scaler = scaler
+        self.class_labels = class_labels
+        self.features = features
+        self.feature_importances = feature_importances
+        self.metadata = metadata
+
+    @property
+    def checksum(self):
+        return self.metadata["checksum"]
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _bundle_checksum(metadata):
+    """sha256 over the metadata (minus the checksum itself), which lists every array's sha256"""
+    body = {key: value for key, value in metadata.items() if key != "checksum"}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+
+def export_bundle(model_dir, engine, scaler, class_labels, features, feature_importances=None,
+                  model_name=None, float32_check=None):
+    """Write the serving bundle to <model_dir>/bundle and return its metadata
+
+    engine is a TreeEnsembleEngine (folded or not), class_labels the decoded
+    band names indexed by the engine's encoded classes and float32_check the
+    result of check_float32_parity on held-out data. The directory is written
+    next to the old one and swapped in, so readers never see a mix.
+    """
+    check_feature_order(features)
+    features = [str(name) for name in features]
+    arrays = {
+        "feature": engine.feature, "threshold": engine.threshold, "left": engine.left,
+        "right": engine.right, "value": engine.value, "roots": engine.roots,
+        "base_score": np.asarray(engine.base_score, dtype=np.float64),
+        "classes": np.asarray(engine.classes_, dtype=np.int64)
+    }
+    params = ScalerParams.from_scaler(scaler, len(features))
+    arrays["scaler_mean"] = params.mean_
+    arrays["scaler_scale"] = params.scale_
+
+    target = os.path.join(model_dir, BUNDLE_DIR_NAME)
+    os.makedirs(model_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".bundle-", dir=model_dir)
+    try:
+        os.chmod(staging, 0o755)  # mkdtemp creates it owner-only
+        entries = {}
+        for name, array in arrays.items():
+            path = os.path.join(staging, f"{name}.npy")
+            np.save(path, np.ascontiguousarray(array), allow_pickle=False)
+            entries[name] = {"file": f"{name}.npy", "dtype": str(array.dtype),
+                             "shape": list(array.shape), "sha256": _file_sha256(path)}
+
+        metadata = {
+            "format": BUNDLE_FORMAT,
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "created_at": datetime.now().isoformat(),
+            "model_name": model_name,
+            "features": features,
+            "class_labels": [str(label) for label in class_labels],
+            "feature_importances": (None if feature_importances is None
+                                    else [float(value) for value in feature_importances]),
+            "engine": {"max_depth": int(engine.max_depth), "scale": float(engine.scale),
+                       "binary": bool(engine.binary), "folded": bool(engine.folded),
+                       "n_trees": int(engine.n_trees), "n_nodes": int(engine.n_nodes)},
+            "float32_check": float32_check,
+            "arrays": entries
+        }
+        metadata["checksum"] = _bundle_checksum(metadata)
+        with open(os.path.join(staging, METADATA_FILE), "w") as f:
+            json.dump(metadata, f, indent=2)
+
+        # Swap directories: the old bundle is moved aside before the new one is renamed in
+        previous = None
+        if os.path.exists(target):
+            previous = tempfile.mkdtemp(prefix=".bundle-old-", dir=model_dir)
+            os.rename(target, os.path.join(previous, BUNDLE_DIR_NAME))
+        os.rename(staging, target)
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return metadata
+
+
+def remove_bundle(model_dir):
+    """Delete a stale bundle, so serving falls back to the pickled artifacts"""
+    shutil.rmtree(os.path.join(model_dir, BUNDLE_DIR_NAME), ignore_errors=True)
+
+
+def bundle_exists(model_dir):
+    return os.path.exists(os.path.join(model_dir, BUNDLE_DIR_NAME, METADATA_FILE))
+
+
+def write_float32_check(model_dir, float32_check, engine, model_file="credit_model.pkl"):
+    """Record float32_check for the pickled artifacts in FLOAT32_CHECK_FILE
+
+    The record names the sha256 of the model file and whether the checked
+    engine had the scaler folded in, so serving can tell whether it applies
+    to the engine it runs. Without a check any stale record is removed.
+    """
+    path = os.path.join(model_dir, FLOAT32_CHECK_FILE)
+    if float32_check is None or engine is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    record = {
+        "model_sha256": _file_sha256(os.path.join(model_dir, model_file)),
+        "folded": bool(engine.folded),
+        **float32_check
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+    return record
+
+
+def load_bundle_arrays(bundle_dir, mmap=True, verify=True):
+    """Load a bundle directory into a LoadedBundle
+
+    With mmap the arrays are read-only views of the files; verify checks
+    every file against its sha256 and the metadata checksum.
+    """
+    with open(os.path.join(bundle_dir, METADATA_FILE)) as f:
+        metadata = json.load(f)
+
+    if metadata.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"{bundle_dir} is not a {BUNDLE_FORMAT} directory")
+    if metadata.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format version {metadata.get('format_version')} "
+                         f"(expected {BUNDLE_FORMAT_VERSION})")
+    if verify and _bundle_checksum(metadata) != metadata.get("checksum"):
+        raise ValueError("Bundle metadata does not match its checksum")
+
+    arrays = {}
+    for name in ENGINE_ARRAYS + SCALER_ARRAYS:
+        entry = metadata["arrays"][name]
+        # File names are fixed, never taken from the metadata
+        path = os.path.join(bundle_dir, f"{name}.npy")
+        if verify and _file_sha256(path) != entry["sha256"]:
+            raise ValueError(f"Checksum mismatch for {entry['file']}")
+        # np.asarray drops the memmap subclass but keeps the mapping alive as its base
+        array = np.asarray(np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False))
+        if str(array.dtype) != entry["dtype"] or list(array.shape) != entry["shape"]:
+            raise ValueError(f"{entry['file']} is {array.dtype}{array.shape}, "
+                             f"metadata says {entry['dtype']}{tuple(entry['shape'])}")
+        arrays[name] = array
+
+    features = metadata["features"]
+    check_feature_order(features)
+    settings = metadata["engine"]
+    engine = TreeEnsembleEngine(
+        feature=arrays["feature"], threshold=arrays["threshold"], left=arrays["left"],
+        right=arrays["right"], value=arrays["value"], roots=arrays["roots"],
+        max_depth=settings["max_depth"], base_score=arrays["base_score"], scale=settings["scale"],
+        classes=arrays["classes"], binary=settings["binary"], folded=settings["folded"]
+    )
+
+    # Structural checks, so a malformed bundle fails here rather than mid-request
+    n_nodes = engine.n_nodes
+    class_labels = np.asarray(metadata["class_labels"], dtype=object)
+    if len(arrays["scaler_mean"]) != len(features) or len(arrays["scaler_scale"]) != len(features):
+        raise ValueError(f"Scaler has {len(arrays['scaler_mean'])} features, bundle lists {len(features)}")
+    if n_nodes and (engine.feature.max() >= len(features) or engine.feature.min() < 0):
+        raise ValueError("Tree nodes reference features outside the feature list")
+    for name in ("left", "right", "roots"):
+        if len(arrays[name]) and (arrays[name].max() >= n_nodes or arrays[name].min() < 0):
+            raise ValueError(f"Tree '{name}' indices point outside the node arrays")
+    if len(engine.classes_) and (engine.classes_.min() < 0 or engine.classes_.max() >= len(class_labels)):
+        raise ValueError("Engine classes do not match the bundle's class labels")
+
+    importances = metadata.get("feature_importances")
+    return LoadedBundle(engine, ScalerParams(arrays["scaler_mean"], arrays["scaler_scale"]),
+                        class_labels, features,
+                        None if importances is None else np.asarray(importances), metadata)
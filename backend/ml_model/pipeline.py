@@ -0,0 +1,402 @@
+# ml_model/pipeline.py
+"""
+Training pipeline as a DAG of cached stages
+
+    load -> clean -> features -> split -> train -> evaluate -> report
+                  -> eda
+
+eda is a leaf and runs last, so training never waits for its plots.
+
+A stage's key is a sha256 over its name, its parameters, the source of the
+modules it runs and the keys of the stages it reads, with the CSV's content
+hash at the root. After a stage runs, its outputs are stored under
+<cache_dir>/<stage>/ together with that key and the sha256 of the files it
+wrote (plots, saved models). A later run whose key and files still match
+reuses the stored outputs instead of running the stage again.
+
+Frames are stored as memory-mapped .npy columns (see dataset_cache.py),
+models are read back from the files the train stage saves, and everything
+else is stored with joblib.
+"""
+import contextlib
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from datetime import datetime
+
+import joblib
+import pandas as pd
+
+from ml_model import dataset_cache
+from ml_model.pipeline_stages import STAGE_NAMES
+
+PIPELINE_CACHE_DIR = os.getenv("PIPELINE_CACHE_DIR", ".pipeline_cache")
+MANIFEST_FILE = "manifest.json"
+OBJECTS_FILE = "objects.joblib"
+
+# Output lines shown for a stage when its full output is not requested
+SUMMARY_KEYWORDS = ['Accuracy:', 'Precision:', 'Recall:', 'F1-Score:', '✅', '❌', '⚠️']
+STEP_NUMBERS = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣"]
+
+
+class PipelineError(Exception):
+    """A stage cannot produce its outputs"""
+
+
+class Stage:
+    """One pipeline step
+
+    run(inputs) gets {dependency name: its outputs dict} and returns this
+    stage's outputs dict. files are written as a side effect; file_outputs
+    maps output names to joblib files the stage writes itself, so they are
+    read back from there rather than stored twice. A stage with
+    persist=False is not stored and only runs when another stage needs it.
+    """
+
+    def __init__(self, name, title, run, deps=(), params=None, modules=(), files=(),
+                 file_outputs=None, persist=True):
+        self.name = name
+        self.title = title
+        self.run = run
+        self.deps = tuple(deps)
+        self.params = params or {}
+        self.modules = tuple(modules)
+        self.files = tuple(files)
+        self.file_outputs = file_outputs or {}
+        self.persist = persist
+
+
+def _sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _module_source_hash(module_name):
+    spec = importlib.util.find_spec(module_name)
+    with open(spec.origin, "rb") as f:
+        return _sha256_bytes(f.read())
+
+
+class Pipeline:
+    """Runs stages in order, reusing stored outputs whose key is unchanged"""
+
+    def __init__(self, stages, cache_dir=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = [stage.name for stage in stages]
+        self.cache_dir = cache_dir or PIPELINE_CACHE_DIR
+        self._keys = {}
+        for position, stage in enumerate(stages):
+            misplaced = [dep for dep in stage.deps if dep not in self.order[:position]]
+            if misplaced:
+                raise ValueError(f"Stage '{stage.name}' depends on {misplaced}, which must be earlier stages")
+
+    # Keys and the stage store
+
+    def key(self, name):
+        """Hash of the stage's parameters, code and upstream keys"""
+        if name not in self._keys:
+            stage = self.stages[name]
+            body = {
+                "stage": name,
+                "params": stage.params,
+                "code": {module: _module_source_hash(module) for module in stage.modules},
+                "inputs": {dep: self.key(dep) for dep in stage.deps}
+            }
+            self._keys[name] = _sha256_bytes(json.dumps(body, sort_keys=True, default=str).encode())
+        return self._keys[name]
+
+    def _entry_dir(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def _manifest(self, name):
+        try:
+            with open(os.path.join(self._entry_dir(name), MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, name):
+        """True when the stored outputs match the current key and the stage's files are unchanged"""
+        stage = self.stages[name]
+        if not stage.persist:
+            return False
+        manifest = self._manifest(name)
+        if manifest is None or manifest.get("key") != self.key(name):
+            return False
+        for path, digest in manifest["files"].items():
+            if not os.path.exists(path) or dataset_cache.file_sha256(path) != digest:
+                return False
+        return True
+
+    def _store(self, name, outputs, elapsed):
+        stage = self.stages[name]
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{name}-", dir=self.cache_dir)
+        try:
+            frames, objects = {}, {}
+            for value_name, value in outputs.items():
+                if value_name in stage.file_outputs:
+                    continue
+                if isinstance(value, (pd.DataFrame, pd.Series)):
+                    frame = value.to_frame() if isinstance(value, pd.Series) else value
+                    try:
+                        layout = dataset_cache.write_columns(frame, staging, prefix=value_name)
+                    except ValueError:
+                        objects[value_name] = value  # e.g. mixed-type columns: fall back to joblib
+                        continue
+                    if isinstance(value, pd.Series):
+                        layout["series_name"] = value.name
+                    frames[value_name] = layout
+                else:
+                    objects[value_name] = value
+            if objects:
+                joblib.dump(objects, os.path.join(staging, OBJECTS_FILE))
+
+            written = list(stage.files) + list(stage.file_outputs.values())
+            manifest = {
+                "stage": name,
+                "key": self.key(name),
+                "created_at": datetime.now().isoformat(),
+                "elapsed_seconds": round(elapsed, 3),
+                "frames": frames,
+                "objects": sorted(objects),
+                "file_outputs": stage.file_outputs,
+                "files": {path: dataset_cache.file_sha256(path) for path in written if os.path.exists(path)}
+            }
+            with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2, default=str)
+
+            target = self._entry_dir(name)
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            os.rename(staging, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _restore(self, name):
+        entry_dir = self._entry_dir(name)
+        manifest = self._manifest(name)
+        outputs = {}
+        for value_name, layout in manifest["frames"].items():
+            frame = dataset_cache.read_columns(entry_dir, layout)
+            if "series_name" in layout:
+                frame = frame.iloc[:, 0].rename(layout["series_name"])
+            outputs[value_name] = frame
+        if manifest["objects"]:
+            outputs.update(joblib.load(os.path.join(entry_dir, OBJECTS_FILE)))
+        for value_name, path in manifest["file_outputs"].items():
+            outputs[value_name] = joblib.load(path)
+        return outputs
+
+    # Planning and running
+
+    def select(self, only=None, start=None):
+        """Stages the caller asked to (re)run: `only` lists them, `start` is a stage and all after it"""
+        for name in list(only or []) + ([start] if start else []):
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}', expected one of {self.order}")
+        if only:
+            return [name for name in self.order if name in only]
+        if start:
+            return self.order[self.order.index(start):]
+        return None
+
+    def plan(self, only=None, start=None, force=False, skip=()):
+        """{stage: "run" | "cached" | "skip"} for a run with these selectors
+
+        Without selectors every stored stage is wanted and only stale ones
+        run. Stages picked by only/start (or all, with force) run even when
+        fresh. Inputs they need that are not stored run as well. Stages in
+        skip are left out unless only names them.
+        """
+        selected = self.select(only, start)
+        forced = set(self.order if force else (selected or []))
+        wanted = [name for name in self.order
+                  if self.stages[name].persist and (selected is None or name in selected)
+                  and (name not in skip or name in (only or []))]
+        if selected is not None:
+            wanted += [name for name in selected if not self.stages[name].persist]
+
+        actions = {name: "skip" for name in self.order}
+
+        def need(name):
+            if actions[name] != "skip":
+                return
+            if name not in forced and self.is_fresh(name):
+                actions[name] = "cached"
+                return
+            actions[name] = "run"
+            for dep in self.stages[name].deps:
+                need(dep)
+
+        for name in wanted:
+            need(name)
+        return actions
+
+    def run(self, only=None, start=None, force=False, skip=(), verbose=False):
+        """Run the plan; returns True when every stage that had to run succeeded"""
+        actions = self.plan(only, start, force, skip)
+        to_run = [name for name in self.order if actions[name] == "run"]
+        # Outputs are dropped from memory once no remaining stage reads them
+        readers = {name: sum(name in self.stages[later].deps for later in to_run) for name in self.order}
+        outputs = {}
+
+        for number, name in zip(STEP_NUMBERS, self.order):
+            stage = self.stages[name]
+            if actions[name] == "skip":
+                continue
+            print(f"\n{number} {stage.title} ({name})")
+            print("-" * 40)
+            if actions[name] == "cached":
+                print(f"⏭️  Unchanged, reusing stored outputs (key {self.key(name)[:12]})")
+                continue
+
+            try:
+                inputs = {}
+                for dep in stage.deps:
+                    if dep not in outputs:
+                        outputs[dep] = self._restore(dep)
+                    inputs[dep] = outputs[dep]
+
+                started = time.perf_counter()
+                if verbose:
+                    result = stage.run(inputs)
+                else:
+                    captured = io.StringIO()
+                    try:
+                        with contextlib.redirect_stdout(captured):
+                            result = stage.run(inputs)
+                    finally:
+                        for line in captured.getvalue().split('\n'):
+                            if any(keyword in line for keyword in SUMMARY_KEYWORDS):
+                                print(f"  {line}")
+                elapsed = time.perf_counter() - started
+                if stage.persist:
+                    self._store(name, result, elapsed)
+            except Exception as e:
+                print("❌ Failed!")
+                print("Error:", "".join(traceback.format_exception_only(type(e), e)).strip()[:500])
+                print(f"\n❌ Pipeline stopped at {stage.title}")
+                return False
+
+            print(f"✅ Success! ({elapsed:.1f}s)")
+            outputs[name] = result
+            for dep in stage.deps:
+                readers[dep] -= 1
+                if readers[dep] == 0:
+                    outputs.pop(dep, None)
+        return True
+
+
+def build_training_pipeline(csv_path="CIBIL_Credit_Score_Large_Dataset.csv", chunksize=None,
+                            outlier_mode=None, target_column='CIBIL_Score_Band', test_size=0.2,
+                            cache_dir=None):
+    """The steps of train_credit_score_model as a Pipeline
+
+    chunksize and outlier_mode default to TRAIN_CHUNK_SIZE and OUTLIER_MODE.
+    """
+    from ml_model.data_processor import OUTLIER_MODE, DataProcessor
+    from ml_model.train_model import (TRAIN_CHUNK_SIZE, compile_serving_engines, evaluate_model,
+                                      fit_candidate_models, save_model_artifacts, write_reports)
+
+    chunksize = chunksize or TRAIN_CHUNK_SIZE or None
+    outlier_mode = outlier_mode or OUTLIER_MODE
+    cache_dir = cache_dir or PIPELINE_CACHE_DIR
+    # Hashing a large CSV takes seconds; it is only rehashed when its size or mtime changed
+    csv_sha256 = dataset_cache.fingerprint_sha256(csv_path, cache_dir) if os.path.exists(csv_path) else None
+
+    def processor(df=None):
+        p = DataProcessor(csv_path, chunksize=chunksize, outlier_mode=outlier_mode)
+        p.df = df
+        return p
+
+    def load(inputs):
+        p = processor()
+        p.load_data()
+        return {"df": p.df}
+
+    def clean(inputs):
+        p = processor(inputs["load"]["df"])
+        p.clean_data()
+        return {"df": p.df}
+
+    def eda(inputs):
+        # Waits for the plots: the stage records their hashes when it is stored
+        processor(inputs["clean"]["df"]).exploratory_analysis(mode="full")
+        return {}
+
+    def features(inputs):
+        # Shallow copy: the new columns must not appear in the clean stage's frame
+        p = processor(inputs["clean"]["df"].copy(deep=False))
+        p.feature_engineering()
+        return {"df": p.df}
+
+    def split(inputs):
+        prepared = processor(inputs["features"]["df"]).prepare_data(target_column=target_column,
+                                                                    test_size=test_size)
+        if prepared is None:
+            raise PipelineError(f"Target column '{target_column}' not found in data")
+        X_train, X_test, y_train, y_test = prepared
+        return {"X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test}
+
+    def train(inputs):
+        data = inputs["split"]
+        model, scaler, label_encoder, model_name, accuracy = fit_candidate_models(
+            data["X_train"], data["X_test"], data["y_train"], data["y_test"])
+        serving_engine, bundle_engine, float32_check = compile_serving_engines(model, scaler, data["X_test"])
+        save_model_artifacts(model, scaler, label_encoder, model_name, data["X_train"].columns,
+                             serving_engine, bundle_engine, float32_check)
+        return {"model": model, "scaler": scaler, "label_encoder": label_encoder,
+                "model_name": model_name, "accuracy": float(accuracy)}
+
+    def evaluate(inputs):
+        trained, data = inputs["train"], inputs["split"]
+        detailed_metrics, cm, y_test_encoded, y_pred = evaluate_model(
+            trained["model"], trained["scaler"], trained["label_encoder"], trained["model_name"],
+            data["X_train"], data["X_test"], data["y_test"])
+        return {"detailed_metrics": detailed_metrics, "confusion_matrix": cm,
+                "y_test_encoded": y_test_encoded, "y_pred": y_pred,
+                "class_names": list(trained["label_encoder"].classes_)}
+
+    def report(inputs):
+        evaluation = inputs["evaluate"]
+        write_reports(evaluation["detailed_metrics"], evaluation["confusion_matrix"],
+                      evaluation["y_test_encoded"], evaluation["y_pred"], evaluation["class_names"])
+        return {}
+
+    processing = ["ml_model.data_processor"]
+    training = ["ml_model.train_model", "ml_model.tree_engine", "ml_model.model_bundle", "ml_model.features"]
+    saved, results = "ml_model/saved_models", "ml_model/evaluation_results"
+    stages = [
+        # The dataset cache already makes reloading cheap, so load's frame is not stored again
+        Stage("load", "Data Loading", load, persist=False,
+              params={"csv_path": os.path.abspath(csv_path),
+                      "csv_sha256": csv_sha256,
+                      "chunksize": chunksize},
+              modules=processing + ["ml_model.dataset_cache"]),
+        Stage("clean", "Data Cleaning", clean, deps=["load"],
+              params={"outlier_mode": outlier_mode}, modules=processing),
+        Stage("features", "Feature Engineering", features, deps=["clean"],
+              modules=processing + ["ml_model.features"]),
+        Stage("split", "Train/Test Split", split, deps=["features"],
+              params={"target_column": target_column, "test_size": test_size}, modules=processing),
+        Stage("train", "Model Training", train, deps=["split"], modules=training,
+              files=[f"{saved}/serving_model.pkl", f"{saved}/float32_check.json", f"{saved}/bundle/metadata.json"],
+              file_outputs={"model": f"{saved}/credit_model.pkl", "scaler": f"{saved}/scaler.pkl",
+                            "label_encoder": f"{saved}/label_encoder.pkl"}),
+        Stage("evaluate", "Model Evaluation", evaluate, deps=["train", "split"], modules=training,
+              files=[f"{results}/detailed_metrics.json", f"{results}/confusion_matrix.png",
+                     f"{results}/feature_importance.png"]),
+        Stage("report", "Reports", report, deps=["evaluate"], modules=training,
+              files=[f"{results}/model_report.html", f"{results}/metrics_summary.txt",
+                     f"{results}/precision_recall_plot.png"]),
+        Stage("eda", "Exploratory Data Analysis", eda, deps=["clean"], modules=processing,
+              files=["eda_results/basic_statistics.csv", "eda_results/target_distribution.png",
+                     "eda_results/correlation_matrix.png", "eda_results/feature_distributions.png"]),
+    ]
+    return Pipeline(stages, cache_dir=cache_dir)
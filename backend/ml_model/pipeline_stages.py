@@ -0,0 +1,9 @@
+# ml_model/pipeline_stages.py
+"""Stage names of the training pipeline (ml_model/pipeline.py)
+
+Kept free of imports so run_pipeline.py can parse its arguments before the
+virtual environment with pandas and sklearn is set up.
+"""
+
+# Stages of build_training_pipeline, in run order
+STAGE_NAMES = ["load", "clean", "features", "split", "train", "evaluate", "report", "eda"]
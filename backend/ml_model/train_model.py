@@ -10,16 +10,19 @@ from sklearn.metrics import (accuracy_score, classification_report,
                            precision_recall_curve, average_precision_score)
 import joblib
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 from sklearn.preprocessing import label_binarize
 
 # Import the data processor
-from ml_model.data_processor import DataProcessor
+from ml_model.data_processor import EDA_MODE, DataProcessor
+from ml_model.features import check_feature_order
+from ml_model.model_bundle import export_bundle, remove_bundle, write_float32_check
+from ml_model.tree_engine import check_float32_parity, compile_model, compile_serving_model, check_parity
 
 def plot_precision_recall_curve(y_true, y_pred, class_names, save_path='ml_model/evaluation_results/precision_recall_plot.png'):
     """Plot precision-recall for each class"""
+    import matplotlib.pyplot as plt
+
     # Binarize the output for multi-class
     y_true_bin = label_binarize(y_true, classes=range(len(class_names)))
     y_pred_bin = label_binarize(y_pred, classes=range(len(class_names)))
@@ -231,33 +234,18 @@ def generate_html_report(metrics_dict, cm, save_path='ml_model/evaluation_result
     
     print(f"✅ HTML report saved to {save_path}")
 
-def train_credit_score_model():
-    """Complete training pipeline with all steps"""
-    print("🚀 Starting Credit Score Model Training Pipeline")
-    print("=" * 60)
-    
-    # Step 1-5: Data Processing
-    processor = DataProcessor("CIBIL_Credit_Score_Large_Dataset.csv")
-    
-    # Load data
-    df = processor.load_data()
-    
-    # Clean data
-    df = processor.clean_data()
-    
-    # Perform EDA
-    processor.exploratory_analysis()
-    
-    # Feature engineering
-    df = processor.feature_engineering()
-    
-    # Prepare data for training
-    X_train, X_test, y_train, y_test = processor.prepare_data(target_column='CIBIL_Score_Band')
-    
-    if X_train is None:
-        return None, None, None, "Error: No data prepared", 0
-    
-    # Step 6: Model Training
+def candidate_models():
+    """Fresh, unfitted instances of the models compared during training"""
+    return {
+        'Random Forest': RandomForestClassifier(n_estimators=100, random_state=42),
+        'Gradient Boosting': GradientBoostingClassifier(n_estimators=100, random_state=42)
+    }
+
+# Rows per chunk for chunked, compact loading of the training CSV (0 reads it in one go)
+TRAIN_CHUNK_SIZE = int(os.getenv("TRAIN_CHUNK_SIZE", 0))
+
+def fit_candidate_models(X_train, X_test, y_train, y_test):
+    """Step 6-7: fit every candidate on scaled features and keep the most accurate one on the test set"""
     print("\n🤖 Training models...")
     
     # Encode target variable
@@ -271,15 +259,11 @@ def train_credit_score_model():
     X_test_scaled = scaler.transform(X_test)
     
     # Try multiple models
-    models = {
-        'Random Forest': RandomForestClassifier(n_estimators=100, random_state=42),
-        'Gradient Boosting': GradientBoostingClassifier(n_estimators=100, random_state=42)
-    }
+    models = candidate_models()
     
     best_model = None
     best_accuracy = 0
     best_model_name = ""
-    best_predictions = None
     
     for name, model in models.items():
         print(f"\nTraining {name}...")
@@ -295,13 +279,114 @@ def train_credit_score_model():
             best_accuracy = accuracy
             best_model = model
             best_model_name = name
-            best_predictions = y_pred
     
-    # Step 8: Enhanced Evaluation Metrics
     print(f"\n🏆 Best Model: {best_model_name} (Accuracy: {best_accuracy:.4f})")
+    return best_model, scaler, label_encoder, best_model_name, best_accuracy
+
+def compile_serving_engines(best_model, scaler, X_test):
+    """Serving engine with the scaler folded in, and the engine for the pickle-free bundle
+    
+    Returns (serving_engine, bundle_engine, float32_check); an engine is None
+    when it could not be compiled or disagrees with model.predict on X_test.
+    """
+    X_test_scaled = scaler.transform(X_test)
+    
+    # Compile the serving engine with the scaler folded into the split thresholds,
+    # and check it agrees with scaler + model.predict on the evaluation set
+    serving_engine = None
+    try:
+        serving_engine = compile_serving_model(best_model, scaler)
+        parity = check_parity(serving_engine, best_model, X_test, scaler=scaler)
+        if parity['match']:
+            print(f"✅ Compiled serving engine matches model.predict on {parity['samples']} test samples")
+        else:
+            print(f"⚠️ Compiled serving engine differs on {parity['mismatches']}/{parity['samples']} "
+                  f"test samples (rows {parity['mismatch_rows']})")
+            serving_engine = None
+    except Exception as e:
+        print(f"⚠️ Could not compile serving engine: {e}")
+    
+    # Without a folded engine, the bundle gets the plain compiled trees; the API then scales first
+    bundle_engine = serving_engine
+    if bundle_engine is None:
+        try:
+            bundle_engine = compile_model(best_model)
+            if not check_parity(bundle_engine, best_model, X_test_scaled)['match']:
+                bundle_engine = None
+        except Exception as e:
+            print(f"⚠️ Could not compile trees for the serving bundle: {e}")
+            bundle_engine = None
+    
+    float32_check = None
+    if bundle_engine is not None:
+        # float32 serving is only allowed when no held-out band flips against float64
+        float32_check = check_float32_parity(bundle_engine, X_test, scaler=scaler)
+        if float32_check['match']:
+            print(f"✅ float32 inference matches float64 on {float32_check['samples']} test samples")
+        else:
+            print(f"⚠️ float32 inference flips {float32_check['flips']}/{float32_check['samples']} "
+                  f"test bands (rows {float32_check['flip_rows']}); serving will stay on float64")
+    return serving_engine, bundle_engine, float32_check
+
+def save_model_artifacts(best_model, scaler, label_encoder, best_model_name, features,
+                         serving_engine=None, bundle_engine=None, float32_check=None):
+    """Write the artifacts the API loads to ml_model/saved_models"""
+    os.makedirs("ml_model/saved_models", exist_ok=True)
+    
+    # Save models
+    model_filename = "credit_model.pkl"
+    model_path = f"ml_model/saved_models/{model_filename}"
+    
+    joblib.dump(best_model, model_path)
+    joblib.dump(scaler, "ml_model/saved_models/scaler.pkl")
+    joblib.dump(label_encoder, "ml_model/saved_models/label_encoder.pkl")
+    check_feature_order(features)  # the API builds its feature matrix in FEATURE_ORDER
+    joblib.dump(list(features), "ml_model/saved_models/features.pkl")
+    
+    # Serving artifact: takes raw engineered features, no separate scaling step
+    if serving_engine is not None:
+        joblib.dump(serving_engine, "ml_model/saved_models/serving_model.pkl")
+    elif os.path.exists("ml_model/saved_models/serving_model.pkl"):
+        os.remove("ml_model/saved_models/serving_model.pkl")
+    
+    # float32 check for the pickled path; it checked the bundle engine, which is the
+    # serving engine when there is one and otherwise the trees the API compiles itself
+    write_float32_check("ml_model/saved_models", float32_check, bundle_engine)
+    
+    # Pickle-free serving bundle (.npy arrays + metadata.json), preferred by the API
+    if bundle_engine is not None:
+        bundle_metadata = export_bundle("ml_model/saved_models", bundle_engine, scaler,
+                                        label_encoder.classes_, list(features),
+                                        feature_importances=getattr(best_model, 'feature_importances_', None),
+                                        model_name=best_model_name, float32_check=float32_check)
+    else:
+        # A stale bundle would shadow the new pickles
+        remove_bundle("ml_model/saved_models")
+    
+    print(f"\n💾 Models saved:")
+    print(f"   - Main model: {model_path}")
+    print(f"   - Scaler: ml_model/saved_models/scaler.pkl")
+    print(f"   - Label encoder: ml_model/saved_models/label_encoder.pkl")
+    print(f"   - Features: ml_model/saved_models/features.pkl")
+    if serving_engine is not None:
+        print(f"   - Serving model (scaler folded in): ml_model/saved_models/serving_model.pkl")
+    if bundle_engine is not None:
+        print(f"   - Serving bundle (checksum {bundle_metadata['checksum'][:12]}): ml_model/saved_models/bundle/")
+
+def evaluate_model(best_model, scaler, label_encoder, best_model_name, X_train, X_test, y_test):
+    """Step 8: Enhanced Evaluation Metrics
+    
+    Prints and plots the test-set metrics and writes detailed_metrics.json;
+    returns (detailed_metrics, confusion matrix, encoded test labels, predictions).
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    os.makedirs("ml_model/evaluation_results", exist_ok=True)
     
     # Detailed evaluation on test set
-    y_pred_best = best_model.predict(X_test_scaled)
+    y_test_encoded = label_encoder.transform(y_test)
+    y_pred_best = best_model.predict(scaler.transform(X_test))
     
     print("\n📊 DETAILED EVALUATION METRICS:")
     print("=" * 60)
@@ -417,38 +502,22 @@ def train_credit_score_model():
             'support': int(support[i])
         }
     
-    # Create directories
-    os.makedirs("ml_model/saved_models", exist_ok=True)
-    os.makedirs("ml_model/evaluation_results", exist_ok=True)
-    
-    # Save models
-    model_filename = "credit_model.pkl"
-    model_path = f"ml_model/saved_models/{model_filename}"
-    
-    joblib.dump(best_model, model_path)
-    joblib.dump(scaler, "ml_model/saved_models/scaler.pkl")
-    joblib.dump(label_encoder, "ml_model/saved_models/label_encoder.pkl")
-    joblib.dump(list(X_train.columns), "ml_model/saved_models/features.pkl")
-    
-    # Also save as default model
-    joblib.dump(best_model, "ml_model/saved_models/credit_model.pkl")
-    
     # Save detailed metrics to JSON
     import json
     with open('ml_model/evaluation_results/detailed_metrics.json', 'w') as f:
         json.dump(detailed_metrics, f, indent=2)
     
-    print(f"\n💾 Models saved:")
-    print(f"   - Main model: {model_path}")
-    print(f"   - Scaler: ml_model/saved_models/scaler.pkl")
-    print(f"   - Label encoder: ml_model/saved_models/label_encoder.pkl")
-    print(f"   - Features: ml_model/saved_models/features.pkl")
+    return detailed_metrics, cm, y_test_encoded, y_pred_best
+
+def write_reports(detailed_metrics, cm, y_test_encoded, y_pred_best, class_names):
+    """Precision-recall plot, HTML report and text summary, then the closing console summary"""
+    overall = detailed_metrics['overall_metrics']
     
     # Generate visualizations
     print("\n📈 Generating visualizations...")
     try:
         # Precision-Recall Curve
-        plot_precision_recall_curve(y_test_encoded, y_pred_best, label_encoder.classes_)
+        plot_precision_recall_curve(y_test_encoded, y_pred_best, class_names)
         
         # HTML Report
         generate_html_report(detailed_metrics, cm)
@@ -457,13 +526,13 @@ def train_credit_score_model():
         with open('ml_model/evaluation_results/metrics_summary.txt', 'w') as f:
             f.write(f"MODEL EVALUATION SUMMARY\n")
             f.write("="*50 + "\n\n")
-            f.write(f"Model: {best_model_name}\n")
+            f.write(f"Model: {detailed_metrics['model_name']}\n")
             f.write(f"Timestamp: {detailed_metrics['timestamp']}\n")
-            f.write(f"Test Samples: {len(X_test)}\n")
-            f.write(f"Accuracy: {overall_accuracy:.4f}\n")
-            f.write(f"Precision: {overall_precision:.4f}\n")
-            f.write(f"Recall: {overall_recall:.4f}\n")
-            f.write(f"F1-Score: {overall_f1:.4f}\n\n")
+            f.write(f"Test Samples: {detailed_metrics['test_samples']}\n")
+            f.write(f"Accuracy: {overall['accuracy']:.4f}\n")
+            f.write(f"Precision: {overall['weighted_precision']:.4f}\n")
+            f.write(f"Recall: {overall['weighted_recall']:.4f}\n")
+            f.write(f"F1-Score: {overall['weighted_f1']:.4f}\n\n")
             
             f.write("PER-CLASS METRICS:\n")
             f.write("-"*40 + "\n")
@@ -483,18 +552,62 @@ def train_credit_score_model():
     print("🎉 TRAINING PIPELINE COMPLETE!")
     print("="*60)
     print(f"\n📋 Key Results:")
-    print(f"   • Best Model: {best_model_name}")
-    print(f"   • Accuracy:   {overall_accuracy:.2%}")
-    print(f"   • Precision:  {overall_precision:.2%}")
-    print(f"   • Recall:     {overall_recall:.2%}")
-    print(f"   • F1-Score:   {overall_f1:.2%}")
+    print(f"   • Best Model: {detailed_metrics['model_name']}")
+    print(f"   • Accuracy:   {overall['accuracy']:.2%}")
+    print(f"   • Precision:  {overall['weighted_precision']:.2%}")
+    print(f"   • Recall:     {overall['weighted_recall']:.2%}")
+    print(f"   • F1-Score:   {overall['weighted_f1']:.2%}")
     print(f"\n📁 Check these files:")
     print(f"   • ml_model/evaluation_results/model_report.html")
     print(f"   • ml_model/evaluation_results/detailed_metrics.json")
     print(f"   • ml_model/evaluation_results/precision_recall_plot.png")
     print("\n" + "="*60)
+
+def train_credit_score_model(chunksize=None):
+    """Complete training pipeline with all steps
+    
+    Runs every step in one go; run_pipeline.py runs the same steps as cached stages.
+    """
+    print("🚀 Starting Credit Score Model Training Pipeline")
+    print("=" * 60)
+    
+    # Step 1-5: Data Processing
+    processor = DataProcessor("CIBIL_Credit_Score_Large_Dataset.csv", chunksize=chunksize or TRAIN_CHUNK_SIZE or None)
+    
+    # Load data
+    df = processor.load_data()
+    
+    # Clean data
+    df = processor.clean_data()
+    
+    # Perform EDA: the plots render in the background while the models train
+    processor.exploratory_analysis(mode="skip" if EDA_MODE == "skip" else "background")
+    
+    # Feature engineering
+    df = processor.feature_engineering()
+    
+    # Prepare data for training
+    X_train, X_test, y_train, y_test = processor.prepare_data(target_column='CIBIL_Score_Band')
+    
+    if X_train is None:
+        return None, None, None, "Error: No data prepared", 0
+    
+    # Step 6-7: Model Training and Testing
+    best_model, scaler, label_encoder, best_model_name, best_accuracy = fit_candidate_models(
+        X_train, X_test, y_train, y_test)
+    serving_engine, bundle_engine, float32_check = compile_serving_engines(best_model, scaler, X_test)
+    
+    # Step 8: Enhanced Evaluation Metrics
+    detailed_metrics, cm, y_test_encoded, y_pred_best = evaluate_model(
+        best_model, scaler, label_encoder, best_model_name, X_train, X_test, y_test)
+    
+    save_model_artifacts(best_model, scaler, label_encoder, best_model_name, X_train.columns,
+                         serving_engine, bundle_engine, float32_check)
+    
+    write_reports(detailed_metrics, cm, y_test_encoded, y_pred_best, label_encoder.classes_)
+    processor.wait_for_eda()
     
-    return best_model, scaler, label_encoder, best_model_name, overall_accuracy
+    return best_model, scaler, label_encoder, best_model_name, detailed_metrics['overall_metrics']['accuracy']
 
 if __name__ == "__main__":
-    train_credit_score_model()
\ No newline at end of file
+    train_credit_score_model()
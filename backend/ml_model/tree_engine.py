@@ -0,0 +1,421 @@
+# ml_model/tree_engine.py
+import numpy as np
+
+# sklearn trees compare float32 inputs against float64 thresholds
+INPUT_DTYPE = np.float32
+
+# Rows are traversed in blocks of about this many (row, tree) pairs, so the
+# per-level temporaries stay in cache instead of streaming through memory
+BLOCK_ELEMENTS = 32768
+
+
+class TreeEnsembleEngine:
+    """Flattened, vectorized inference for a trained tree ensemble
+
+    All trees of a RandomForestClassifier or GradientBoostingClassifier are
+    compiled into contiguous node arrays (feature, threshold, children, values)
+    and evaluated together, one tree level per step, for every row at once.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 base_score, scale, classes, binary=False, folded=False, precision="float64"):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.base_score = base_score
+        self.scale = scale
+        self.classes_ = classes
+        self.binary = binary
+        # Folded engines take raw (unscaled) float64 features, see fold_scaler
+        self.folded = folded
+        # "float32": inputs, thresholds, leaf values and sums all in float32, see to_float32
+        self.precision = precision
+        self._compiled = None
+
+    def __getstate__(self):
+        # Traversal tables are rebuilt on first use, not pickled
+        state = self.__dict__.copy()
+        state["_compiled"] = None
+        return state
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def input_dtype(self):
+        # Engines pickled before precision existed are float64
+        if getattr(self, "precision", "float64") == "float32" or not self.folded:
+            return INPUT_DTYPE
+        return np.float64
+
+    @classmethod
+    def from_model(cls, model):
+        """Compile a fitted RandomForestClassifier or GradientBoostingClassifier"""
+        name = type(model).__name__
+
+        if name == 'RandomForestClassifier':
+            n_classes = len(model.classes_)
+            trees = []
+            for estimator in model.estimators_:
+                tree = estimator.tree_
+                # Per-node class probabilities, as in DecisionTreeClassifier.predict_proba
+                probs = tree.value[:, 0, :n_classes].astype(np.float64)
+                totals = probs.sum(axis=1, keepdims=True)
+                probs = np.divide(probs, totals, out=np.zeros_like(probs), where=totals > 0)
+                trees.append((tree, probs))
+            base_score = np.zeros(n_classes)
+            scale = 1.0 / len(trees)
+            binary = False
+
+        elif name == 'GradientBoostingClassifier':
+            n_stages, n_outputs = model.estimators_.shape
+            trees = []
+            for stage in range(n_stages):
+                for k in range(n_outputs):
+                    tree = model.estimators_[stage, k].tree_
+                    # Each regression tree adds learning_rate * leaf value to one class column
+                    contrib = np.zeros((tree.node_count, n_outputs))
+                    contrib[:, k] = model.learning_rate * tree.value[:, 0, 0]
+                    trees.append((tree, contrib))
+            # Raw prediction of the init estimator (class priors), constant per row
+            base_score = np.asarray(
+                model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=INPUT_DTYPE))[0],
+                dtype=np.float64
+            )
+            scale = 1.0
+            binary = n_outputs == 1
+
+        else:
+            raise TypeError(f"Unsupported model type for compiled inference: {name}")
+
+        return cls._flatten(trees, base_score, scale, np.asarray(model.classes_), binary)
+
+    @classmethod
+    def _flatten(cls, trees, base_score, scale, classes, binary):
+        """Concatenate per-tree node arrays with absolute child offsets"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+
+        for tree, node_values in trees:
+            n = tree.node_count
+            node_ids = np.arange(n, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            # Leaves point at themselves so extra traversal steps are no-ops
+            left = np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(left)
+            rights.append(right)
+            values.append(node_values)
+            roots.append(offset)
+
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += n
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            left=np.ascontiguousarray(np.concatenate(lefts)),
+            right=np.ascontiguousarray(np.concatenate(rights)),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            base_score=base_score,
+            scale=scale,
+            classes=classes,
+            binary=binary
+        )
+
+    def fold_scaler(self, scaler):
+        """Return an engine that takes unscaled features, with the scaler folded into the thresholds
+
+        Scaling is a monotone per-feature affine map, so each test
+        float32((x - mean) / scale) <= t is equivalent to x <= c for a single
+        float64 cutoff c. The cutoff is located exactly by bisection, so
+        predictions match scaler.transform followed by predict bit for bit.
+        """
+        if self.folded:
+            raise ValueError("Scaler is already folded into this engine")
+
+        n_features = len(scaler.scale_) if scaler.scale_ is not None else len(scaler.mean_)
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+        std = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+        m = mean[self.feature].astype(np.float64)
+        s = std[self.feature].astype(np.float64)
+        t = self.threshold
+
+        def goes_left(x):
+            with np.errstate(over='ignore'):
+                return ((x - m) / s).astype(INPUT_DTYPE) <= t
+
+        # Bracket the cutoff: goes_left(lo) is True and goes_left(hi) is False
+        estimate = t * s + m
+        width = 1e-5 * (np.abs(estimate) + np.abs(m) + s * np.abs(t)) + s * 1e-30
+        lo, hi = estimate - width, estimate + width
+        for _ in range(64):
+            bad_lo, bad_hi = ~goes_left(lo), goes_left(hi)
+            if not (bad_lo.any() or bad_hi.any()):
+                break
+            width *= 2
+            lo = np.where(bad_lo, estimate - width, lo)
+            hi = np.where(bad_hi, estimate + width, hi)
+
+        # Bisect until lo and hi are adjacent doubles
+        for _ in range(2100):
+            mid = lo + (hi - lo) / 2
+            open_gap = (mid != lo) & (mid != hi)
+            if not open_gap.any():
+                break
+            left_mid = goes_left(mid)
+            lo = np.where(open_gap & left_mid, mid, lo)
+            hi = np.where(open_gap & ~left_mid, mid, hi)
+
+        return TreeEnsembleEngine(
+            feature=self.feature,
+            threshold=np.ascontiguousarray(lo),
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            max_depth=self.max_depth,
+            base_score=self.base_score,
+            scale=self.scale,
+            classes=self.classes_,
+            binary=self.binary,
+            folded=True
+        )
+
+    def to_float32(self):
+        """Return a float32 engine: float32 inputs, thresholds, leaf values and score sums
+
+        Thresholds are rounded down to the nearest float32, so for float32
+        inputs each split test gives the same answer as against the float64
+        threshold. Rounding of the inputs themselves and of the score sums can
+        still flip a prediction near a boundary; check_float32_parity counts
+        such rows.
+        """
+        if getattr(self, "precision", "float64") == "float32":
+            return self
+        with np.errstate(over='ignore'):
+            threshold = self.threshold.astype(np.float32)
+        too_high = threshold > self.threshold
+        threshold[too_high] = np.nextafter(threshold[too_high], np.float32(-np.inf))
+
+        return TreeEnsembleEngine(
+            feature=self.feature,
+            threshold=threshold,
+            left=self.left,
+            right=self.right,
+            value=np.ascontiguousarray(self.value, dtype=np.float32),
+            roots=self.roots,
+            max_depth=self.max_depth,
+            base_score=np.asarray(self.base_score, dtype=np.float32),
+            scale=self.scale,
+            classes=self.classes_,
+            binary=self.binary,
+            folded=self.folded,
+            precision="float32"
+        )
+
+    def check_structure(self):
+        """Raise ValueError if any root, child or feature index is out of range
+
+        Traversal gathers with these indices unchecked, so a corrupted engine
+        would otherwise read unrelated nodes or another row's features.
+        """
+        n_nodes = self.n_nodes
+        for name in ("left", "right", "roots"):
+            indices = getattr(self, name)
+            if len(indices) and (indices.max() >= n_nodes or indices.min() < 0):
+                raise ValueError(f"Tree '{name}' indices point outside the node arrays")
+        if n_nodes and self.feature.min() < 0:
+            raise ValueError("Tree nodes reference negative feature indices")
+        if len(self.value) != n_nodes or len(self.threshold) != n_nodes:
+            raise ValueError("Tree node arrays differ in length")
+
+    def _tables(self):
+        """Traversal tables derived from the node arrays, built once per engine
+
+        children holds (right, left) per node, so the next node is
+        children[2 * node + went_left] with a single gather. Gradient
+        boosting trees add to one class each, in stage-major order; their
+        leaf values are then kept as one scalar per node.
+        """
+        compiled = getattr(self, "_compiled", None)
+        if compiled is not None:
+            return compiled
+
+        self.check_structure()
+        children = np.ascontiguousarray(np.stack([self.right, self.left], axis=1).ravel(), dtype=np.int32)
+        n_outputs = self.value.shape[1]
+        sizes = np.diff(np.append(self.roots, self.n_nodes))
+        output_of_node = np.repeat(np.arange(self.n_trees) % n_outputs, sizes)
+        nodes = np.arange(self.n_nodes)
+        other_outputs = np.ones(self.value.shape, dtype=bool)
+        other_outputs[nodes, output_of_node] = False
+        stage_values = None
+        if self.n_trees % n_outputs == 0 and not self.value[other_outputs].any():
+            stage_values = np.ascontiguousarray(self.value[nodes, output_of_node])
+
+        self._compiled = compiled = {
+            "children": children,
+            # Every row starts at the same root, so the first level is a plain column gather
+            "root_feature": self.feature[self.roots],
+            "root_threshold": self.threshold[self.roots],
+            "root_pairs": 2 * self.roots,
+            "stage_values": stage_values,
+            "n_features": int(self.feature.max()) + 1 if self.n_nodes else 0,
+            "block_rows": max(1, BLOCK_ELEMENTS // max(self.n_trees, 1))
+        }
+        return compiled
+
+    def _apply_block(self, X, tables):
+        """Leaves reached by a block of rows, shape (rows, n_trees)"""
+        if self.max_depth == 0:
+            return np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+
+        children = tables["children"]
+        node = children.take(tables["root_pairs"] + (X[:, tables["root_feature"]] <= tables["root_threshold"]))
+
+        offsets = (np.arange(X.shape[0], dtype=np.int32) * X.shape[1])[:, None]
+        flat = X.ravel()
+        for _ in range(self.max_depth - 1):
+            went_left = flat.take(offsets + self.feature.take(node)) <= self.threshold.take(node)
+            node = children.take(2 * node + went_left)
+
+        return node
+
+    def _blocks(self, X):
+        X = np.ascontiguousarray(X, dtype=self.input_dtype)
+        tables = self._tables()
+        if X.ndim != 2 or X.shape[1] < tables["n_features"]:
+            raise ValueError(f"Expected 2D input with at least {tables['n_features']} features, got shape {X.shape}")
+        rows = tables["block_rows"]
+        for start in range(0, X.shape[0], rows):
+            yield start, self._apply_block(X[start:start + rows], tables), tables
+
+    def apply(self, X):
+        """Leaf node index reached in every tree, shape (n_samples, n_trees)"""
+        leaves = np.empty((len(X), self.n_trees), dtype=np.int32)
+        for start, block, _ in self._blocks(X):
+            leaves[start:start + len(block)] = block
+        return leaves
+
+    def decision_function(self, X):
+        """Summed ensemble scores per class, shape (n_samples, n_outputs)"""
+        scores = np.empty((len(X), self.value.shape[1]), dtype=self.value.dtype)
+        for start, leaves, tables in self._blocks(X):
+            stage_values = tables["stage_values"]
+            if stage_values is not None:
+                summed = stage_values.take(leaves).reshape(len(leaves), -1, scores.shape[1]).sum(axis=1)
+            else:
+                summed = self.value[leaves].sum(axis=1)
+            scores[start:start + len(leaves)] = self.base_score + summed * self.scale
+        return scores
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if self.binary:
+            return self.classes_[(scores[:, 0] > 0).astype(int)]
+        return self.classes_[np.argmax(scores, axis=1)]
+
+
+class ScalerParams:
+    """StandardScaler.transform from its fitted mean_ and scale_, without sklearn
+
+    float64 inputs get the same arithmetic as sklearn ((X - mean_) / scale_),
+    so an unfolded engine sees bit-identical inputs; float32 inputs are
+    scaled in float32.
+    """
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+        self._float32 = (np.asarray(mean, dtype=np.float32), np.asarray(scale, dtype=np.float32))
+
+    @classmethod
+    def from_scaler(cls, scaler, n_features):
+        mean = scaler.mean_ if getattr(scaler, "mean_", None) is not None else np.zeros(n_features)
+        scale = scaler.scale_ if getattr(scaler, "scale_", None) is not None else np.ones(n_features)
+        return cls(np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64))
+
+    def transform(self, X):
+        if getattr(X, "dtype", None) == np.float32:
+            mean, scale = self._float32
+            return (X - mean) / scale
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+def compile_model(model):
+    """Compile a fitted model into a TreeEnsembleEngine"""
+    return TreeEnsembleEngine.from_model(model)
+
+
+def compile_serving_model(model, scaler):
+    """Compile a fitted model with its scaler folded in, taking raw engineered features"""
+    return compile_model(model).fold_scaler(scaler)
+
+
+def as_fitted(estimator, X):
+    """X as a DataFrame if the estimator was fitted on one, so sklearn sees the same feature names"""
+    names = getattr(estimator, "feature_names_in_", None)
+    if names is None:
+        return X
+    import pandas as pd
+    return pd.DataFrame(X, columns=names)
+
+
+def check_parity(engine, model, X, scaler=None):
+    """Compare engine predictions against model.predict on the same inputs
+
+    For folded engines pass the raw features and the scaler; the reference is
+    then model.predict(scaler.transform(X)).
+    """
+    X = np.asarray(X, dtype=np.float64)
+    reference = X if scaler is None else scaler.transform(as_fitted(scaler, X))
+    expected = model.predict(as_fitted(model, np.asarray(reference)))
+    actual = engine.predict(X)
+    mismatches = np.flatnonzero(expected != actual)
+    return {
+        'samples': int(len(expected)),
+        'mismatches': int(len(mismatches)),
+        'mismatch_rows': mismatches[:20].tolist(),
+        'match': len(mismatches) == 0
+    }
+
+
+def check_float32_parity(engine, X, scaler=None):
+    """Compare the float32 inference path against float64 on the same raw features
+
+    Folded engines take X directly; unfolded engines need the scaler, which
+    is then applied in float64 for the reference and in float32 for the
+    float32 path, as serving does. Returns the rows whose prediction flips.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    engine32 = engine.to_float32()
+    X32 = X.astype(np.float32)
+    if not engine.folded:
+        params = ScalerParams.from_scaler(scaler, X.shape[1])
+        X, X32 = params.transform(X), params.transform(X32)
+    expected = engine.predict(X)
+    actual = engine32.predict(X32)
+    flips = np.flatnonzero(expected != actual)
+    return {
+        'samples': int(len(expected)),
+        'flips': int(len(flips)),
+        'flip_rows': flips[:20].tolist(),
+        'match': len(flips) == 0
+    }
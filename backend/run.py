@@ -1,15 +1,212 @@
 import uvicorn
+import argparse
+import gc
 import os
+import select
+import signal
+import socket
+import sys
+import time
+from collections import deque
 
-if __name__ == "__main__":
-    # Ensure required directories exist
-    os.makedirs("ml_model/saved_models", exist_ok=True)
-    
+# Crashed production workers are restarted after an exponential backoff
+# (WORKER_RESTART_BACKOFF doubling per recent restart, capped at
+# WORKER_RESTART_MAX_BACKOFF); more than WORKER_RESTART_LIMIT restarts within
+# WORKER_RESTART_WINDOW seconds stops the server with a non-zero exit status
+WORKER_RESTART_LIMIT = int(os.getenv("WORKER_RESTART_LIMIT", 5))
+WORKER_RESTART_WINDOW = float(os.getenv("WORKER_RESTART_WINDOW", 60))
+WORKER_RESTART_BACKOFF = float(os.getenv("WORKER_RESTART_BACKOFF", 0.5))
+WORKER_RESTART_MAX_BACKOFF = float(os.getenv("WORKER_RESTART_MAX_BACKOFF", 10))
+
+
+def memory_report(pid="self"):
+    """Resident memory of a process in MB: rss, plus shared/private split where /proc allows"""
+    report = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+        report["rss_mb"] = fields.get("Rss", 0) / 1024
+        report["pss_mb"] = fields.get("Pss", 0) / 1024
+        report["shared_mb"] = (fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / 1024
+        report["private_mb"] = (fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024
+    except OSError:
+        if pid == "self":
+            import resource
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is KB on Linux, bytes on macOS
+            report["rss_mb"] = maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+    return report
+
+
+def print_memory_table(worker_pids):
+    print("\n📊 Per-worker memory at startup (MB):")
+    print(f"   {'process':<16}{'rss':>10}{'pss':>10}{'shared':>10}{'private':>10}")
+    rows = [("parent", "self")] + [(f"worker {pid}", pid) for pid in worker_pids]
+    for name, pid in rows:
+        mem = memory_report(pid)
+        if not mem:
+            print(f"   {name:<16}{'n/a':>10}")
+            continue
+        print(f"   {name:<16}{mem.get('rss_mb', 0):>10.1f}{mem.get('pss_mb', 0):>10.1f}"
+              f"{mem.get('shared_mb', 0):>10.1f}{mem.get('private_mb', 0):>10.1f}")
+
+
+def run_development(host, port):
+    """Single process with auto-reload on code changes"""
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=int(os.getenv("PORT", 8000)),
+        host=host,
+        port=port,
         reload=True,
         log_level="info",
         workers=1
-    )
\ No newline at end of file
+    )
+
+
+def run_production(host, port, workers):
+    """Pre-fork server: load the app (and model) once, then fork workers that share it
+
+    Model arrays loaded in the parent are shared copy-on-write by every worker,
+    so N workers cost roughly one copy of the model instead of N. All workers
+    accept on one listening socket. Crashed workers are restarted with a
+    backoff; if they keep crashing the server exits with status 1.
+    """
+    if not hasattr(os, "fork"):
+        print("⚠️ os.fork unavailable on this platform; starting independent uvicorn workers")
+        uvicorn.run("app.main:app", host=host, port=port, workers=workers, log_level="info")
+        return
+
+    print(f"🚀 Production mode: preloading model, then forking {workers} workers")
+    from app.main import app, model_holder
+    from app.logging_config import shutdown_logging
+
+    # Load in the parent so the workers share it; their lifespan skips the load
+    if not model_holder.load():
+        print("⚠️ Model could not be loaded; workers will start without one")
+
+    # Move everything loaded so far out of the GC's reach, so collections in
+    # the workers don't write to (and un-share) the preloaded objects' pages
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    config = uvicorn.Config(app, log_level="info", access_log=False)
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            # Own process group: Ctrl+C reaches only the parent, which then
+            # stops every worker exactly once with SIGTERM
+            os.setpgid(0, 0)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            server = uvicorn.Server(config)
+            server.run(sockets=[sock])
+            shutdown_logging()
+            os._exit(0)
+        return pid
+
+    children = {spawn() for _ in range(workers)}
+    print(f"✅ Listening on http://{host}:{port} with workers {sorted(children)}")
+
+    shutting_down = False
+    crashed = False
+    restart_times = deque()
+    # Self-pipe: the signal handler writes a byte, so a pending wait ends at once
+    # (a plain sleep resumes after the handler and runs to the end)
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_write, False)
+
+    def wait_unless_stopped(seconds):
+        """Sleep up to seconds, returning early when a shutdown signal arrives"""
+        if not shutting_down:
+            select.select([wakeup_read], [], [], seconds)
+
+    def stop_workers():
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def stop(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        stop_workers()
+        try:
+            os.write(wakeup_write, b"x")
+        except BlockingIOError:
+            pass  # a wakeup is already pending
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # Give workers a moment to finish startup before measuring them
+    wait_unless_stopped(float(os.getenv("MEMORY_REPORT_DELAY", 2.0)))
+    if not shutting_down:
+        print_memory_table(sorted(children))
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if shutting_down:
+            continue
+
+        now = time.monotonic()
+        while restart_times and now - restart_times[0] > WORKER_RESTART_WINDOW:
+            restart_times.popleft()
+        if len(restart_times) >= WORKER_RESTART_LIMIT:
+            print(f"❌ Worker {pid} exited (status {status}); {len(restart_times)} restarts in the last "
+                  f"{WORKER_RESTART_WINDOW:.0f}s, giving up")
+            shutting_down = crashed = True
+            stop_workers()
+            continue
+
+        delay = min(WORKER_RESTART_MAX_BACKOFF, WORKER_RESTART_BACKOFF * 2 ** len(restart_times))
+        print(f"⚠️ Worker {pid} exited (status {status}); restarting in {delay:.1f}s")
+        wait_unless_stopped(delay)
+        if not shutting_down:
+            restart_times.append(time.monotonic())
+            children.add(spawn())
+
+    sock.close()
+    os.close(wakeup_read)
+    os.close(wakeup_write)
+    print("🛑 All workers stopped")
+    if crashed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start the Credit Score API server")
+    parser.add_argument("--production", action="store_true",
+                        default=os.getenv("APP_ENV", "").lower() == "production",
+                        help="Pre-fork multi-worker mode without auto-reload (or APP_ENV=production)")
+    parser.add_argument("--workers", type=int,
+                        default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+                        help="Worker processes in production mode (default: WEB_CONCURRENCY or CPU count)")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    args = parser.parse_args()
+
+    # Ensure required directories exist
+    os.makedirs("ml_model/saved_models", exist_ok=True)
+
+    if args.production:
+        run_production(args.host, args.port, max(1, args.workers))
+    else:
+        run_development(args.host, args.port)
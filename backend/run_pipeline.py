@@ -3,42 +3,29 @@
 """
 Complete ML Pipeline Runner
 Runs all steps from data loading to deployment with enhanced metrics
+
+The steps run in this process as cached stages (ml_model/pipeline.py):
+load, clean, features, split, train, evaluate, report, eda. A stage whose
+inputs, parameters and code are unchanged since its last run is skipped.
+EDA runs last, so the model is saved before the plots are drawn.
+
+Usage (from backend/):
+    python run_pipeline.py                    # run what changed
+    python run_pipeline.py --from train       # rerun train, evaluate and report
+    python run_pipeline.py --only eda         # rerun EDA only
+    python run_pipeline.py --skip-eda         # no EDA (also EDA_MODE=skip)
+    python run_pipeline.py --force            # rerun everything
+    python run_pipeline.py --dry-run          # show what would run
 """
 
+import argparse
 import subprocess
 import sys
 import os
 import json
 
-def run_step(step_num, step_name, python_script):
-    """Run a Python script for a pipeline step"""
-    print(f"\n{step_num} {step_name}")
-    print("-" * 40)
-    
-    try:
-        # Run the Python script
-        result = subprocess.run(
-            ["python3", "-c", python_script],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode == 0:
-            print("✅ Success!")
-            if result.stdout:
-                # Print relevant output
-                lines = result.stdout.split('\n')
-                for line in lines:
-                    if any(keyword in line for keyword in ['Accuracy:', 'Precision:', 'Recall:', 'F1-Score:', '✅', '❌', '⚠️']):
-                        print(f"  {line}")
-        else:
-            print("❌ Failed!")
-            if result.stderr:
-                print("Error:", result.stderr[:500])
-        return result.returncode == 0
-    except Exception as e:
-        print(f"❌ Exception: {e}")
-        return False
+# No pandas/sklearn imports up here: the virtual environment may not exist yet
+from ml_model.pipeline_stages import STAGE_NAMES
 
 def display_summary():
     """Display training summary from metrics file"""
@@ -91,6 +78,24 @@ def display_summary():
             print(f"⚠️ Could not load metrics: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Run the training pipeline, skipping unchanged stages")
+    stages = parser.add_mutually_exclusive_group()
+    stages.add_argument("--from", dest="start", choices=STAGE_NAMES,
+                        help="Rerun this stage and every stage after it")
+    stages.add_argument("--only", help=f"Comma-separated stages to rerun ({', '.join(STAGE_NAMES)}); "
+                                       "inputs without stored outputs run too")
+    parser.add_argument("--force", action="store_true", help="Rerun every stage")
+    parser.add_argument("--dry-run", action="store_true", help="Show which stages would run, then exit")
+    parser.add_argument("--skip-eda", action="store_true",
+                        default=os.getenv("EDA_MODE", "full").lower() == "skip",
+                        help="Leave out the EDA stage (default when EDA_MODE=skip)")
+    parser.add_argument("--verbose", action="store_true", help="Show the full output of each stage")
+    args = parser.parse_args()
+    if args.only:
+        unknown = [name for name in args.only.split(",") if name and name not in STAGE_NAMES]
+        if unknown:
+            parser.error(f"unknown stages {unknown}, expected {STAGE_NAMES}")
+    
     print("=" * 60)
     print("🚀 CREDIT SCORE AI - COMPLETE ML PIPELINE")
     print("=" * 60)
@@ -111,62 +116,26 @@ def main():
         else:
             subprocess.run(["venv\\Scripts\\pip", "install", "-r", "requirements.txt"])
     
-    # Step 1: Data Loading & Cleaning
-    step1_code = """
-import sys
-import os
-sys.path.append('.')
-from ml_model.data_processor import DataProcessor
-p = DataProcessor('CIBIL_Credit_Score_Large_Dataset.csv')
-df = p.load_data()
-df = p.clean_data()
-print(f"✅ Cleaned data shape: {df.shape}")
-"""
-    
-    # Step 2: EDA
-    step2_code = """
-import sys
-import os
-sys.path.append('.')
-from ml_model.data_processor import DataProcessor
-p = DataProcessor('CIBIL_Credit_Score_Large_Dataset.csv')
-p.load_data()
-p.clean_data()
-p.exploratory_analysis()
-print("✅ EDA completed. Check 'eda_results/' folder")
-"""
-    
-    # Step 3: Model Training with Enhanced Metrics
-    step3_code = """
-import sys
-import os
-sys.path.append('.')
-from ml_model.train_model import train_credit_score_model
-model, scaler, encoder, name, acc = train_credit_score_model()
-if model:
-    print(f"✅ Model trained: {name}")
-    print(f"📊 Check ml_model/evaluation_results/ for detailed metrics")
-"""
+    from ml_model.pipeline import build_training_pipeline
     
-    # Run steps
-    steps = [
-        ("1️⃣", "Data Loading & Cleaning", step1_code),
-        ("2️⃣", "Exploratory Data Analysis", step2_code),
-        ("3️⃣", "Model Training & Evaluation", step3_code),
-    ]
+    pipeline = build_training_pipeline()
+    only = [name for name in args.only.split(",") if name] if args.only else None
+    skip = ["eda"] if args.skip_eda else []
+    if args.dry_run:
+        print("\n🗺️ Plan:")
+        for name, action in pipeline.plan(only, args.start, args.force, skip).items():
+            print(f"   • {name:<9} {action}")
+        return
     
-    for step_num, step_name, step_code in steps:
-        success = run_step(step_num, step_name, step_code)
-        if not success:
-            print(f"\n❌ Pipeline stopped at {step_name}")
-            return
+    if not pipeline.run(only, args.start, args.force, skip, verbose=args.verbose):
+        return
     
     # Display summary
     display_summary()
     
-    # Step 4: API Server
+    # API Server
     print("\n" + "="*60)
-    print("4️⃣ Start API Server")
+    print("🌐 Start API Server")
     print("="*60)
     
     print("\n🌐 API Endpoints Available:")
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Offline batch scorer
+Scores a large applicant CSV with the saved model artifacts, in parallel chunks
+
+Usage:
+    python score_batch.py CIBIL_Credit_Score_Large_Dataset.csv -o scored.csv
+    python score_batch.py applicants.csv -o scored.parquet --workers 8 --chunk-size 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.model_holder import MODEL_DIR, load_bundle
+from app.rules import DECISION_LABELS, decision_codes
+from app.scoring import parse_frame, score_columns
+
+# Loaded once per worker process by init_worker
+_bundle = None
+
+# Columns score_chunk appends, with the dtype every chunk is written with
+OUTPUT_COLUMN_TYPES = {
+    'credit_score_band': 'string',
+    'risk_score': 'float64',
+    'loan_decision': 'string',
+    'scoring_error': 'string'
+}
+
+
+def init_worker(model_dir):
+    global _bundle
+    _bundle = load_bundle(model_dir)
+
+
+def score_chunk(frame: pd.DataFrame) -> pd.DataFrame:
+    """Append band, risk score and decision columns to one chunk of input rows"""
+    cols, errors = parse_frame(frame)
+    valid = np.array([error is None for error in errors], dtype=bool)
+    n = len(frame)
+
+    bands = np.full(n, None, dtype=object)
+    risk_scores = np.full(n, np.nan)
+    decisions = np.full(n, None, dtype=object)
+
+    if valid.any():
+        valid_bands, valid_risk, _ = score_columns(_bundle, {field: values[valid] for field, values in cols.items()})
+        bands[valid] = valid_bands
+        risk_scores[valid] = np.round(valid_risk, 2)
+        decisions[valid] = DECISION_LABELS[decision_codes(valid_bands, valid_risk)]
+
+    out = frame.copy()
+    out['credit_score_band'] = bands
+    out['risk_score'] = risk_scores
+    out['loan_decision'] = decisions
+    out['scoring_error'] = errors
+    return out
+
+
+class OutputWriter:
+    """Append scored chunks to a CSV or Parquet file"""
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self._parquet_writer = None
+        self._column_types = None
+        self._wrote_header = False
+
+    def _cast(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Chunk with the column dtypes fixed by the first chunk
+
+        Parquet needs one schema for the whole file, but chunk dtypes drift: an
+        all-None scoring_error is null-typed, and an integer input column turns
+        float once a chunk has a missing value. Numeric input columns are
+        written as float64, everything else as string.
+        """
+        if self._column_types is None:
+            self._column_types = {
+                name: OUTPUT_COLUMN_TYPES.get(name) or (
+                    'float64' if pd.api.types.is_numeric_dtype(frame[name]) else 'string')
+                for name in frame.columns
+            }
+        columns = {}
+        for name, dtype in self._column_types.items():
+            values = frame[name]
+            if dtype == 'float64':
+                # A non-numeric value in a later chunk is written as null; the row's scoring_error says why
+                values = pd.to_numeric(values, errors='coerce')
+            columns[name] = values.astype(dtype)
+        return pd.DataFrame(columns)
+
+    def write(self, frame: pd.DataFrame):
+        if self.fmt == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise SystemExit("❌ Parquet output needs pyarrow: pip install pyarrow")
+            frame = self._cast(frame)
+            if self._parquet_writer is None:
+                schema = pa.schema([
+                    (name, pa.float64() if dtype == 'float64' else pa.string())
+                    for name, dtype in self._column_types.items()
+                ])
+                self._parquet_writer = pq.ParquetWriter(self.path, schema)
+            table = pa.Table.from_pandas(frame, schema=self._parquet_writer.schema, preserve_index=False)
+            self._parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='a' if self._wrote_header else 'w',
+                         header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a large applicant CSV with the saved model")
+    parser.add_argument("input", help="CSV with the CreditData fields or the dataset column names")
+    parser.add_argument("-o", "--output", required=True, help="Output .csv or .parquet file")
+    parser.add_argument("--format", choices=["csv", "parquet"],
+                        help="Output format (default: from the output file extension)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per chunk")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Directory with the saved artifacts")
+    args = parser.parse_args()
+
+    fmt = args.format or ("parquet" if args.output.endswith(".parquet") else "csv")
+    workers = max(1, args.workers)
+
+    print("=" * 60)
+    print("🧮 CREDIT SCORE AI - BATCH SCORING")
+    print("=" * 60)
+    print(f"📂 Input:  {args.input}")
+    print(f"💾 Output: {args.output} ({fmt})")
+    print(f"⚙️ Workers: {workers}, chunk size: {args.chunk_size}")
+
+    if not os.path.exists(args.input):
+        print(f"❌ Input file not found: {args.input}")
+        sys.exit(1)
+
+    writer = OutputWriter(args.output, fmt)
+    chunks = pd.read_csv(args.input, chunksize=args.chunk_size)
+    total_rows = 0
+    total_errors = 0
+    start = time.perf_counter()
+
+    def record(scored):
+        nonlocal total_rows, total_errors
+        writer.write(scored)
+        total_rows += len(scored)
+        total_errors += int(scored['scoring_error'].notna().sum())
+        elapsed = time.perf_counter() - start
+        print(f"  ✅ {total_rows:,} rows scored ({total_rows / elapsed:,.0f} rows/s)")
+
+    try:
+        if workers == 1:
+            init_worker(args.model_dir)
+            for chunk in chunks:
+                record(score_chunk(chunk))
+        else:
+            # Keep a bounded number of chunks in flight so memory stays flat,
+            # and write results back in input order
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                     initargs=(args.model_dir,)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(score_chunk, chunk))
+                    if len(pending) >= 2 * workers:
+                        record(pending.popleft().result())
+                while pending:
+                    record(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print("\n" + "=" * 60)
+    print(f"🎉 Scored {total_rows:,} rows in {elapsed:.2f}s "
+          f"({total_rows / elapsed if elapsed else 0:,.0f} rows/s, {workers} workers)")
+    if total_errors:
+        print(f"⚠️ {total_errors:,} rows could not be scored (see scoring_error column)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# Modules are imported as app.*, ml_model.*, ... from the backend directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def model_dir(tmp_path_factory):
+    """Small synthetic model with every serving artifact (pickles and array bundle)"""
+    from benchmarks.common import build_model_dir
+    return build_model_dir(str(tmp_path_factory.mktemp("model")), n_rows=2000)
+
+
+@pytest.fixture(scope="session")
+def client(model_dir):
+    """TestClient for the API with the synthetic model already active"""
+    from fastapi.testclient import TestClient
+
+    from app import main
+    from app.model_holder import ModelHolder
+
+    holder = ModelHolder(model_dir, warmup=main.warmup_bundle)
+    holder.reload()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(main, "model_holder", holder)
+        with TestClient(main.app) as test_client:
+            yield test_client
@@ -0,0 +1,60 @@
+# tests/test_batch_endpoint.py
+from app import main
+
+APPLICANT = {
+    "age": 35, "monthly_income": 50000, "loan_amount": 300000, "credit_utilization": 0.4,
+    "missed_payments": 1, "total_active_loans": 2, "credit_history_years": 5, "loan_tenure_months": 36
+}
+
+
+def test_batch_reports_errors_per_row(client):
+    applicants = [
+        APPLICANT,
+        {**APPLICANT, "age": "thirty"},
+        {**APPLICANT, "credit_utilization": 1.5},
+        {key: value for key, value in APPLICANT.items() if key != "monthly_income"},
+        {**APPLICANT, "monthly_income": 90000}
+    ]
+    response = client.post("/predict/batch", json=applicants)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total"], body["succeeded"], body["failed"]) == (5, 2, 3)
+
+    results = body["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert [result["status"] for result in results] == ["success", "error", "error", "error", "success"]
+    assert results[1]["detail"].startswith("age:")
+    assert results[2]["detail"] == "Credit utilization must be between 0 and 1"
+    assert results[3]["detail"].startswith("monthly_income:")
+
+
+def test_batch_reports_non_object_elements_per_row(client):
+    response = client.post("/predict/batch", json=[APPLICANT, 5, "x", None, [APPLICANT], APPLICANT])
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total"], body["succeeded"], body["failed"]) == (6, 2, 4)
+    statuses = [result["status"] for result in body["results"]]
+    assert statuses == ["success", "error", "error", "error", "error", "success"]
+    assert body["results"][1]["detail"] == "Expected a JSON object"
+
+
+def test_batch_body_must_be_a_list(client):
+    assert client.post("/predict/batch", json=APPLICANT).status_code == 422
+
+
+def test_batch_rows_match_single_predictions(client):
+    single = client.post("/predict", json=APPLICANT).json()["prediction"]
+    batch = client.post("/predict/batch", json=[APPLICANT]).json()
+    prediction = batch["results"][0]["prediction"]
+    assert prediction["credit_score_band"] == single["credit_score_band"]
+    assert prediction["risk_score"] == single["risk_score"]
+    assert prediction["loan_decision"] == single["loan_decision"]
+
+
+def test_batch_over_the_limit_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(main, "MAX_BATCH_SIZE", 2)
+    response = client.post("/predict/batch", json=[APPLICANT] * 3)
+    assert response.status_code == 413
+    assert "max 2" in response.json()["detail"]
+
+    assert client.post("/predict/batch", json=[APPLICANT] * 2).status_code == 200
@@ -0,0 +1,138 @@
+# tests/test_batching.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.batching import BatchStats, MicroBatcher
+
+
+def double_all(items):
+    return [item * 2 for item in items]
+
+
+def run_concurrently(batcher, items):
+    async def main():
+        return await asyncio.gather(*(batcher.submit(item) for item in items))
+    return asyncio.run(main())
+
+
+def test_concurrent_requests_share_one_batch():
+    batcher = MicroBatcher(double_all, window_ms=20, max_batch_size=64)
+    assert run_concurrently(batcher, list(range(10))) == [i * 2 for i in range(10)]
+    assert batcher.stats.batches == 1
+    assert batcher.stats.sizes == {10: 1}
+
+
+def test_full_batches_dispatch_at_max_size():
+    batcher = MicroBatcher(double_all, window_ms=1000, max_batch_size=4)
+    start = time.perf_counter()
+    assert run_concurrently(batcher, list(range(8))) == [i * 2 for i in range(8)]
+    # Two full batches, neither waits for the window
+    assert batcher.stats.sizes == {4: 2}
+    assert time.perf_counter() - start < 0.5
+
+
+def test_partial_batch_dispatches_when_window_expires():
+    batcher = MicroBatcher(double_all, window_ms=100, max_batch_size=64)
+    start = time.perf_counter()
+    # Back-to-back arrivals: the batcher waits out the window for more
+    assert run_concurrently(batcher, [1, 2, 3]) == [2, 4, 6]
+    assert time.perf_counter() - start >= 0.09
+    assert batcher.stats.sizes == {3: 1}
+
+
+def test_lone_request_under_light_traffic_does_not_wait():
+    batcher = MicroBatcher(double_all, window_ms=1000, max_batch_size=64)
+    start = time.perf_counter()
+    assert run_concurrently(batcher, [21]) == [42]
+    assert time.perf_counter() - start < 0.5
+
+
+def test_score_errors_reach_every_caller():
+    def fail(items):
+        raise RuntimeError("model exploded")
+
+    batcher = MicroBatcher(fail, window_ms=10, max_batch_size=64)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_batch_stats_percentiles():
+    stats = BatchStats()
+    for size in [1, 1, 1, 4, 8]:
+        stats.record(size)
+    snapshot = stats.snapshot()
+    assert snapshot["requests"] == 15
+    assert snapshot["p50_batch_size"] == 1
+    assert snapshot["max_batch_size"] == 8
+
+
+def test_short_result_lists_fail_the_whole_batch():
+    batcher = MicroBatcher(lambda items: [0] * (len(items) - 1), window_ms=20, max_batch_size=64)
+
+    async def main():
+        submits = asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        return await asyncio.wait_for(submits, timeout=5)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert "returned 2 results for 3 items" in str(results[0])
+
+
+class WorkerKilled(BaseException):
+    pass
+
+
+def test_dead_worker_fails_its_requests_and_restarts():
+    calls = []
+
+    def score(items):
+        calls.append(items)
+        if len(calls) == 1:
+            raise WorkerKilled()
+        return double_all(items)
+
+    batcher = MicroBatcher(score, window_ms=1000, max_batch_size=2)
+
+    async def main():
+        # The first full batch kills the worker; the third item is still queued behind it
+        submits = asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        failed = await asyncio.wait_for(submits, timeout=5)
+        # The next submit starts a fresh worker
+        return failed, await asyncio.wait_for(batcher.submit(5), timeout=5)
+
+    failed, result = asyncio.run(main())
+    assert all(isinstance(error, RuntimeError) and "worker stopped" in str(error) for error in failed)
+    assert result == 10
+
+
+def test_cancelled_worker_fails_the_batch_in_flight():
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(items):
+        started.set()
+        release.wait(5)
+        return double_all(items)
+
+    batcher = MicroBatcher(slow, window_ms=10, max_batch_size=64)
+
+    async def main():
+        pending = asyncio.ensure_future(batcher.submit(1))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, started.wait, 5)
+        batcher._worker.cancel()
+        try:
+            return await asyncio.wait_for(pending, timeout=5)
+        except RuntimeError as e:
+            return e
+        finally:
+            release.set()
+
+    assert isinstance(asyncio.run(main()), RuntimeError)
@@ -0,0 +1,62 @@
+# tests/test_cache.py
+from types import SimpleNamespace
+
+import pytest
+
+from app import cache as cache_module
+from app.cache import PredictionCache
+
+
+def applicant(age, income=50000):
+    return SimpleNamespace(age=age, income=income)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_int_and_float_inputs_share_an_entry():
+    cache = PredictionCache(["age", "income"])
+    cache.get(applicant(35), "v1")
+    cache.put(applicant(35), "v1", {"score": 700})
+    assert cache.get(applicant(35.0, 50000.0), "v1") == {"score": 700}
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PredictionCache(["age", "income"], ttl=10)
+    cache.get(applicant(35), "v1")
+    cache.put(applicant(35), "v1", {"score": 700})
+    clock[0] += 9
+    assert cache.get(applicant(35), "v1") == {"score": 700}
+    clock[0] += 2
+    assert cache.get(applicant(35), "v1") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(["age", "income"], max_size=2)
+    cache.get(applicant(1), "v1")
+    cache.put(applicant(1), "v1", {"score": 1})
+    cache.put(applicant(2), "v1", {"score": 2})
+    # Touch 1 so 2 becomes the oldest
+    assert cache.get(applicant(1), "v1") == {"score": 1}
+    cache.put(applicant(3), "v1", {"score": 3})
+    assert cache.get(applicant(2), "v1") is None
+    assert cache.get(applicant(1), "v1") == {"score": 1}
+    assert cache.get(applicant(3), "v1") == {"score": 3}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_new_model_version_invalidates_entries():
+    cache = PredictionCache(["age", "income"])
+    cache.get(applicant(35), "v1")
+    cache.put(applicant(35), "v1", {"score": 700})
+    assert cache.get(applicant(35), "v2") is None
+    assert cache.stats()["size"] == 0
+    # A late result computed under v1 is not stored once v2 is active
+    cache.put(applicant(35), "v1", {"score": 700})
+    assert cache.get(applicant(35), "v1") is None
+    assert cache.stats()["size"] == 0
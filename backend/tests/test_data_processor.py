@@ -0,0 +1,137 @@
+# tests/test_data_processor.py
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_model.data_processor import DataProcessor, peak_rss_mb
+
+
+def test_memory_report_without_resource_module(monkeypatch, capsys):
+    # Windows has no resource module
+    monkeypatch.setitem(sys.modules, "resource", None)
+    assert peak_rss_mb() is None
+
+    processor = DataProcessor(csv_path=None)
+    processor.df = pd.DataFrame({"a": [1, 2, 3]})
+    processor.memory_report("load")
+    assert "process peak n/a" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("chunksize", [None, 2])
+def test_header_only_csv_loads_as_empty_frame(tmp_path, chunksize):
+    path = tmp_path / "empty.csv"
+    path.write_text("Customer_ID,Age,Monthly_Income,CIBIL_Score_Band\n")
+
+    df = DataProcessor(str(path), chunksize=chunksize, use_cache=False).load_data()
+    assert len(df) == 0
+    assert {"Age", "Monthly_Income", "CIBIL_Score_Band"} <= set(df.columns)
+
+
+def test_chunked_load_without_chunks_returns_empty_frame(tmp_path, monkeypatch):
+    path = tmp_path / "empty.csv"
+    path.write_text("Customer_ID,Age,CIBIL_Score_Band\n")
+    read_csv = pd.read_csv
+
+    def no_chunks(*args, **kwargs):
+        # Older pandas yields no chunks at all for a header-only file
+        return iter([]) if kwargs.get("chunksize") else read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", no_chunks)
+    df = DataProcessor(str(path), chunksize=2, use_cache=False).load_data()
+    assert len(df) == 0
+    assert list(df.columns) == ["Age", "CIBIL_Score_Band"]
+
+
+def test_chunked_cleaning_matches_default_loader(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 400
+    df = pd.DataFrame({
+        "Customer_ID": [f"CUST{i:05d}" for i in range(n)],
+        "Age": rng.integers(21, 70, n),
+        "Monthly_Income": rng.integers(20000, 200000, n),
+        "Credit_Utilization": rng.uniform(0, 1, n).round(3),
+        "CIBIL_Score_Band": rng.choice(["Poor", "Fair", "Good", "Excellent"], n)
+    })
+    exact = df.iloc[:20]
+    # Same IDs with a missing Age, once as NaN and once already filled with the median:
+    # duplicates only once missing values are filled
+    missing = df.iloc[20:40].copy()
+    missing["Age"] = np.nan
+    filled = missing.copy()
+    filled["Age"] = df["Age"].median()
+    # Identical values under different IDs are not duplicates
+    other_ids = df.iloc[40:50].assign(Customer_ID=[f"DUP{i}" for i in range(10)])
+    path = tmp_path / "data.csv"
+    pd.concat([df, exact, missing, filled, other_ids]).sample(frac=1, random_state=1).to_csv(path, index=False)
+
+    default = DataProcessor(str(path), use_cache=False)
+    default.load_data()
+    default.clean_data()
+    chunked = DataProcessor(str(path), chunksize=64, use_cache=False)
+    chunked.load_data()
+    chunked.clean_data()
+
+    expected = default.df.drop(columns=["Customer_ID"])
+    assert list(chunked.df.columns) == list(expected.columns)
+    assert chunked.df.index.equals(expected.index)
+    for column in expected.columns:
+        np.testing.assert_array_equal(np.asarray(chunked.df[column], dtype=object),
+                                      np.asarray(expected[column], dtype=object))
+
+
+def outlier_frame():
+    rng = np.random.default_rng(3)
+    n = 500
+    df = pd.DataFrame({
+        "Age": rng.normal(40, 8, n).round(),
+        "Monthly_Income": rng.lognormal(11, 0.6, n).round(),
+        "Credit_Utilization": rng.beta(2, 5, n).round(3),
+        "CIBIL_Score_Band": rng.choice(["Poor", "Fair", "Good"], n)
+    })
+    df.loc[rng.choice(n, 15, replace=False), "Age"] = np.nan
+    return df
+
+
+def iqr_filter(df, columns, bounds_from):
+    """Reference IQR filtering with pandas, bounds taken from bounds_from(current frame)"""
+    reference = df
+    for col in columns:
+        source = bounds_from(reference)
+        Q1, Q3 = source[col].quantile(0.25), source[col].quantile(0.75)
+        lower_bound, upper_bound = Q1 - 1.5 * (Q3 - Q1), Q3 + 1.5 * (Q3 - Q1)
+        if ((df[col] < lower_bound) | (df[col] > upper_bound)).sum() > 0:
+            reference = reference[(reference[col] >= lower_bound) & (reference[col] <= upper_bound)]
+    return reference
+
+
+def run_outliers(df, mode):
+    processor = DataProcessor(csv_path=None)
+    processor.df = df.copy()
+    return processor.remove_outliers(mode)
+
+
+def test_sequential_outliers_match_column_by_column_filtering():
+    df = outlier_frame()
+    columns = ["Age", "Monthly_Income", "Credit_Utilization"]
+    expected = iqr_filter(df, columns, bounds_from=lambda current: current)
+    result = run_outliers(df, "sequential")
+    assert result.index.equals(expected.index)
+
+
+def test_single_pass_outliers_take_every_bound_from_the_full_frame():
+    df = outlier_frame()
+    columns = ["Age", "Monthly_Income", "Credit_Utilization"]
+    expected = iqr_filter(df, columns, bounds_from=lambda current: df)
+    result = run_outliers(df, "single-pass")
+    assert result.index.equals(expected.index)
+    # Missing values drop out with their column's outliers, as in the original filter
+    assert result["Age"].notna().all()
+    # On this frame the two modes keep different rows
+    assert not result.index.equals(run_outliers(df, "sequential").index)
+
+
+def test_unknown_outlier_mode_is_rejected():
+    with pytest.raises(ValueError, match="Unknown outlier mode"):
+        run_outliers(outlier_frame(), "median")
@@ -0,0 +1,130 @@
+# tests/test_dataset_cache.py
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from ml_model import dataset_cache
+
+
+@pytest.fixture
+def hash_calls(monkeypatch):
+    """Count full-content hashes"""
+    calls = []
+    file_sha256 = dataset_cache.file_sha256
+
+    def counting(path):
+        calls.append(path)
+        return file_sha256(path)
+
+    monkeypatch.setattr(dataset_cache, "file_sha256", counting)
+    return calls
+
+
+def test_fingerprint_rehashes_only_when_size_or_mtime_change(tmp_path, hash_calls):
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b\n1,2\n")
+    cache_dir = str(tmp_path / "cache")
+
+    first = dataset_cache.fingerprint_sha256(str(csv_path), cache_dir)
+    assert dataset_cache.fingerprint_sha256(str(csv_path), cache_dir) == first
+    assert len(hash_calls) == 1
+
+    # Touched: rehashed, same content hash
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert dataset_cache.fingerprint_sha256(str(csv_path), cache_dir) == first
+    assert len(hash_calls) == 2
+
+    # Same size, new content and mtime: new hash
+    csv_path.write_text("a,b\n3,4\n")
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    assert dataset_cache.fingerprint_sha256(str(csv_path), cache_dir) != first
+    assert len(hash_calls) == 3
+
+
+@pytest.fixture
+def cached_csv(tmp_path):
+    """A CSV with a fresh cache entry: (csv path, cache dir, original stat)"""
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b\n1,2\n")
+    cache_dir = str(tmp_path / "cache")
+    df = pd.DataFrame({"a": [1], "b": [2]})
+    assert dataset_cache.save_frame(df, cache_dir, str(csv_path), "test")
+    return str(csv_path), cache_dir, os.stat(csv_path)
+
+
+def test_lookup_hits_without_hashing(cached_csv, hash_calls):
+    csv_path, cache_dir, _ = cached_csv
+    assert dataset_cache.lookup(cache_dir, csv_path, "test") is not None
+    frame, _ = dataset_cache.load_frame(cache_dir, csv_path, "test")
+    assert frame["a"].tolist() == [1]
+    assert hash_calls == []
+
+
+def test_lookup_misses_when_size_changes(cached_csv, hash_calls):
+    csv_path, cache_dir, _ = cached_csv
+    with open(csv_path, "a") as f:
+        f.write("3,4\n")
+    assert dataset_cache.lookup(cache_dir, csv_path, "test") is None
+    assert hash_calls == []
+
+
+def test_lookup_refreshes_mtime_after_touch(cached_csv, hash_calls):
+    csv_path, cache_dir, stat = cached_csv
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    manifest = dataset_cache.lookup(cache_dir, csv_path, "test")
+    assert manifest is not None
+    assert manifest["mtime_ns"] == stat.st_mtime_ns + 10**9
+    assert len(hash_calls) == 1
+
+    # The refreshed manifest makes the next lookup a plain stat comparison
+    assert dataset_cache.lookup(cache_dir, csv_path, "test") is not None
+    assert len(hash_calls) == 1
+
+
+def test_lookup_misses_when_content_changes(cached_csv):
+    csv_path, cache_dir, stat = cached_csv
+    with open(csv_path, "w") as f:
+        f.write("a,b\n3,4\n")
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert dataset_cache.lookup(cache_dir, csv_path, "test") is None
+    assert dataset_cache.load_frame(cache_dir, csv_path, "test") is None
+
+
+def test_save_frame_skips_csv_changed_while_parsing(cached_csv):
+    csv_path, cache_dir, stat = cached_csv
+    with open(csv_path, "a") as f:
+        f.write("3,4\n")
+    df = pd.DataFrame({"a": [1, 3], "b": [2, 4]})
+    assert not dataset_cache.save_frame(df, cache_dir, csv_path, "test", source_stat=stat)
+    # The old entry is left alone, and lookup still sees it as stale
+    assert dataset_cache.lookup(cache_dir, csv_path, "test") is None
+
+
+def test_same_named_csvs_get_their_own_entries(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    paths = []
+    for folder, values in (("a", [1, 2]), ("b", [3, 4])):
+        (tmp_path / folder).mkdir()
+        csv_path = tmp_path / folder / "data.csv"
+        # Same size, different content
+        csv_path.write_text(f"a\n{values[0]}\n{values[1]}\n")
+        assert dataset_cache.save_frame(pd.DataFrame({"a": values}), cache_dir, str(csv_path), "test")
+        paths.append(str(csv_path))
+
+    assert dataset_cache.load_frame(cache_dir, paths[0], "test")[0]["a"].tolist() == [1, 2]
+    assert dataset_cache.load_frame(cache_dir, paths[1], "test")[0]["a"].tolist() == [3, 4]
+
+
+def test_lookup_rejects_manifest_of_another_source(cached_csv, tmp_path):
+    csv_path, cache_dir, _ = cached_csv
+    entry_dir = dataset_cache.cache_entry_dir(cache_dir, csv_path, "test")
+    manifest_path = os.path.join(entry_dir, dataset_cache.MANIFEST_FILE)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest["source"] = str(tmp_path / "elsewhere" / "data.csv")
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    assert dataset_cache.lookup(cache_dir, csv_path, "test") is None
@@ -0,0 +1,67 @@
+# tests/test_model_bundle.py
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from ml_model.model_bundle import (BUNDLE_DIR_NAME, METADATA_FILE, _bundle_checksum, _file_sha256,
+                                   load_bundle_arrays)
+
+
+@pytest.fixture
+def bundle_dir(model_dir, tmp_path):
+    """Writable copy of the synthetic model's array bundle"""
+    target = str(tmp_path / BUNDLE_DIR_NAME)
+    shutil.copytree(os.path.join(model_dir, BUNDLE_DIR_NAME), target)
+    return target
+
+
+def rewrite_array(bundle_dir, name, array, update_metadata=True):
+    """Replace one array file; optionally re-sign it so only the structural checks can catch it"""
+    path = os.path.join(bundle_dir, f"{name}.npy")
+    np.save(path, array)
+    if not update_metadata:
+        return
+    metadata_path = os.path.join(bundle_dir, METADATA_FILE)
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    metadata["arrays"][name]["sha256"] = _file_sha256(path)
+    metadata["checksum"] = _bundle_checksum(metadata)
+    with open(metadata_path, "w") as f:
+        json.dump(metadata, f)
+
+
+def test_intact_bundle_loads(bundle_dir):
+    bundle = load_bundle_arrays(bundle_dir)
+    assert bundle.engine.n_nodes > 0
+
+
+def test_corrupted_array_fails_its_checksum(bundle_dir):
+    threshold = np.array(np.load(os.path.join(bundle_dir, "threshold.npy")))
+    threshold[0] += 1.0
+    rewrite_array(bundle_dir, "threshold", threshold, update_metadata=False)
+    with pytest.raises(ValueError, match="Checksum mismatch for threshold.npy"):
+        load_bundle_arrays(bundle_dir)
+
+
+def test_edited_metadata_fails_its_checksum(bundle_dir):
+    metadata_path = os.path.join(bundle_dir, METADATA_FILE)
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    metadata["class_labels"] = list(reversed(metadata["class_labels"]))
+    with open(metadata_path, "w") as f:
+        json.dump(metadata, f)
+    with pytest.raises(ValueError, match="does not match its checksum"):
+        load_bundle_arrays(bundle_dir)
+
+
+@pytest.mark.parametrize("name", ["left", "right", "roots"])
+def test_out_of_range_node_index_is_rejected(bundle_dir, name):
+    indices = np.array(np.load(os.path.join(bundle_dir, f"{name}.npy")))
+    n_nodes = len(np.load(os.path.join(bundle_dir, "feature.npy")))
+    indices[0] = n_nodes
+    rewrite_array(bundle_dir, name, indices)
+    with pytest.raises(ValueError, match=f"Tree '{name}' indices point outside the node arrays"):
+        load_bundle_arrays(bundle_dir)
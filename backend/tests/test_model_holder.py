@@ -0,0 +1,131 @@
+# tests/test_model_holder.py
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pytest
+
+from app import model_holder
+from app.model_holder import SERVING_ARTIFACT, load_bundle, load_pickled_bundle
+from ml_model.model_bundle import FLOAT32_CHECK_FILE
+
+
+@pytest.fixture
+def pickle_dir(model_dir, tmp_path):
+    """Copy of the synthetic model's joblib artifacts, without the array bundle"""
+    target = tmp_path / "model"
+    shutil.copytree(model_dir, target, ignore=shutil.ignore_patterns("bundle"))
+    return str(target)
+
+
+def probe_rows(bundle, n=200):
+    rng = np.random.default_rng(1)
+    return bundle.scaler.mean_ + bundle.scaler.scale_ * rng.standard_normal((n, len(bundle.features)))
+
+
+def expected_bands(bundle, X):
+    return bundle.class_labels[bundle.model.predict(bundle.scaler.transform(X))]
+
+
+def tamper_serving_model(model_dir, change):
+    path = os.path.join(model_dir, SERVING_ARTIFACT)
+    engine = joblib.load(path)
+    change(engine)
+    joblib.dump(engine, path)
+
+
+def test_matching_serving_model_is_used(pickle_dir):
+    bundle = load_pickled_bundle(pickle_dir)
+    assert bundle.engine.folded
+    X = probe_rows(bundle)
+    np.testing.assert_array_equal(bundle.predict_bands(X), expected_bands(bundle, X))
+
+
+def test_version_covers_serving_model(pickle_dir):
+    before = load_pickled_bundle(pickle_dir).version
+    # Still a valid engine for the model (leaves loop on themselves), but different bytes
+    tamper_serving_model(pickle_dir, lambda engine: setattr(engine, "max_depth", engine.max_depth + 1))
+    changed = load_pickled_bundle(pickle_dir)
+    assert changed.engine.folded
+    assert changed.version != before
+
+    os.remove(os.path.join(pickle_dir, SERVING_ARTIFACT))
+    assert load_pickled_bundle(pickle_dir).version != before
+
+
+@pytest.mark.parametrize("change", [
+    # Leaf values from another model
+    lambda engine: setattr(engine, "value", engine.value * 1.5),
+    # Same trees, but split points from another scaler
+    lambda engine: setattr(engine, "threshold", engine.threshold * 1.1 + 1.0),
+], ids=["values", "thresholds"])
+def test_mismatched_serving_model_falls_back_to_compiled_trees(pickle_dir, change):
+    tamper_serving_model(pickle_dir, change)
+    bundle = load_pickled_bundle(pickle_dir)
+
+    assert bundle.engine is not None and not bundle.engine.folded
+    X = probe_rows(bundle)
+    np.testing.assert_array_equal(bundle.predict_bands(X), expected_bands(bundle, X))
+
+
+def test_unreadable_serving_model_falls_back_to_compiled_trees(pickle_dir):
+    with open(os.path.join(pickle_dir, SERVING_ARTIFACT), "wb") as f:
+        f.write(b"not a pickle")
+    bundle = load_pickled_bundle(pickle_dir)
+    assert bundle.engine is not None and not bundle.engine.folded
+
+
+def write_check_record(model_dir, **changes):
+    path = os.path.join(model_dir, FLOAT32_CHECK_FILE)
+    with open(path) as f:
+        record = json.load(f)
+    record.update(changes)
+    with open(path, "w") as f:
+        json.dump(record, f)
+
+
+def test_float32_uses_recorded_check(pickle_dir):
+    write_check_record(pickle_dir, match=True, flips=0)
+    bundle = load_bundle(pickle_dir, model_format="pickle", precision="float32")
+    assert bundle.precision == "float32"
+    assert bundle.float32_check["match"]
+
+
+@pytest.mark.parametrize("changes", [
+    {"match": False, "flips": 3},
+    {"model_sha256": "0" * 64, "match": True},
+    {"folded": False, "match": True},
+], ids=["flips", "other-model", "other-engine"])
+def test_float32_refused_without_a_passing_check_for_this_model(pickle_dir, changes):
+    write_check_record(pickle_dir, **changes)
+    bundle = load_bundle(pickle_dir, model_format="pickle", precision="float32")
+    assert bundle.precision == "float64"
+
+
+def test_float32_refused_without_a_recorded_check(pickle_dir):
+    os.remove(os.path.join(pickle_dir, FLOAT32_CHECK_FILE))
+    bundle = load_bundle(pickle_dir, model_format="pickle", precision="float32")
+    assert bundle.float32_check is None
+    assert bundle.precision == "float64"
+
+
+def test_large_blocks_go_to_sklearn_when_loaded(pickle_dir, monkeypatch):
+    monkeypatch.setattr(model_holder, "ENGINE_MAX_ROWS", 100)
+    bundle = load_pickled_bundle(pickle_dir)
+    engine_calls = []
+    predict = bundle.engine.predict
+    monkeypatch.setattr(bundle.engine, "predict", lambda X: engine_calls.append(len(X)) or predict(X))
+
+    X = probe_rows(bundle, n=300)
+    np.testing.assert_array_equal(bundle.predict_bands(X[:100]), expected_bands(bundle, X[:100]))
+    np.testing.assert_array_equal(bundle.predict_bands(X), expected_bands(bundle, X))
+    assert engine_calls == [100]
+
+
+def test_bundles_without_sklearn_always_use_the_engine(model_dir, monkeypatch):
+    monkeypatch.setattr(model_holder, "ENGINE_MAX_ROWS", 100)
+    bundle = load_bundle(model_dir, model_format="bundle")
+    assert bundle.model is None
+    assert len(bundle.predict_bands(probe_rows(bundle, n=300))) == 300
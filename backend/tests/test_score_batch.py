@@ -0,0 +1,53 @@
+# tests/test_score_batch.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from score_batch import OutputWriter
+
+
+def scored_chunk(ages, errors):
+    n = len(ages)
+    return pd.DataFrame({
+        'Customer_ID': [f"C{i}" for i in range(n)],
+        'Age': ages,
+        'credit_score_band': [None if e else 'Good' for e in errors],
+        'risk_score': [np.nan if e else 12.5 for e in errors],
+        'loan_decision': [None if e else 'Approve' for e in errors],
+        'scoring_error': errors
+    })
+
+
+def test_parquet_schema_stays_fixed_across_chunks(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "scored.parquet"
+    writer = OutputWriter(str(path), "parquet")
+
+    # First chunk: no errors (all-None scoring_error) and an integer input column
+    writer.write(scored_chunk([30, 41], [None, None]))
+    # Later chunk: a missing age (float column) and scoring errors
+    writer.write(scored_chunk([np.nan, 52.0], ["age: invalid or missing value", None]))
+    writer.close()
+
+    table = pq.read_table(path)
+    assert str(table.schema.field('scoring_error').type) == 'string'
+    assert str(table.schema.field('Age').type) == 'double'
+    assert str(table.schema.field('risk_score').type) == 'double'
+
+    result = table.to_pandas()
+    assert len(result) == 4
+    assert result['scoring_error'].isna().tolist() == [True, True, False, True]
+    assert result['scoring_error'].iloc[2] == "age: invalid or missing value"
+    assert result['Age'].iloc[[0, 1, 3]].tolist() == [30.0, 41.0, 52.0]
+
+
+def test_csv_output_appends_chunks(tmp_path):
+    path = tmp_path / "scored.csv"
+    writer = OutputWriter(str(path), "csv")
+    writer.write(scored_chunk([30], [None]))
+    writer.write(scored_chunk([np.nan], ["age: invalid or missing value"]))
+    writer.close()
+
+    result = pd.read_csv(path)
+    assert len(result) == 2
+    assert result['scoring_error'].isna().tolist() == [True, False]
@@ -0,0 +1,56 @@
+# tests/test_serialization.py
+import json
+
+import numpy as np
+import pytest
+
+from app import serialization
+from app.serialization import FastJSONResponse, dumps
+
+PAYLOAD = {
+    "plain": 1.5,
+    "nan": float("nan"),
+    "infinities": [float("inf"), -float("inf")],
+    "tuple": (1, float("nan")),
+    "numpy_scalar": np.float64("nan"),
+    "numpy_float32": np.float32("inf"),
+    "numpy_int": np.int64(7),
+    "numpy_array": np.array([np.nan, 2.0, np.inf]),
+    "nested": {"band": "Good", "scores": [np.float32(0.5), None]},
+    "text": "Müller"
+}
+EXPECTED = {
+    "plain": 1.5,
+    "nan": None,
+    "infinities": [None, None],
+    "tuple": [1, None],
+    "numpy_scalar": None,
+    "numpy_float32": None,
+    "numpy_int": 7,
+    "numpy_array": [None, 2.0, None],
+    "nested": {"band": "Good", "scores": [0.5, None]},
+    "text": "Müller"
+}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+def test_non_finite_floats_become_null(backend):
+    assert json.loads(dumps(PAYLOAD)) == EXPECTED
+
+
+def test_finite_payload_is_compact_utf8(backend):
+    body = dumps({"a": [1, 2.5], "b": "é"})
+    assert body == '{"a":[1,2.5],"b":"é"}'.encode("utf-8")
+
+
+def test_response_passes_bytes_through(backend):
+    assert FastJSONResponse(b'{"cached":true}').body == b'{"cached":true}'
+    assert json.loads(FastJSONResponse({"x": float("nan")}).body) == {"x": None}
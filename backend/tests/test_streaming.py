@@ -0,0 +1,150 @@
+# tests/test_streaming.py
+import asyncio
+import json
+
+import pytest
+
+from app.scoring import INPUT_FIELDS
+from app.streaming import RowBlockParser, StreamFormatError
+
+APPLICANT = {
+    "age": 35, "monthly_income": 50000, "loan_amount": 300000, "credit_utilization": 0.4,
+    "missed_payments": 1, "total_active_loans": 2, "credit_history_years": 5, "loan_tenure_months": 36
+}
+CSV_HEADER = ",".join(INPUT_FIELDS)
+CSV_ROW = ",".join(str(APPLICANT[field]) for field in INPUT_FIELDS)
+
+
+def parse_all(parser, pieces):
+    blocks = []
+    for piece in pieces:
+        blocks.extend(parser.feed(piece))
+    blocks.extend(parser.close())
+    return blocks
+
+
+def test_blocks_fill_as_lines_arrive():
+    parser = RowBlockParser(is_csv=False, block_size=2, max_line_bytes=1024)
+    line = json.dumps(APPLICANT).encode()
+
+    # A line split across pieces completes only once its newline arrives
+    assert parser.feed(line + b"\n" + line[:10]) == []
+    blocks = parser.feed(line[10:] + b"\n" + line)
+    assert [len(block) for block in blocks] == [2]
+    assert blocks[0].columns["age"] == [35, 35]
+
+    rest = parser.close()
+    assert [(block.start, len(block)) for block in rest] == [(2, 1)]
+
+
+def test_bad_json_lines_are_row_errors():
+    body = b"\n".join([json.dumps(APPLICANT).encode(), b"{not json", b"[1, 2]", b"",
+                       json.dumps({"Age": 41, "Monthly_Income": 1}).encode()])
+    (block,) = parse_all(RowBlockParser(is_csv=False, block_size=100, max_line_bytes=1024), [body])
+
+    assert block.errors[0] is None
+    assert block.errors[1].startswith("Invalid JSON")
+    assert block.errors[2] == "Expected a JSON object"
+    # Blank lines are not rows; dataset column names are accepted as keys
+    assert len(block) == 4
+    assert block.errors[3] is None and block.columns["age"][3] == 41
+    assert block.columns["loan_amount"][3] is None
+
+
+def test_csv_rows_with_wrong_field_count_are_row_errors():
+    body = f"{CSV_HEADER}\r\n{CSV_ROW}\r\n1,2\n{CSV_ROW}".encode()
+    (block,) = parse_all(RowBlockParser(is_csv=True, block_size=100, max_line_bytes=1024), [body])
+
+    assert block.errors == [None, f"Expected {len(INPUT_FIELDS)} CSV fields, got 2", None]
+    assert block.columns["loan_tenure_months"] == ["36", None, "36"]
+
+
+def test_csv_header_without_required_columns_is_rejected():
+    parser = RowBlockParser(is_csv=True, block_size=100, max_line_bytes=1024)
+    with pytest.raises(StreamFormatError, match="Missing columns"):
+        parser.feed(b"age,income\n")
+
+
+def test_long_lines_are_dropped_without_buffering():
+    parser = RowBlockParser(is_csv=False, block_size=100, max_line_bytes=64)
+    line = json.dumps(APPLICANT).encode()
+    blocks = parse_all(parser, [b"[" + b" " * 50, b" " * 50, b" " * 50 + b"]\n" + line + b"\n"])
+
+    (block,) = blocks
+    assert block.errors[0] == "Line is longer than 64 bytes"
+    assert len(block) == 2
+
+
+def stream_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_endpoint_reports_errors_inline(client):
+    body = "\n".join([json.dumps(APPLICANT), "{bad", json.dumps({**APPLICANT, "age": "x"}),
+                      json.dumps({**APPLICANT, "credit_utilization": 3}), json.dumps(APPLICANT)])
+    lines = stream_lines(client.post("/predict/stream", content=body.encode()))
+
+    assert [line["row"] for line in lines] == [0, 1, 2, 3, 4]
+    assert [line["status"] for line in lines] == ["success", "error", "error", "error", "success"]
+    assert lines[2]["detail"] == "age: invalid or missing value"
+    assert lines[3]["detail"] == "Credit utilization must be between 0 and 1"
+
+
+def test_stream_endpoint_scores_csv_in_blocks(client, monkeypatch):
+    from app import main
+    monkeypatch.setattr(main, "STREAM_CHUNK_SIZE", 3)
+
+    def body():
+        yield f"{CSV_HEADER}\n".encode()
+        for _ in range(10):
+            yield f"{CSV_ROW}\n".encode()
+
+    response = client.post("/predict/stream", content=body(), headers={"content-type": "text/csv"})
+    lines = stream_lines(response)
+    assert [line["row"] for line in lines] == list(range(10))
+    assert all(line["status"] == "success" for line in lines)
+
+
+def test_stream_endpoint_rejects_csv_without_columns(client):
+    response = client.post("/predict/stream", content=b"a,b\n1,2\n", headers={"content-type": "text/csv"})
+    (line,) = stream_lines(response)
+    assert line["status"] == "error" and line["detail"].startswith("Missing columns")
+
+
+def test_stream_endpoint_sends_results_before_the_body_ends(client, monkeypatch):
+    from app import main
+    monkeypatch.setattr(main, "STREAM_CHUNK_SIZE", 2)
+    first_rows = (json.dumps(APPLICANT) + "\n").encode() * 2
+    sent = []
+
+    async def run():
+        first_result = asyncio.Event()
+        messages = [{"type": "http.request", "body": first_rows, "more_body": True}]
+
+        messages.append({"type": "http.request", "body": first_rows, "more_body": False})
+
+        async def receive():
+            if len(messages) == 1:
+                # The rest of the body only arrives once the first block's results are out
+                await asyncio.wait_for(first_result.wait(), timeout=5)
+            if messages:
+                return messages.pop(0)
+            # A connected client: no disconnect until the response is done
+            await asyncio.Event().wait()
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and message.get("body"):
+                first_result.set()
+
+        scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+                 "method": "POST", "scheme": "http", "path": "/predict/stream", "raw_path": b"/predict/stream",
+                 "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/x-ndjson")],
+                 "client": ("test", 1), "server": ("test", 80)}
+        await main.app(scope, receive, send)
+
+    asyncio.run(run())
+    bodies = [message["body"] for message in sent if message["type"] == "http.response.body" and message["body"]]
+    rows = [json.loads(line)["row"] for body in bodies for line in body.splitlines()]
+    assert rows == [0, 1, 2, 3]
+    assert len(bodies) == 2
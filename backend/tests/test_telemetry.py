@@ -0,0 +1,31 @@
+# tests/test_telemetry.py
+import threading
+
+from app.telemetry import Counter, Histogram
+
+
+def run_threads(n, target):
+    for _ in range(n):
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+
+def test_finished_threads_fold_their_shards():
+    counter = Counter("test_total", "Test counter", ["endpoint"])
+    run_threads(200, lambda: counter.inc(("/predict",)))
+    assert len(counter._shards) <= 1
+    assert counter.render()[-1] == 'test_total{endpoint="/predict"} 200'
+
+
+def test_live_and_finished_threads_are_both_rendered():
+    histogram = Histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    run_threads(50, lambda: histogram.observe(0.5))
+    assert len(histogram._shards) <= 2
+    lines = histogram.render()
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert "test_seconds_count 51" in lines
+
+    histogram.reset()
+    assert histogram.render()[2:] == []
@@ -0,0 +1,94 @@
+# tests/test_tree_engine.py
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from ml_model.tree_engine import (TreeEnsembleEngine, check_parity, compile_model,
+                                  compile_serving_model)
+
+
+def make_data(n_classes, rows=600, n_features=7, seed=0):
+    rng = np.random.default_rng(seed)
+    # Wide, shifted columns so the folded scaler is far from the identity
+    X = rng.normal(size=(rows, n_features)) * rng.uniform(1, 1e4, n_features) + rng.uniform(-1e3, 1e5, n_features)
+    weights = rng.normal(size=n_features)
+    score = ((X - X.mean(axis=0)) / X.std(axis=0)) @ weights
+    y = np.digitize(score, np.quantile(score, np.linspace(0, 1, n_classes + 1)[1:-1]))
+    return X, y
+
+
+MODELS = {
+    "random_forest": (lambda: RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0), 4),
+    "gradient_boosting_multiclass": (lambda: GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0), 4),
+    "gradient_boosting_binary": (lambda: GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0), 2),
+}
+
+
+@pytest.fixture(scope="module", params=sorted(MODELS))
+def fitted(request):
+    make_model, n_classes = MODELS[request.param]
+    X, y = make_data(n_classes)
+    scaler = StandardScaler().fit(X[:400])
+    model = make_model().fit(scaler.transform(X[:400]), y[:400])
+    return model, scaler, X[400:]
+
+
+def test_plain_engine_matches_model(fitted):
+    model, scaler, X = fitted
+    engine = compile_model(model)
+    X_scaled = scaler.transform(X)
+
+    np.testing.assert_array_equal(engine.predict(X_scaled), model.predict(X_scaled))
+    assert check_parity(engine, model, X_scaled)["match"]
+
+
+def test_folded_engine_matches_model(fitted):
+    model, scaler, X = fitted
+    engine = compile_serving_model(model, scaler)
+
+    assert engine.folded
+    np.testing.assert_array_equal(engine.predict(X), model.predict(scaler.transform(X)))
+    assert check_parity(engine, model, X, scaler=scaler)["match"]
+
+
+def test_fold_scaler_twice_is_rejected(fitted):
+    model, scaler, _ = fitted
+    with pytest.raises(ValueError):
+        compile_serving_model(model, scaler).fold_scaler(scaler)
+
+
+@pytest.mark.parametrize("array", ["left", "right", "roots"])
+def test_out_of_range_index_is_rejected(fitted, array):
+    model, scaler, X = fitted
+    engine = compile_model(model)
+    getattr(engine, array)[0] = engine.n_nodes
+
+    with pytest.raises(ValueError, match="outside the node arrays"):
+        engine.predict(scaler.transform(X))
+
+
+def test_too_few_features_is_rejected(fitted):
+    model, scaler, X = fitted
+    engine = compile_model(model)
+    with pytest.raises(ValueError, match="features"):
+        engine.predict(scaler.transform(X)[:, :2])
+
+
+def test_unsupported_model_is_rejected():
+    with pytest.raises(TypeError):
+        TreeEnsembleEngine.from_model(StandardScaler())
+
+
+def test_check_parity_keeps_feature_names(recwarn):
+    import pandas as pd
+
+    X, y = make_data(3)
+    frame = pd.DataFrame(X, columns=[f"f{i}" for i in range(X.shape[1])])
+    scaler = StandardScaler().fit(frame)
+    scaled = pd.DataFrame(scaler.transform(frame), columns=frame.columns)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(scaled, y)
+
+    assert check_parity(compile_model(model), model, scaled)["match"]
+    assert check_parity(compile_serving_model(model, scaler), model, frame, scaler=scaler)["match"]
+    assert not [w for w in recwarn if "feature names" in str(w.message)]